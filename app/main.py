@@ -1,12 +1,38 @@
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Literal, Optional, Type
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from fastapi import Body, Depends, FastAPI, HTTPException, Query
+from fastapi import Body, Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from fastapi.security import HTTPBearer
 from firebase_admin import auth
-from firebase_admin.auth import verify_id_token
-from pydantic import BaseModel
-
-from services.firestore_service import add_reminder, add_task, get_reminders, update_reminder
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from app.services.async_firestore_service import (
+    add_reminder,
+    add_task,
+    apply_batch,
+    delete_task,
+    list_page,
+    search_tasks,
+    update_reminder,
+    update_task,
+    update_user_preferences,
+)
+from app.services.data_transfer import (
+    TRANSFER_COLLECTIONS,
+    export_ndjson,
+    import_ndjson,
+)
+from app.services.firestore_service import OPEN_TASK_STATUSES, to_due_at
+from app.services.metrics import MetricsMiddleware, render_metrics
+from app.services.rate_limit import RateLimitMiddleware
+from app.services.recurrence import parse_rule
+from app.services.token_cache import (
+    start_certificate_refresher,
+    token_cache,
+    verify_token_async,
+)
 
 app = FastAPI(
     title="Personal Assistant Backend API",
@@ -15,36 +41,227 @@ app = FastAPI(
     version="1.0.0",
 )
 
+app.add_middleware(RateLimitMiddleware)
+# Added last so it wraps the rate limiter and also counts rejected requests.
+app.add_middleware(MetricsMiddleware)
+
 security = HTTPBearer()
 
+# Maximum number of operations accepted by one batch request.
+MAX_BATCH_OPERATIONS = 2000
+
+# Page sizes of the list endpoints.
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Longest window of GET /tasks/upcoming.
+MAX_UPCOMING_HOURS = 24 * 31
+
+
+@app.on_event("startup")
+def refresh_auth_certificates():
+    """
+    Keep the Firebase token signing certificates fresh in the background.
+    """
+    start_certificate_refresher()
+
 
 # Dependency for Authentication
-def get_current_user(token: str = Depends(security)):
+async def get_current_user(token: str = Depends(security)):
     """
     Validate Firebase ID token and return user info.
+
+    Decoded tokens are cached until they expire, so repeat requests with the
+    same token skip signature verification and never leave the event loop.
     """
     try:
-        decoded_token = verify_id_token(token.credentials)
+        decoded_token = await verify_token_async(token.credentials)
         return decoded_token
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
 
+@app.get(
+    "/auth/token-cache",
+    tags=["Users"],
+    summary="Token cache statistics",
+    description="Returns hit, miss and eviction counters of the verified-token cache.",
+)
+async def token_cache_stats(user_id: str = Depends(get_current_user)):
+    """
+    Report the verified-token cache counters.
+
+    Args:
+        user_id (str): Authenticated user's ID.
+
+    Returns:
+        dict: Cache size, capacity, hits, misses and evictions.
+    """
+    return token_cache.stats()
+
+
+@app.get(
+    "/metrics",
+    tags=["Monitoring"],
+    summary="Prometheus metrics",
+    description="Request latency histograms, in-flight requests and Firestore and "
+    "MailerSend call timings in the Prometheus text format.",
+)
+def metrics():
+    """
+    Expose the process metrics for Prometheus to scrape. Unauthenticated, like
+    other scrape targets; restrict access at the network level.
+    """
+    payload, content_type = render_metrics()
+    return Response(payload, media_type=content_type)
+
+
 # Pydantic Models for Validation
-class Reminder(BaseModel):
-    title: str
-    due_date: str
+class Recurring(BaseModel):
     recurring: bool = False
     recurrence_interval: Optional[str] = None
+    recurrence_rule: Optional[str] = None
+
+    @field_validator("recurrence_rule")
+    @classmethod
+    def check_recurrence_rule(cls, rule: Optional[str]) -> Optional[str]:
+        if rule is not None:
+            parse_rule(rule)
+        return rule
+
+
+class Reminder(Recurring):
+    title: str
+    due_date: str
 
 
-class Task(BaseModel):
+class Task(Recurring):
     title: str
     due_date: str
     priority: Optional[str] = "Medium"
     category: Optional[str] = None
-    recurring: bool = False
-    recurrence_interval: Optional[str] = None
+
+
+class Preferences(BaseModel):
+    notification_mode: Optional[Literal["digest", "immediate"]] = None
+    timezone: Optional[str] = None
+
+    @field_validator("timezone")
+    @classmethod
+    def check_timezone(cls, name: Optional[str]) -> Optional[str]:
+        if name is not None:
+            try:
+                ZoneInfo(name)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError(f"Unknown time zone: {name}")
+        return name
+
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[str] = None
+    data: Dict = {}
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation] = Field(..., max_length=MAX_BATCH_OPERATIONS)
+
+
+def validate_update(model: Type[BaseModel], data: Dict) -> Dict:
+    """
+    Validate the fields of a partial update that `model` defines, returning the
+    update with those fields coerced. Other fields (e.g. `status`) pass through.
+
+    Raises:
+        ValidationError: A field has an invalid value.
+    """
+    instance = model.model_construct()
+    validated = dict(data)
+    for name, value in data.items():
+        if name in model.model_fields:
+            instance = model.__pydantic_validator__.validate_assignment(instance, name, value)
+            validated[name] = getattr(instance, name)
+    return validated
+
+
+async def run_batch(
+    user_id: str, collection: str, operations: List[BatchOperation], model: Type[BaseModel]
+) -> Dict:
+    """
+    Validate batch operations and apply the valid ones.
+
+    Creates are validated against `model` and updates against the fields of
+    `model` they set. Updates and deletes must name an item. Invalid operations
+    fail on their own without affecting the rest.
+
+    Returns:
+        dict: Per-operation results, in request order, plus success counts.
+    """
+    results: List[Optional[Dict]] = [None] * len(operations)
+    valid, positions = [], []
+    for index, operation in enumerate(operations):
+        try:
+            if operation.op == "create":
+                data = model(**operation.data).model_dump()
+            elif not operation.id:
+                raise ValueError(f"'id' is required for {operation.op} operations")
+            elif operation.op == "update":
+                data = validate_update(model, operation.data)
+            else:
+                data = operation.data
+        except (ValidationError, ValueError) as e:
+            results[index] = {
+                "op": operation.op,
+                "id": operation.id,
+                "status": "error",
+                "error": str(e),
+            }
+            continue
+        valid.append({"op": operation.op, "id": operation.id, "data": data})
+        positions.append(index)
+
+    for index, result in zip(positions, await apply_batch(user_id, collection, valid)):
+        results[index] = result
+
+    failed = sum(result["status"] == "error" for result in results)
+    return {
+        "results": [{"index": i, **result} for i, result in enumerate(results)],
+        "succeeded": len(results) - failed,
+        "failed": failed,
+    }
+
+
+async def fetch_page(
+    user_id: str,
+    collection: str,
+    limit: int,
+    cursor: Optional[str],
+    fields: Optional[str],
+    **query,
+) -> Dict:
+    """
+    Return one page of a list endpoint, mapping service errors to HTTP errors.
+
+    Extra keyword arguments (`filters`, `due_after`, `due_before`) narrow the
+    query; see `list_page`.
+    """
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    page = await list_page(user_id, collection, limit, cursor, field_list, **query)
+    if "error" in page:
+        # Read failures are reported as "Failed to ..."; other errors are about
+        # the request itself, such as a bad cursor or field path.
+        status_code = 404 if page["error"].startswith("Failed to") else 400
+        raise HTTPException(status_code=status_code, detail=page["error"])
+    return page
+
+
+def parse_due(name: str, value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO date query parameter into UTC, as stored in `due_at`."""
+    if value is None:
+        return None
+    try:
+        return to_due_at(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
 
 
 # User Management Endpoints
@@ -99,6 +316,37 @@ def get_user(email: str = Query(...)):
         raise HTTPException(status_code=404, detail=f"Error retrieving user: {str(e)}")
 
 
+@app.put(
+    "/users/me/preferences",
+    tags=["Users"],
+    summary="Update notification preferences",
+    description="Sets the user's time zone and chooses digest or immediate emails.",
+    response_model=Dict,
+)
+async def set_preferences(
+    user_id: str = Depends(get_current_user), preferences: Preferences = Body(...)
+):
+    """
+    Update the authenticated user's notification preferences.
+
+    Args:
+        user_id (str): Authenticated user's ID.
+        preferences (Preferences): Fields to change. `notification_mode`
+            "digest" groups a user's due items into one email per tick or day,
+            "immediate" sends one email per item. `timezone` is an IANA name;
+            daily maintenance runs at the user's local off-peak time.
+
+    Returns:
+        dict: Update status.
+    """
+    result = await update_user_preferences(
+        user_id["uid"], preferences.model_dump(exclude_none=True)
+    )
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
 # Reminder Endpoints
 @app.post(
     "/reminders",
@@ -107,7 +355,7 @@ def get_user(email: str = Query(...)):
     description="Creates a new reminder for the authenticated user.",
     response_model=Dict,
 )
-def create_reminder(
+async def create_reminder(
     user_id: str = Depends(get_current_user), reminder: Reminder = Body(...)
 ):
     """
@@ -120,7 +368,7 @@ def create_reminder(
     Returns:
         dict: Created reminder details.
     """
-    result = add_reminder(user_id["uid"], reminder.dict())
+    result = await add_reminder(user_id["uid"], reminder.model_dump())
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -129,24 +377,28 @@ def create_reminder(
 @app.get(
     "/reminders",
     tags=["Reminders"],
-    summary="Retrieve all reminders",
-    description="Fetches all reminders for the authenticated user.",
-    response_model=List[Dict],
+    summary="Retrieve reminders",
+    description="Fetches one page of the authenticated user's reminders, ordered by due date.",
 )
-def retrieve_reminders(user_id: str = Depends(get_current_user)):
+async def retrieve_reminders(
+    user_id: str = Depends(get_current_user),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+):
     """
-    Retrieve all reminders for the authenticated user.
+    Retrieve a page of reminders for the authenticated user.
 
     Args:
         user_id (str): Authenticated user's ID.
+        limit (int): Maximum number of reminders to return.
+        cursor (str, optional): `next_cursor` from the previous page.
+        fields (str, optional): Comma-separated fields to return.
 
     Returns:
-        list: List of reminders.
+        dict: The page `items` and the `next_cursor` (null on the last page).
     """
-    reminders = get_reminders(user_id["uid"])
-    if isinstance(reminders, dict) and "error" in reminders:
-        raise HTTPException(status_code=404, detail=reminders["error"])
-    return reminders
+    return await fetch_page(user_id["uid"], "reminders", limit, cursor, fields)
 
 
 @app.put(
@@ -156,7 +408,7 @@ def retrieve_reminders(user_id: str = Depends(get_current_user)):
     description="Updates the details of a specific reminder.",
     response_model=Dict,
 )
-def modify_reminder(
+async def modify_reminder(
     reminder_id: str,
     user_id: str = Depends(get_current_user),
     updates: dict = Body(...),
@@ -172,12 +424,35 @@ def modify_reminder(
     Returns:
         dict: Update status.
     """
-    result = update_reminder(user_id["uid"], reminder_id, updates)
+    result = await update_reminder(user_id["uid"], reminder_id, updates)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 
+@app.post(
+    "/reminders:batch",
+    tags=["Reminders"],
+    summary="Create, update and delete reminders in bulk",
+    description="Applies mixed create/update/delete operations to the user's reminders.",
+    response_model=Dict,
+)
+async def batch_reminders(
+    user_id: str = Depends(get_current_user), request: BatchRequest = Body(...)
+):
+    """
+    Apply a batch of reminder operations for the authenticated user.
+
+    Args:
+        user_id (str): Authenticated user's ID.
+        request (BatchRequest): Operations to apply, in order.
+
+    Returns:
+        dict: Per-operation results and success counts.
+    """
+    return await run_batch(user_id["uid"], "reminders", request.operations, Reminder)
+
+
 # Task Endpoints
 @app.post(
     "/tasks",
@@ -186,7 +461,7 @@ def modify_reminder(
     description="Creates a new task for the authenticated user.",
     response_model=Dict,
 )
-def create_task(user_id: str = Depends(get_current_user), task: Task = Body(...)):
+async def create_task(user_id: str = Depends(get_current_user), task: Task = Body(...)):
     """
     Create a new task for the authenticated user.
 
@@ -197,4 +472,293 @@ def create_task(user_id: str = Depends(get_current_user), task: Task = Body(...)
     Returns:
         dict: Created task details.
     """
-    return add_task(user_id["uid"], task.dict())
+    return await add_task(user_id["uid"], task.model_dump())
+
+
+@app.get(
+    "/tasks",
+    tags=["Tasks"],
+    summary="Retrieve tasks",
+    description="Fetches one page of the authenticated user's tasks, ordered by due date.",
+)
+async def retrieve_tasks(
+    user_id: str = Depends(get_current_user),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    status: Optional[str] = Query(None),
+    priority: Optional[str] = Query(None),
+    category: Optional[str] = Query(None),
+    due_after: Optional[str] = Query(None),
+    due_before: Optional[str] = Query(None),
+):
+    """
+    Retrieve a page of tasks for the authenticated user.
+
+    Filters are applied by the Firestore query, so a page reads only matching
+    tasks. `due_after` and `due_before` select an agenda window.
+
+    Args:
+        user_id (str): Authenticated user's ID.
+        limit (int): Maximum number of tasks to return.
+        cursor (str, optional): `next_cursor` from the previous page.
+        fields (str, optional): Comma-separated fields to return.
+        status (str, optional): Only tasks with this status.
+        priority (str, optional): Only tasks with this priority.
+        category (str, optional): Only tasks in this category.
+        due_after (str, optional): Only tasks due at or after this ISO date.
+        due_before (str, optional): Only tasks due before this ISO date.
+
+    Returns:
+        dict: The page `items` and the `next_cursor` (null on the last page).
+    """
+    filters = {
+        field: value
+        for field, value in (("status", status), ("priority", priority), ("category", category))
+        if value is not None
+    }
+    window = {
+        "due_after": parse_due("due_after", due_after),
+        "due_before": parse_due("due_before", due_before),
+    }
+    query = {key: value for key, value in window.items() if value is not None}
+    if filters:
+        query["filters"] = filters
+    return await fetch_page(user_id["uid"], "tasks", limit, cursor, fields, **query)
+
+
+@app.get(
+    "/tasks/overdue",
+    tags=["Tasks"],
+    summary="Retrieve overdue tasks",
+    description="Fetches one page of the user's open tasks that are past their due date.",
+)
+async def retrieve_overdue_tasks(
+    user_id: str = Depends(get_current_user),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+):
+    """
+    Retrieve a page of overdue tasks for the authenticated user, oldest first.
+
+    Args:
+        user_id (str): Authenticated user's ID.
+        limit (int): Maximum number of tasks to return.
+        cursor (str, optional): `next_cursor` from the previous page.
+        fields (str, optional): Comma-separated fields to return.
+
+    Returns:
+        dict: The page `items` and the `next_cursor` (null on the last page).
+    """
+    return await fetch_page(
+        user_id["uid"],
+        "tasks",
+        limit,
+        cursor,
+        fields,
+        filters={"status": OPEN_TASK_STATUSES},
+        due_before=datetime.now(timezone.utc),
+    )
+
+
+@app.get(
+    "/tasks/upcoming",
+    tags=["Tasks"],
+    summary="Retrieve upcoming tasks",
+    description="Fetches one page of the user's open tasks due in the next hours.",
+)
+async def retrieve_upcoming_tasks(
+    user_id: str = Depends(get_current_user),
+    hours: int = Query(24, ge=1, le=MAX_UPCOMING_HOURS),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+):
+    """
+    Retrieve a page of the authenticated user's open tasks due within `hours`.
+
+    Args:
+        user_id (str): Authenticated user's ID.
+        hours (int): Length of the window, starting now.
+        limit (int): Maximum number of tasks to return.
+        cursor (str, optional): `next_cursor` from the previous page.
+        fields (str, optional): Comma-separated fields to return.
+
+    Returns:
+        dict: The page `items` and the `next_cursor` (null on the last page).
+    """
+    now = datetime.now(timezone.utc)
+    return await fetch_page(
+        user_id["uid"],
+        "tasks",
+        limit,
+        cursor,
+        fields,
+        filters={"status": OPEN_TASK_STATUSES},
+        due_after=now,
+        due_before=now + timedelta(hours=hours),
+    )
+
+
+@app.get(
+    "/tasks/search",
+    tags=["Tasks"],
+    summary="Search tasks",
+    description="Searches the title, category and description of the user's tasks.",
+)
+async def search_user_tasks(
+    query: str = Query(..., min_length=1),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    user_id: str = Depends(get_current_user),
+):
+    """
+    Search the authenticated user's tasks.
+
+    Args:
+        query (str): Case-insensitive text to look for.
+        limit (int): Maximum number of results.
+        user_id (str): Authenticated user's ID.
+
+    Returns:
+        list: Matching tasks, best matches first.
+    """
+    tasks = await search_tasks(user_id["uid"], query, limit)
+    if isinstance(tasks, dict) and "error" in tasks:
+        raise HTTPException(status_code=500, detail=tasks["error"])
+    return tasks
+
+
+@app.put(
+    "/tasks/{task_id}",
+    tags=["Tasks"],
+    summary="Update a task",
+    description="Updates the details of a specific task.",
+    response_model=Dict,
+)
+async def modify_task(
+    task_id: str,
+    user_id: str = Depends(get_current_user),
+    updates: dict = Body(...),
+):
+    """
+    Update a specific task for the authenticated user.
+
+    Args:
+        task_id (str): Task ID.
+        user_id (str): Authenticated user's ID.
+        updates (dict): Task updates.
+
+    Returns:
+        dict: Update status.
+    """
+    result = await update_task(user_id["uid"], task_id, updates)
+    if "error" in result:
+        status_code = 404 if result["error"] == "Task not found" else 400
+        raise HTTPException(status_code=status_code, detail=result["error"])
+    return result
+
+
+@app.delete(
+    "/tasks/{task_id}",
+    tags=["Tasks"],
+    summary="Delete a task",
+    description="Deletes a specific task.",
+    response_model=Dict,
+)
+async def remove_task(task_id: str, user_id: str = Depends(get_current_user)):
+    """
+    Delete a specific task for the authenticated user.
+
+    Args:
+        task_id (str): Task ID.
+        user_id (str): Authenticated user's ID.
+
+    Returns:
+        dict: Deletion status.
+    """
+    result = await delete_task(user_id["uid"], task_id)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
+@app.post(
+    "/tasks:batch",
+    tags=["Tasks"],
+    summary="Create, update and delete tasks in bulk",
+    description="Applies mixed create/update/delete operations to the user's tasks.",
+    response_model=Dict,
+)
+async def batch_tasks(user_id: str = Depends(get_current_user), request: BatchRequest = Body(...)):
+    """
+    Apply a batch of task operations for the authenticated user.
+
+    Args:
+        user_id (str): Authenticated user's ID.
+        request (BatchRequest): Operations to apply, in order.
+
+    Returns:
+        dict: Per-operation results and success counts.
+    """
+    return await run_batch(user_id["uid"], "tasks", request.operations, Task)
+
+
+# Data Transfer Endpoints
+@app.get(
+    "/export",
+    tags=["Data Transfer"],
+    summary="Export reminders and tasks",
+    description="Streams the user's reminders and tasks as NDJSON.",
+    response_class=StreamingResponse,
+)
+async def export_data(
+    user_id: str = Depends(get_current_user),
+    collections: str = Query(",".join(TRANSFER_COLLECTIONS)),
+):
+    """
+    Stream the authenticated user's data, one `{"collection", "item"}` record per line.
+
+    Args:
+        user_id (str): Authenticated user's ID.
+        collections (str): Comma-separated collections to export.
+
+    Returns:
+        StreamingResponse: NDJSON records, read from Firestore page by page.
+    """
+    names = [c.strip() for c in collections.split(",") if c.strip()]
+    unknown = set(names) - set(TRANSFER_COLLECTIONS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown collections: {sorted(unknown)}")
+    return StreamingResponse(
+        export_ndjson(user_id["uid"], names),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="export.ndjson"'},
+    )
+
+
+@app.post(
+    "/import",
+    tags=["Data Transfer"],
+    summary="Import reminders and tasks",
+    description="Imports NDJSON records in the format produced by GET /export.",
+    response_model=Dict,
+)
+async def import_data(request: Request, user_id: str = Depends(get_current_user)):
+    """
+    Import NDJSON records for the authenticated user.
+
+    The request body is parsed as it is received and written in batches, so
+    whole accounts are never held in memory. Items with an `id` replace the
+    item with that ID, which makes re-running an import safe.
+
+    Args:
+        request (Request): Request with an NDJSON body.
+        user_id (str): Authenticated user's ID.
+
+    Returns:
+        dict: Lines read, items imported per collection, and failed lines.
+    """
+    return await import_ndjson(
+        user_id["uid"], request.stream(), {"reminders": Reminder, "tasks": Task}
+    )
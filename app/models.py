@@ -18,6 +18,7 @@ class Reminder(BaseModel):
     due_date: str  # ISO 8601 format (e.g., "2024-12-31T10:00:00")
     recurring: Optional[bool] = False
     recurrence_interval: Optional[str] = None  # Options: "daily", "weekly", "monthly"
+    recurrence_rule: Optional[str] = None  # RRULE, e.g. "FREQ=MONTHLY;BYMONTHDAY=-1"
     description: Optional[str] = None
 
 
@@ -31,6 +32,7 @@ class Task(BaseModel):
     category: Optional[str] = None
     recurring: Optional[bool] = False
     recurrence_interval: Optional[str] = None  # Options: "daily", "weekly", "monthly"
+    recurrence_rule: Optional[str] = None  # RRULE, e.g. "FREQ=MONTHLY;BYMONTHDAY=-1"
     description: Optional[str] = None
     status: Optional[str] = "Pending"  # Default status
 
@@ -0,0 +1,225 @@
+import gzip
+import json
+import logging
+import os
+import sys
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Set
+
+from firebase_admin import firestore
+
+from app.services import metrics, task_index, user_cache
+from app.services.firestore_service import (
+    BATCH_LIMIT,
+    db,
+    to_due_at,
+    user_collection,
+    with_due_at,
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# Cold storage root. Archives are written to
+# `{ARCHIVE_DIR}/{user_id}/{collection}/{timestamp}-{run}.ndjson.gz`.
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+ARCHIVE_PAGE_SIZE = int(os.getenv("ARCHIVE_PAGE_SIZE", str(BATCH_LIMIT)))
+
+# What counts as finished, per collection. Recurring items are never archived,
+# because they come back at their next occurrence.
+FINISHED = {"reminders": ("sent", True), "tasks": ("status", "Completed")}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot archive value of type {type(value).__name__}")
+
+
+def archive_path(user_id: str, collection: str) -> str:
+    run = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    return os.path.join(
+        ARCHIVE_DIR, user_id, collection, f"{run}-{uuid.uuid4().hex[:8]}.ndjson.gz"
+    )
+
+
+def archive_files(user_id: str, collection: str) -> List[str]:
+    """Return a user's archive files for a collection, oldest first."""
+    directory = os.path.join(ARCHIVE_DIR, user_id, collection)
+    if not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, name)
+        for name in sorted(os.listdir(directory))
+        if name.endswith(".ndjson.gz")
+    ]
+
+
+def read_archive(path: str) -> Iterator[Dict]:
+    """
+    Yield the items of an archive file. A file cut short by a crash yields the
+    items written before its last flush.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if line.endswith("\n"):
+                    yield json.loads(line)
+        except (EOFError, zlib.error):
+            logger.warning(f"Archive {path} is truncated; read up to the last complete item")
+
+
+def _finished_items(user_id: str, collection: str, before: datetime) -> Iterator[List]:
+    """Yield pages of the finished, non-recurring items due before `before`."""
+    field, value = FINISHED[collection]
+    query = (
+        user_collection(user_id, collection)
+        .where(filter=firestore.FieldFilter(field, "==", value))
+        .where(filter=firestore.FieldFilter("due_at", "<", before))
+        .order_by("due_at")
+        .limit(ARCHIVE_PAGE_SIZE)
+    )
+    last_snapshot = None
+    while True:
+        page = query.start_after(last_snapshot) if last_snapshot else query
+        snapshots = list(page.stream())
+        if not snapshots:
+            return
+        yield [s for s in snapshots if not (s.to_dict() or {}).get("recurring")]
+        if len(snapshots) < ARCHIVE_PAGE_SIZE:
+            return
+        last_snapshot = snapshots[-1]
+
+
+@metrics.instrumented("firestore")
+def archive_finished_items(user_id: str, collection: str, threshold: str) -> Dict:
+    """
+    Move a user's finished items due before `threshold` to cold storage.
+
+    Items are streamed page by page into a gzip-compressed NDJSON file. Each
+    page is flushed to disk before its documents are deleted in one batch, so
+    a crash can leave an item both archived and live, but never lost; restoring
+    it again is harmless.
+
+    Args:
+        user_id (str): Owner of the items.
+        collection (str): "reminders" or "tasks".
+        threshold (str): ISO date; naive dates are in server-local time.
+
+    Returns:
+        dict: The number of archived items and the archive file, or an error.
+    """
+    path, raw, archive, archived = None, None, None, 0
+    try:
+        before = to_due_at(threshold)
+        for snapshots in _finished_items(user_id, collection, before):
+            if not snapshots:
+                continue
+            if archive is None:
+                path = archive_path(user_id, collection)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                raw = open(path, "wb")
+                archive = gzip.GzipFile(fileobj=raw, mode="wb")
+            for snapshot in snapshots:
+                item = {**snapshot.to_dict(), "id": snapshot.id}
+                archive.write((json.dumps(item, default=_json_default) + "\n").encode())
+            archive.flush(zlib.Z_SYNC_FLUSH)
+            raw.flush()
+            os.fsync(raw.fileno())
+
+            batch = db.batch()
+            for snapshot in snapshots:
+                batch.delete(snapshot.reference)
+            batch.commit()
+            archived += len(snapshots)
+            if collection == "tasks":
+                for snapshot in snapshots:
+                    task_index.remove_task(user_id, snapshot.id)
+
+        if archived:
+            user_cache.invalidate(user_id, collection)
+        logger.info(f"Archived {archived} {collection} for user {user_id}")
+        return {"message": f"Archived {archived} {collection}", "archived": archived, "file": path}
+    except Exception as e:
+        logger.error(f"Failed to archive {collection} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to archive {collection}: {str(e)}"}
+    finally:
+        if archive is not None:
+            archive.close()
+            raw.close()
+
+
+def expire_old_reminders(user_id: str, expiry_threshold: str) -> Dict:
+    """Archive a user's sent, non-recurring reminders due before the threshold."""
+    return archive_finished_items(user_id, "reminders", expiry_threshold)
+
+
+def archive_completed_tasks(user_id: str, threshold: str) -> Dict:
+    """Archive a user's completed, non-recurring tasks due before the threshold."""
+    return archive_finished_items(user_id, "tasks", threshold)
+
+
+@metrics.instrumented("firestore")
+def restore_items(
+    user_id: str, collection: str, item_ids: Optional[Set[str]] = None
+) -> Dict:
+    """
+    Copy archived items back into a user's live collection.
+
+    Items are written under their original IDs, so restoring twice is harmless.
+    Archive files are only removed or rewritten once their restored items are
+    committed.
+
+    Args:
+        user_id (str): Owner of the items.
+        collection (str): "reminders" or "tasks".
+        item_ids (Set[str], optional): Items to restore. Defaults to all of them.
+
+    Returns:
+        dict: The number of restored items, or an error.
+    """
+    try:
+        items_ref = user_collection(user_id, collection)
+        restored = 0
+        for path in archive_files(user_id, collection):
+            items = list(read_archive(path))
+            wanted = [item for item in items if item_ids is None or item["id"] in item_ids]
+            if not wanted:
+                continue
+            for start in range(0, len(wanted), BATCH_LIMIT):
+                batch = db.batch()
+                for item in wanted[start : start + BATCH_LIMIT]:
+                    batch.set(items_ref.document(item["id"]), with_due_at(item))
+                batch.commit()
+            restored += len(wanted)
+
+            remaining = [item for item in items if item["id"] not in item_ids] if item_ids else []
+            if remaining:
+                with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+                    for item in remaining:
+                        f.write(json.dumps(item) + "\n")
+                os.replace(path + ".tmp", path)
+            else:
+                os.remove(path)
+
+        if restored:
+            user_cache.invalidate(user_id, collection)
+            if collection == "tasks":
+                task_index.drop(user_id)
+        logger.info(f"Restored {restored} {collection} for user {user_id}")
+        return {"message": f"Restored {restored} {collection}", "restored": restored}
+    except Exception as e:
+        logger.error(f"Failed to restore {collection} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to restore {collection}: {str(e)}"}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 4 or sys.argv[1] != "restore" or sys.argv[3] not in FINISHED:
+        sys.exit("usage: python -m app.services.archive restore <user_id> <collection> [id ...]")
+    logger.info(restore_items(sys.argv[2], sys.argv[3], set(sys.argv[4:]) or None))
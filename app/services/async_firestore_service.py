@@ -0,0 +1,505 @@
+import asyncio
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+from firebase_admin import firestore, firestore_async
+from google.api_core.exceptions import NotFound
+
+from app.services import metrics, task_index, user_cache
+from app.services.firestore_service import (
+    BATCH_LIMIT,
+    NEW_ITEM_DEFAULTS,
+    ReminderModel,
+    TaskModel,
+    async_read_flights,
+    prepare_new_item,
+    with_due_at,
+)
+from app.services.maintenance import maintenance_slot, user_timezone
+
+# Initialize logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Initialize the async Firestore client. The Firebase app itself is initialized
+# by firestore_service, imported above.
+db = firestore_async.client()
+
+# Async counterparts of the request-path functions in firestore_service. They
+# return the same values, so endpoints can await them without tying up a
+# worker thread per request.
+
+# Shared Functions
+
+
+def user_collection(user_id: str, collection: str):
+    """Return the `users/{user_id}/{collection}` subcollection reference."""
+    return db.collection("users").document(user_id).collection(collection)
+
+
+async def list_collection(user_id: str, collection: str) -> Union[List, Dict]:
+    """
+    Return all of a user's items in a collection, from the user cache or one
+    coalesced read. Reads issued after a write never join one started before it.
+    """
+    return await user_cache.read_through_async(
+        user_id,
+        collection,
+        lambda: async_read_flights.do(
+            f"{collection}:{user_id}:{user_cache.generation(user_id, collection)}",
+            lambda: load_collection(user_id, collection),
+        ),
+    )
+
+
+@metrics.instrumented("firestore")
+async def load_collection(user_id: str, collection: str) -> Union[List, Dict]:
+    try:
+        items = [
+            doc.to_dict() async for doc in user_collection(user_id, collection).stream()
+        ]
+        logger.info(f"Retrieved {collection} for user: {user_id}")
+        return items
+    except Exception as e:
+        logger.error(f"Failed to retrieve {collection} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to retrieve {collection}: {str(e)}"}
+
+
+def _index_result(user_id: str, result: Dict, updates: Optional[Dict] = None):
+    if result["status"] == "created":
+        task_index.add_task(user_id, result["item"])
+    elif result["status"] == "updated":
+        task_index.update_task(user_id, result["id"], updates)
+    else:
+        task_index.remove_task(user_id, result["id"])
+
+
+async def _apply_chunk(user_id: str, collection: str, operations: List[Dict]) -> List[Dict]:
+    items_ref = user_collection(user_id, collection)
+    update_ids = [op["id"] for op in operations if op["op"] == "update"]
+    existing = set()
+    if update_ids:
+        async for snapshot in db.get_all([items_ref.document(i) for i in update_ids]):
+            if snapshot.exists:
+                existing.add(snapshot.id)
+
+    batch = db.batch()
+    results, staged, staged_updates = [], [], []
+    for operation in operations:
+        op, item_id = operation["op"], operation.get("id")
+        try:
+            if op == "create":
+                item_ref = items_ref.document(item_id) if item_id else items_ref.document()
+                item = prepare_new_item(collection, operation.get("data") or {}, item_ref.id)
+                batch.set(item_ref, item)
+                # Later operations in this chunk may update the new item.
+                existing.add(item_ref.id)
+                result = {"op": op, "id": item_ref.id, "status": "created", "item": item}
+            elif op == "update":
+                if item_id not in existing:
+                    raise ValueError("Not found")
+                updates = {k: v for k, v in (operation.get("data") or {}).items() if k != "id"}
+                updates = with_due_at(updates)
+                batch.update(items_ref.document(item_id), updates)
+                result = {"op": op, "id": item_id, "status": "updated"}
+            else:
+                batch.delete(items_ref.document(item_id))
+                existing.discard(item_id)
+                result = {"op": op, "id": item_id, "status": "deleted"}
+        except (TypeError, ValueError) as e:
+            results.append({"op": op, "id": item_id, "status": "error", "error": str(e)})
+            continue
+        results.append(result)
+        staged.append(result)
+        staged_updates.append(updates if op == "update" else None)
+
+    if staged:
+        try:
+            await batch.commit()
+        except Exception as e:
+            for result in staged:
+                result.pop("item", None)
+                result.update({"status": "error", "error": f"Batch commit failed: {str(e)}"})
+            return results
+        if collection == "tasks":
+            for result, updates in zip(staged, staged_updates):
+                _index_result(user_id, result, updates)
+    return results
+
+
+@metrics.instrumented("firestore")
+async def apply_batch(user_id: str, collection: str, operations: List[Dict]) -> List[Dict]:
+    """
+    Apply create, update and delete operations to a user's items in batches.
+
+    Operations are committed in chunks of at most `BATCH_LIMIT` writes, one
+    `WriteBatch` per chunk. Items targeted by updates are checked for
+    existence with one batched read per chunk, so a missing item fails only its
+    own operation. Creates with a client-supplied ID overwrite that item, which
+    makes retried syncs idempotent.
+
+    Args:
+        user_id (str): Owner of the items.
+        collection (str): "reminders" or "tasks".
+        operations (List[Dict]): Operations with an `op` ("create", "update" or
+            "delete"), an `id` (required for updates and deletes) and `data`.
+
+    Returns:
+        list: One result per operation, in order, with its `status` and `id`.
+    """
+    results = []
+    for start in range(0, len(operations), BATCH_LIMIT):
+        chunk = operations[start : start + BATCH_LIMIT]
+        results.extend(await _apply_chunk(user_id, collection, chunk))
+
+    if any(result["status"] != "error" for result in results):
+        user_cache.invalidate(user_id, collection)
+    failed = sum(result["status"] == "error" for result in results)
+    logger.info(
+        f"Applied {len(results) - failed}/{len(results)} {collection} operations "
+        f"for user: {user_id}"
+    )
+    return results
+
+
+def encode_cursor(item: Dict) -> str:
+    """Encode the sort key of the last item of a page as an opaque cursor."""
+    due_at = item.get("due_at")
+    key = [due_at.isoformat() if due_at else None, item["id"]]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """
+    Decode a cursor from `encode_cursor` into start-after values.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        due_at, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return {
+            "due_at": datetime.fromisoformat(due_at) if due_at is not None else None,
+            "__name__": item_id,
+        }
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def list_page(
+    user_id: str,
+    collection: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+) -> Dict:
+    """
+    Return one page of a user's items, ordered by due date. Items without a due
+    date (null `due_at`) come first.
+
+    Only `limit` items (plus one to detect the next page) are read, and with
+    `fields` only those fields are fetched from Firestore. The first page
+    without fields, filters or a window is served from the user cache. Filters
+    are part of the query, served by the (field, `due_at`) composite indexes,
+    so a page costs the same however many items the filters exclude.
+
+    Args:
+        user_id (str): Owner of the items.
+        collection (str): "reminders" or "tasks".
+        limit (int): Maximum number of items in the page.
+        cursor (str, optional): `next_cursor` of the previous page.
+        fields (List[str], optional): Fields to return. `id` is always included.
+        filters (Dict[str, Any], optional): Required field values; a list or
+            tuple matches any of its values.
+        due_after (datetime, optional): Only items due at or after this time.
+        due_before (datetime, optional): Only items due before this time.
+
+    Returns:
+        dict: The page `items` and the `next_cursor`, or an error message.
+            Identical concurrent requests share one read and the same result,
+            which must not be mutated.
+    """
+    key = (
+        f"page:{collection}:{user_id}:{limit}:{cursor}:{fields}:"
+        f"{sorted((filters or {}).items())}:{due_after}:{due_before}"
+    )
+
+    def load():
+        return async_read_flights.do(
+            f"{key}:{user_cache.generation(user_id, collection)}",
+            lambda: load_page(
+                user_id, collection, limit, cursor, fields, filters, due_after, due_before
+            ),
+        )
+
+    if cursor or fields or filters or due_after is not None or due_before is not None:
+        return await load()
+
+    # The plain first page is what polling clients request, so it is cached
+    # like the collection and dropped on every write to it.
+    async def load_first_page():
+        page = await load()
+        return page if "error" in page else {**page, "limit": limit}
+
+    page = await user_cache.read_through_async(
+        user_id,
+        user_cache.first_page_section(collection),
+        load_first_page,
+        accept=lambda cached: cached.get("limit") == limit,
+    )
+    return {k: v for k, v in page.items() if k != "limit"}
+
+
+@metrics.instrumented("firestore")
+async def load_page(
+    user_id: str,
+    collection: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    due_after: Optional[datetime] = None,
+    due_before: Optional[datetime] = None,
+) -> Dict:
+    try:
+        query = user_collection(user_id, collection)
+        for field, value in (filters or {}).items():
+            if isinstance(value, (list, tuple)):
+                query = query.where(filter=firestore.FieldFilter(field, "in", list(value)))
+            else:
+                query = query.where(filter=firestore.FieldFilter(field, "==", value))
+        if due_after is not None:
+            query = query.where(filter=firestore.FieldFilter("due_at", ">=", due_after))
+        if due_before is not None:
+            query = query.where(filter=firestore.FieldFilter("due_at", "<", due_before))
+        query = query.order_by("due_at").order_by("__name__").limit(limit + 1)
+        if fields:
+            query = query.select(sorted({*fields, "id", "due_at"}))
+        if cursor:
+            query = query.start_after(decode_cursor(cursor))
+
+        items = [doc.to_dict() async for doc in query.stream()]
+        next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+        items = items[:limit]
+        if fields:
+            keep = {*fields, "id"}
+            items = [{k: v for k, v in item.items() if k in keep} for item in items]
+        logger.info(f"Retrieved {len(items)} {collection} for user: {user_id}")
+        return {"items": items, "next_cursor": next_cursor}
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        logger.error(f"Failed to list {collection} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to retrieve {collection}: {str(e)}"}
+
+
+async def iter_collection(
+    user_id: str, collection: str, page_size: int = BATCH_LIMIT
+) -> AsyncIterator[Dict]:
+    """
+    Yield every item of a user's collection in document ID order, reading one
+    page of `page_size` documents at a time.
+    """
+    query = (
+        user_collection(user_id, collection)
+        .order_by(firestore.FieldPath.document_id())
+        .limit(page_size)
+    )
+    last_snapshot = None
+    while True:
+        page = query.start_after(last_snapshot) if last_snapshot else query
+        with metrics.track_call("firestore", "iter_collection"):
+            snapshots = [snapshot async for snapshot in page.stream()]
+        for snapshot in snapshots:
+            yield {**snapshot.to_dict(), "id": snapshot.id}
+        if len(snapshots) < page_size:
+            return
+        last_snapshot = snapshots[-1]
+
+
+@metrics.instrumented("firestore")
+async def import_items(user_id: str, collection: str, items: List[Dict]) -> Dict:
+    """
+    Write imported items in batches of at most `BATCH_LIMIT`.
+
+    Unlike creates, imported items keep their own `sent` or `status`; the
+    collection defaults only fill in missing fields. Items with an `id` replace
+    the item with that ID, so re-running an import does not duplicate data.
+
+    Returns:
+        dict: The number of written items, or an error.
+    """
+    try:
+        items_ref = user_collection(user_id, collection)
+        written = []
+        for start in range(0, len(items), BATCH_LIMIT):
+            batch = db.batch()
+            for item in items[start : start + BATCH_LIMIT]:
+                item_id = item.get("id")
+                item_ref = items_ref.document(item_id) if item_id else items_ref.document()
+                data = with_due_at({**NEW_ITEM_DEFAULTS[collection], **item, "id": item_ref.id})
+                batch.set(item_ref, data)
+                written.append(data)
+            await batch.commit()
+        user_cache.invalidate(user_id, collection)
+        if collection == "tasks":
+            for task in written:
+                task_index.add_task(user_id, task)
+        return {"message": f"Imported {len(written)} {collection}", "imported": len(written)}
+    except Exception as e:
+        logger.error(f"Failed to import {collection} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to import {collection}: {str(e)}"}
+
+
+# User Functions
+
+
+@metrics.instrumented("firestore")
+async def update_user_preferences(user_id: str, preferences: Dict) -> Dict:
+    """
+    Merge preferences into a user's profile. Setting a time zone also moves the
+    user's maintenance slot to their local off-peak time.
+    """
+    try:
+        if "timezone" in preferences:
+            tz = user_timezone(preferences["timezone"])
+            preferences = {**preferences, "maintenance_slot": maintenance_slot(user_id, tz)}
+        await db.collection("users").document(user_id).set(preferences, merge=True)
+        user_cache.invalidate(user_id, "profile")
+        logger.info(f"Updated preferences for user: {user_id}")
+        return {"message": "Preferences updated successfully", "preferences": preferences}
+    except Exception as e:
+        logger.error(f"Failed to update preferences for user {user_id}: {str(e)}")
+        return {"error": f"Failed to update preferences: {str(e)}"}
+
+
+# Reminder Functions
+
+
+async def get_reminders(user_id: str) -> Union[List, Dict]:
+    return await list_collection(user_id, "reminders")
+
+
+@metrics.instrumented("firestore")
+async def add_reminder(user_id: str, reminder: Union[Dict, ReminderModel]) -> Dict:
+    try:
+        reminder_ref = user_collection(user_id, "reminders").document()
+
+        reminder_data = (
+            reminder.model_dump() if isinstance(reminder, ReminderModel) else reminder
+        )
+        reminder_data = prepare_new_item("reminders", reminder_data, reminder_ref.id)
+        await reminder_ref.set(reminder_data)
+        user_cache.invalidate(user_id, "reminders")
+        logger.info(f"Added reminder for user: {user_id}")
+        return {"message": "Reminder added successfully", "reminder": reminder_data}
+    except Exception as e:
+        logger.error(f"Failed to add reminder for user {user_id}: {str(e)}")
+        return {"error": f"Failed to add reminder: {str(e)}"}
+
+
+@metrics.instrumented("firestore")
+async def update_reminder(user_id: str, reminder_id: str, updates: Dict) -> Dict:
+    try:
+        reminder_ref = user_collection(user_id, "reminders").document(reminder_id)
+        await reminder_ref.update(with_due_at(updates))
+        user_cache.invalidate(user_id, "reminders")
+        logger.info(f"Updated reminder {reminder_id} for user: {user_id}")
+        return {"message": "Reminder updated successfully"}
+    except NotFound:
+        logger.warning(f"Reminder not found: {reminder_id} for user {user_id}")
+        return {"error": "Reminder not found"}
+    except Exception as e:
+        logger.error(
+            f"Failed to update reminder {reminder_id} for user {user_id}: {str(e)}"
+        )
+        return {"error": f"Failed to update reminder: {str(e)}"}
+
+
+# Task Functions
+
+
+async def get_tasks(user_id: str) -> Union[List, Dict]:
+    return await list_collection(user_id, "tasks")
+
+
+@metrics.instrumented("firestore")
+async def add_task(user_id: str, task: Union[Dict, TaskModel]) -> Dict:
+    try:
+        task_ref = user_collection(user_id, "tasks").document()
+
+        task_data = task.model_dump() if isinstance(task, TaskModel) else task
+        task_data = prepare_new_item("tasks", task_data, task_ref.id)
+        await task_ref.set(task_data)
+        user_cache.invalidate(user_id, "tasks")
+        task_index.add_task(user_id, task_data)
+        return {"message": "Task added successfully", "task": task_data}
+    except Exception as e:
+        logger.error(f"Failed to add task for user {user_id}: {str(e)}")
+        return {"error": f"Failed to add task: {str(e)}"}
+
+
+@metrics.instrumented("firestore")
+async def update_task(user_id: str, task_id: str, updates: Dict) -> Dict:
+    try:
+        updates = with_due_at({k: v for k, v in updates.items() if k != "id"})
+        await user_collection(user_id, "tasks").document(task_id).update(updates)
+        user_cache.invalidate(user_id, "tasks")
+        task_index.update_task(user_id, task_id, updates)
+        logger.info(f"Updated task {task_id} for user: {user_id}")
+        return {"message": "Task updated successfully"}
+    except NotFound:
+        logger.warning(f"Task not found: {task_id} for user {user_id}")
+        return {"error": "Task not found"}
+    except Exception as e:
+        logger.error(f"Failed to update task {task_id} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to update task: {str(e)}"}
+
+
+@metrics.instrumented("firestore")
+async def delete_task(user_id: str, task_id: str) -> Dict:
+    try:
+        await user_collection(user_id, "tasks").document(task_id).delete()
+        user_cache.invalidate(user_id, "tasks")
+        task_index.remove_task(user_id, task_id)
+        logger.info(f"Deleted task {task_id} for user: {user_id}")
+        return {"message": "Task deleted successfully"}
+    except Exception as e:
+        logger.error(f"Failed to delete task {task_id} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to delete task: {str(e)}"}
+
+
+async def load_task_index(
+    user_id: str, version: Optional[str]
+) -> Union[task_index.TaskIndex, Dict]:
+    tasks = await get_tasks(user_id)
+    if isinstance(tasks, dict) and "error" in tasks:
+        return tasks
+    # Indexing a large task list is CPU-bound; keep it off the event loop.
+    return await asyncio.to_thread(task_index.build_index, user_id, tasks, version)
+
+
+async def search_tasks(
+    user_id: str, query: str, limit: Optional[int] = None
+) -> Union[List, Dict]:
+    try:
+        index = task_index.get_index(user_id)
+        if index is None:
+            version = task_index.current_version(user_id)
+            index = await async_read_flights.do(
+                f"task-index:{user_id}:{version}", lambda: load_task_index(user_id, version)
+            )
+            if isinstance(index, dict):
+                return index
+        return index.search(query, limit)
+    except Exception as e:
+        logger.error(f"Failed to search tasks for user {user_id}: {str(e)}")
+        return {"error": str(e)}
@@ -0,0 +1,79 @@
+import logging
+from typing import Dict
+
+from app.services.firestore_service import (
+    bulk_update_collection,
+    to_due_at,
+    user_collection,
+)
+from app.services.job_runner import run_concurrently
+from app.services.user_directory import iter_user_ids
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+COLLECTIONS = ("reminders", "tasks")
+DUE_FIELDS = ["due_date", "due_at", "due_epoch"]
+
+
+def backfill_user(user_id: str) -> Dict:
+    """
+    Add `due_at` and `due_epoch` to a user's reminders and tasks that lack them.
+
+    Items without a valid `due_date` get null due fields, so they still appear
+    in the list endpoints, which order by `due_at`. Only the due fields are
+    read, and only items missing a field are written, so the backfill can be
+    re-run safely.
+
+    Args:
+        user_id (str): The user to backfill.
+
+    Returns:
+        dict: Number of updated items per collection, or an error message.
+    """
+    backfilled = {}
+    for collection in COLLECTIONS:
+        updates = {}
+        for snapshot in user_collection(user_id, collection).select(DUE_FIELDS).stream():
+            item = snapshot.to_dict()
+            if "due_at" in item and "due_epoch" in item:
+                continue
+            try:
+                to_due_at(item.get("due_date") or "")
+                updates[snapshot.id] = {"due_date": item["due_date"]}
+            except (TypeError, ValueError):
+                logger.warning(f"No valid due date on {collection} {snapshot.id} of user {user_id}")
+                updates[snapshot.id] = {"due_at": None, "due_epoch": None}
+
+        if updates:
+            result = bulk_update_collection(user_id, collection, updates)
+            if "error" in result:
+                return result
+        backfilled[collection] = len(updates)
+
+    logger.info(f"Backfilled due dates for user {user_id}: {backfilled}")
+    return {"message": "Due dates backfilled", "backfilled": backfilled}
+
+
+def backfill_all_users() -> Dict:
+    """
+    Backfill the due fields of every user.
+
+    Users are processed concurrently and the job checkpoints its progress, so
+    an interrupted backfill resumes where it stopped.
+
+    Returns:
+        dict: Job stats (users processed and failed).
+    """
+    return run_concurrently(
+        "backfill_due_dates", iter_user_ids(job="backfill_due_dates"), backfill_user
+    )
+
+
+if __name__ == "__main__":
+    logger.info("Backfilling due_at and due_epoch on reminders and tasks...")
+    backfill_all_users()
@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from typing import AsyncIterator, Callable, Dict, Iterable, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from app.services.async_firestore_service import import_items, iter_collection
+from app.services.firestore_service import BATCH_LIMIT
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_COLLECTIONS = ("reminders", "tasks")
+# Longest accepted import line; longer lines fail without being buffered whole.
+MAX_IMPORT_LINE_BYTES = int(os.getenv("MAX_IMPORT_LINE_BYTES", str(1024 * 1024)))
+# Errors listed in an import summary; further errors are only counted.
+MAX_IMPORT_ERRORS = 100
+
+# Derived from `due_date` on import.
+DERIVED_FIELDS = ("due_at", "due_epoch")
+# Kept on import although the models do not define them, as exports carry them;
+# other unknown fields are dropped.
+KEPT_FIELDS = ("id", "sent", "status", "recurrence_start")
+# Document IDs Firestore reserves.
+RESERVED_ID = re.compile(r"__.*__|\.\.?")
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot export value of type {type(value).__name__}")
+
+
+async def export_ndjson(
+    user_id: str, collections: Iterable[str] = TRANSFER_COLLECTIONS
+) -> AsyncIterator[bytes]:
+    """
+    Yield a user's items as NDJSON lines of `{"collection": ..., "item": ...}`.
+
+    Items are read from Firestore one page at a time as the consumer pulls
+    lines, so memory stays flat however large the account is.
+    """
+    exported = 0
+    for collection in collections:
+        async for item in iter_collection(user_id, collection):
+            line = json.dumps({"collection": collection, "item": item}, default=_json_default)
+            yield (line + "\n").encode()
+            exported += 1
+    logger.info(f"Exported {exported} items for user: {user_id}")
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, object]]:
+    """
+    Split a byte stream into NDJSON records.
+
+    Yields:
+        tuple: The 1-based line number and the decoded record, or the
+            ValueError describing why the line is invalid. Blank lines are skipped.
+    """
+    buffer, number, skipping = b"", 0, False
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            number += 1
+            if skipping:
+                skipping = False
+                yield number, ValueError("Line is too long")
+            elif line.strip():
+                yield number, _decode(line)
+        if len(buffer) > MAX_IMPORT_LINE_BYTES:
+            # Drop the oversized line's bytes as they arrive; its end is reported above.
+            buffer, skipping = b"", True
+    if skipping:
+        yield number + 1, ValueError("Line is too long")
+    elif buffer.strip():
+        yield number + 1, _decode(buffer)
+
+
+def _decode(line: bytes) -> object:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {str(e)}")
+
+
+def _validate(record: object, models: Dict[str, Type[BaseModel]]) -> Tuple[str, Dict]:
+    """Return the collection and item of an import record, validated against its model."""
+    if not isinstance(record, dict) or not isinstance(record.get("item"), dict):
+        raise ValueError('Expected {"collection": ..., "item": {...}}')
+    collection = record.get("collection")
+    if collection not in models:
+        raise ValueError(f"Unknown collection: {collection}")
+    item = {k: v for k, v in record["item"].items() if k not in DERIVED_FIELDS}
+    kept = {k: v for k, v in item.items() if k in KEPT_FIELDS}
+    _validate_kept(kept)
+    try:
+        return collection, {**kept, **models[collection](**item).model_dump()}
+    except ValidationError as e:
+        raise ValueError(str(e))
+
+
+def _validate_kept(kept: Dict):
+    """Check the fields kept outside the model, so only their line fails."""
+    if "id" in kept:
+        _validate_id(kept["id"])
+    if "sent" in kept and not isinstance(kept["sent"], bool):
+        raise ValueError("sent must be a boolean")
+    if "status" in kept and not isinstance(kept["status"], str):
+        raise ValueError("status must be a string")
+    if "recurrence_start" in kept:
+        try:
+            datetime.fromisoformat(kept["recurrence_start"])
+        except (TypeError, ValueError):
+            raise ValueError("recurrence_start must be an ISO date-time")
+
+
+def _validate_id(item_id: object):
+    """Reject IDs Firestore cannot use as a document ID."""
+    if not isinstance(item_id, str) or not item_id:
+        raise ValueError("Item id must be a non-empty string")
+    if "/" in item_id or RESERVED_ID.fullmatch(item_id):
+        raise ValueError(f"Invalid item id: {item_id}")
+
+
+async def import_ndjson(
+    user_id: str,
+    chunks: AsyncIterator[bytes],
+    models: Dict[str, Type[BaseModel]],
+    on_progress: Optional[Callable[[Dict], None]] = None,
+) -> Dict:
+    """
+    Import NDJSON records (as produced by `export_ndjson`) into a user's data.
+
+    The body is parsed line by line as it arrives, and valid items are written
+    in batches of `BATCH_LIMIT` per collection, so at most one batch per
+    collection is held in memory. Invalid lines fail on their own.
+
+    Args:
+        user_id (str): Owner of the imported items.
+        chunks (AsyncIterator[bytes]): The NDJSON body.
+        models (Dict[str, Type[BaseModel]]): Validation model per collection.
+        on_progress (Callable, optional): Called with the running totals after
+            every written batch.
+
+    Returns:
+        dict: Lines read, items imported per collection, the number of failed
+            lines and the first errors with their line numbers.
+    """
+    pending = {collection: [] for collection in models}
+    summary = {
+        "lines": 0,
+        "imported": {collection: 0 for collection in models},
+        "failed": 0,
+        "errors": [],
+    }
+
+    def fail(line: int, error: str):
+        summary["failed"] += 1
+        if len(summary["errors"]) < MAX_IMPORT_ERRORS:
+            summary["errors"].append({"line": line, "error": error})
+
+    async def flush(collection: str):
+        batch, pending[collection] = pending[collection], []
+        result = await import_items(user_id, collection, [item for _, item in batch])
+        if "error" in result:
+            for line, _ in batch:
+                fail(line, result["error"])
+        else:
+            summary["imported"][collection] += result["imported"]
+        logger.info(f"Import progress for user {user_id}: {summary['lines']} lines read")
+        if on_progress:
+            on_progress(summary)
+
+    async for line, record in iter_ndjson(chunks):
+        summary["lines"] = line
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            collection, item = _validate(record, models)
+        except ValueError as e:
+            fail(line, str(e))
+            continue
+        pending[collection].append((line, item))
+        if len(pending[collection]) >= BATCH_LIMIT:
+            await flush(collection)
+
+    for collection in models:
+        if pending[collection]:
+            await flush(collection)
+    return summary
@@ -0,0 +1,477 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+from app.services import metrics
+
+# Load environment variables
+load_dotenv()
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+EMAIL_OUTBOX_PATH = os.getenv("EMAIL_OUTBOX_PATH", "email_outbox.sqlite3")
+MAILERSEND_API_URL = os.getenv("MAILERSEND_API_URL", "https://api.mailersend.com/v1")
+OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", "8"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "6"))
+# Base delay of the exponential retry backoff, in seconds.
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "2"))
+# How long an idle worker waits before polling the queue again, in seconds.
+OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "1"))
+# Maximum number of messages per MailerSend bulk request.
+BULK_EMAIL_LIMIT = int(os.getenv("MAILERSEND_BULK_LIMIT", "500"))
+# How often the status of submitted bulk jobs is checked, in seconds.
+BULK_STATUS_POLL_SECONDS = float(os.getenv("MAILERSEND_BULK_POLL_SECONDS", "10"))
+
+# Terminal states of a MailerSend bulk email job.
+BULK_COMPLETED_STATE = "completed"
+BULK_FAILED_STATE = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    dedupe_key TEXT UNIQUE,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    bulk_email_id TEXT,
+    bulk_position INTEGER
+);
+CREATE INDEX IF NOT EXISTS outbox_ready ON outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS outbox_bulk ON outbox (bulk_email_id, bulk_position);
+"""
+
+# Columns added after the first release of the schema.
+_ADDED_COLUMNS = {"bulk_email_id": "TEXT", "bulk_position": "INTEGER"}
+
+_BULK_ERROR_KEY = re.compile(r"^message\.(\d+)\.")
+
+
+def bulk_validation_failures(status: Dict) -> Dict[int, str]:
+    """
+    Map message positions to errors from a MailerSend bulk status response.
+
+    Validation error keys look like `message.3.to.0.email`, where `3` is the
+    position of the message in the submitted list.
+    """
+    failures = {}
+    for key, errors in (status.get("validation_errors") or {}).items():
+        match = _BULK_ERROR_KEY.match(key)
+        if match:
+            position = int(match.group(1))
+            failures[position] = "; ".join(filter(None, [failures.get(position), *errors]))
+    return failures
+
+
+class EmailOutbox:
+    """
+    Durable SQLite queue of MailerSend email payloads.
+
+    Messages move from `queued` to `sending` when a worker claims them, and
+    then to `sent` or `failed`. Messages sent through the MailerSend bulk
+    endpoint wait in `submitted` until the bulk job's status is known. Messages
+    left in `sending` by a crashed worker are queued again when the outbox is
+    opened.
+    """
+
+    def __init__(self, path: str = EMAIL_OUTBOX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")}
+        if columns:
+            for column, column_type in _ADDED_COLUMNS.items():
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} {column_type}")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute("UPDATE outbox SET status = 'queued' WHERE status = 'sending'")
+
+    def enqueue(self, payload: Dict, dedupe_key: Optional[str] = None) -> Optional[int]:
+        """
+        Add a message to the queue.
+
+        Args:
+            payload (dict): MailerSend email payload.
+            dedupe_key (str, optional): Messages with a key that was already
+                enqueued are ignored.
+
+        Returns:
+            int: The message ID, or None if the message was a duplicate.
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO outbox (payload, dedupe_key, next_attempt_at, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                (json.dumps(payload), dedupe_key, now, now),
+            )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def claim(self, limit: int = 1) -> List[Tuple[int, Dict, int]]:
+        """Claim up to `limit` ready messages as `(id, payload, attempts)`."""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            rows = self._conn.execute(
+                "SELECT id, payload, attempts FROM outbox"
+                " WHERE status = 'queued' AND next_attempt_at <= ?"
+                " ORDER BY next_attempt_at LIMIT ?",
+                (time.time(), limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'sending' WHERE id = ?", [(row[0],) for row in rows]
+            )
+        return [(row[0], json.loads(row[1]), row[2]) for row in rows]
+
+    def mark_sent(self, message_id: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'sent', attempts = attempts + 1, last_error = NULL"
+                " WHERE id = ?",
+                (message_id,),
+            )
+
+    def mark_retry(self, message_id: int, error: str, delay: float):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'queued', attempts = attempts + 1,"
+                " next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (time.time() + delay, error, message_id),
+            )
+
+    def mark_failed(self, message_id: int, error: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'failed', attempts = attempts + 1, last_error = ?"
+                " WHERE id = ?",
+                (error, message_id),
+            )
+
+    def mark_submitted(self, message_ids: List[int], bulk_email_id: str):
+        """Record that `message_ids`, in order, were submitted as one bulk job."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'submitted', attempts = attempts + 1,"
+                " bulk_email_id = ?, bulk_position = ? WHERE id = ?",
+                [(bulk_email_id, i, message_id) for i, message_id in enumerate(message_ids)],
+            )
+
+    def record_submitted(self, payloads: List[Dict], bulk_email_id: str):
+        """Track a bulk job that was submitted outside the queue."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO outbox (payload, status, attempts, next_attempt_at, created_at,"
+                " bulk_email_id, bulk_position) VALUES (?, 'submitted', 1, ?, ?, ?, ?)",
+                [
+                    (json.dumps(payload), now, now, bulk_email_id, i)
+                    for i, payload in enumerate(payloads)
+                ],
+            )
+
+    def pending_bulk_jobs(self) -> List[str]:
+        """Return the IDs of bulk jobs whose messages are still `submitted`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT DISTINCT bulk_email_id FROM outbox WHERE status = 'submitted'"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def resolve_bulk_job(self, bulk_email_id: str, failures: Dict[int, str]):
+        """
+        Mark the messages of a completed bulk job as `sent`, except the
+        positions in `failures`, which are marked `failed` with their error.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE outbox SET status = 'failed', last_error = ?"
+                " WHERE bulk_email_id = ? AND bulk_position = ?",
+                [(error, bulk_email_id, position) for position, error in failures.items()],
+            )
+            self._conn.execute(
+                "UPDATE outbox SET status = 'sent', last_error = NULL"
+                " WHERE bulk_email_id = ? AND status = 'submitted'",
+                (bulk_email_id,),
+            )
+
+    def requeue_bulk_job(
+        self,
+        bulk_email_id: str,
+        error: str,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        delay: float = 0.0,
+    ):
+        """
+        Queue the messages of a failed bulk job again after `delay` seconds.
+
+        Submitting the job counted as an attempt, so messages that have used
+        up `max_attempts` are marked `failed` instead.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'failed', last_error = ?"
+                " WHERE bulk_email_id = ? AND status = 'submitted' AND attempts >= ?",
+                (error, bulk_email_id, max_attempts),
+            )
+            self._conn.execute(
+                "UPDATE outbox SET status = 'queued', next_attempt_at = ?, last_error = ?,"
+                " bulk_email_id = NULL, bulk_position = NULL"
+                " WHERE bulk_email_id = ? AND status = 'submitted'",
+                (time.time() + delay, error, bulk_email_id),
+            )
+
+    def bulk_job_status(self, bulk_email_id: str) -> Dict[str, int]:
+        """Return the number of messages per status for one bulk job."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM outbox WHERE bulk_email_id = ? GROUP BY status",
+                (bulk_email_id,),
+            ).fetchall()
+        return dict(rows)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of messages per status."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM outbox GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        self._conn.close()
+
+
+_default_outbox: Optional[EmailOutbox] = None
+_default_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> EmailOutbox:
+    """Return the process-wide outbox at EMAIL_OUTBOX_PATH."""
+    global _default_outbox
+    with _default_outbox_lock:
+        if _default_outbox is None:
+            _default_outbox = EmailOutbox()
+        return _default_outbox
+
+
+def _retry_after(response: httpx.Response, default: float) -> float:
+    try:
+        return float(response.headers.get("retry-after", default))
+    except ValueError:
+        return default
+
+
+class OutboxSender:
+    """
+    Drains an `EmailOutbox` with a pool of asyncio workers.
+
+    Each worker claims up to `bulk_limit` ready messages at a time. A single
+    message goes to the MailerSend email endpoint; several are submitted as one
+    bulk email job, whose per-message outcome is collected later by a status
+    poller. All workers share one `httpx.AsyncClient`, so requests reuse
+    keep-alive connections. Failed sends are retried with exponential backoff;
+    a 429 or an exhausted `x-ratelimit-remaining` header pauses every worker
+    until the rate-limit window has passed.
+    """
+
+    def __init__(
+        self,
+        outbox: EmailOutbox,
+        api_key: Optional[str] = None,
+        api_url: str = MAILERSEND_API_URL,
+        workers: int = OUTBOX_WORKERS,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        backoff_seconds: float = OUTBOX_BACKOFF_SECONDS,
+        poll_seconds: float = OUTBOX_POLL_SECONDS,
+        bulk_limit: int = BULK_EMAIL_LIMIT,
+        bulk_poll_seconds: float = BULK_STATUS_POLL_SECONDS,
+    ):
+        self.outbox = outbox
+        self.api_key = api_key or os.getenv("MAILERSEND_API_KEY")
+        self.api_url = api_url.rstrip("/")
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.poll_seconds = poll_seconds
+        self.bulk_limit = bulk_limit
+        self.bulk_poll_seconds = bulk_poll_seconds
+        self._paused_until = 0.0
+
+    def _backoff(self, attempts: int) -> float:
+        delay = self.backoff_seconds * (2**attempts)
+        return delay + random.uniform(0, delay / 2)
+
+    def _pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"MailerSend rate limit reached, pausing for {seconds:.1f}s")
+
+    async def _post(
+        self, client: httpx.AsyncClient, path: str, payload, attempts: int
+    ) -> Tuple[Optional[httpx.Response], Optional[str], Optional[int]]:
+        """POST to MailerSend, returning the successful response or the error."""
+        operation = path.strip("/").replace("-", "_")
+        started = time.perf_counter()
+        try:
+            response = await client.post(f"{self.api_url}{path}", json=payload)
+        except httpx.HTTPError as e:
+            metrics.record_call("mailersend", operation, time.perf_counter() - started, "error")
+            return None, f"{type(e).__name__}: {str(e)}", None
+        metrics.record_call(
+            "mailersend",
+            operation,
+            time.perf_counter() - started,
+            "ok" if response.is_success else "error",
+        )
+
+        if response.headers.get("x-ratelimit-remaining") == "0":
+            self._pause(_retry_after(response, 1))
+        if response.is_success:
+            return response, None, None
+        if response.status_code == 429:
+            self._pause(_retry_after(response, self._backoff(attempts)))
+        return None, f"HTTP {response.status_code}: {response.text}", response.status_code
+
+    def _retry_or_fail(self, messages: List[Tuple[int, Dict, int]], error: str, status):
+        retryable = status is None or status == 429 or status >= 500
+        for message_id, _, attempts in messages:
+            if retryable and attempts + 1 < self.max_attempts:
+                self.outbox.mark_retry(message_id, error, self._backoff(attempts))
+                logger.warning(f"Outbox message {message_id} will be retried: {error}")
+            else:
+                self.outbox.mark_failed(message_id, error)
+                logger.error(f"Outbox message {message_id} failed: {error}")
+
+    async def _send(self, client: httpx.AsyncClient, message: Tuple[int, Dict, int]):
+        message_id, payload, attempts = message
+        response, error, status = await self._post(client, "/email", payload, attempts)
+        if response is not None:
+            self.outbox.mark_sent(message_id)
+            logger.info(f"Outbox message {message_id} sent")
+        else:
+            self._retry_or_fail([message], error, status)
+
+    async def _send_bulk(self, client: httpx.AsyncClient, messages: List[Tuple[int, Dict, int]]):
+        payloads = [payload for _, payload, _ in messages]
+        attempts = max(attempts for _, _, attempts in messages)
+        response, error, status = await self._post(client, "/bulk-email", payloads, attempts)
+        if response is None:
+            self._retry_or_fail(messages, error, status)
+            return
+        try:
+            bulk_email_id = response.json()["bulk_email_id"]
+        except (KeyError, TypeError, ValueError) as e:
+            # Without a job ID the outcome cannot be tracked; send the messages again.
+            error = f"Unexpected bulk email response: {type(e).__name__}: {str(e)}"
+            self._retry_or_fail(messages, error, None)
+            return
+        self.outbox.mark_submitted([message_id for message_id, _, _ in messages], bulk_email_id)
+        logger.info(f"Submitted {len(messages)} outbox messages as bulk job {bulk_email_id}")
+
+    async def poll_bulk_jobs(self, client: httpx.AsyncClient):
+        """Fetch the status of every pending bulk job and resolve finished ones."""
+        for bulk_email_id in self.outbox.pending_bulk_jobs():
+            try:
+                with metrics.track_call("mailersend", "bulk_email_status"):
+                    response = await client.get(f"{self.api_url}/bulk-email/{bulk_email_id}")
+                    response.raise_for_status()
+                status = response.json()["data"]
+            except (httpx.HTTPError, KeyError, ValueError) as e:
+                logger.warning(f"Could not fetch status of bulk job {bulk_email_id}: {str(e)}")
+                continue
+
+            if status.get("state") == BULK_COMPLETED_STATE:
+                failures = bulk_validation_failures(status)
+                self.outbox.resolve_bulk_job(bulk_email_id, failures)
+                logger.info(f"Bulk job {bulk_email_id} completed with {len(failures)} failures")
+            elif status.get("state") == BULK_FAILED_STATE:
+                self.outbox.requeue_bulk_job(
+                    bulk_email_id,
+                    f"Bulk job {bulk_email_id} failed",
+                    max_attempts=self.max_attempts,
+                    delay=self._backoff(0),
+                )
+                logger.warning(f"Bulk job {bulk_email_id} failed, messages queued for retry")
+
+    async def _worker(self, client: httpx.AsyncClient, stop: asyncio.Event, until_empty: bool):
+        while not stop.is_set():
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            messages = self.outbox.claim(self.bulk_limit)
+            if not messages:
+                if until_empty:
+                    return
+                await asyncio.sleep(self.poll_seconds)
+                continue
+            if len(messages) == 1:
+                await self._send(client, messages[0])
+            else:
+                await self._send_bulk(client, messages)
+
+    async def _bulk_status_loop(self, client: httpx.AsyncClient, stop: asyncio.Event):
+        while not stop.is_set():
+            await self.poll_bulk_jobs(client)
+            await asyncio.sleep(self.bulk_poll_seconds)
+
+    async def run(self, stop: Optional[asyncio.Event] = None, until_empty: bool = False):
+        """
+        Run the worker pool and the bulk status poller until `stop` is set.
+
+        Args:
+            stop (asyncio.Event, optional): Event that shuts the workers down.
+            until_empty (bool): Return once no message is ready to be sent and
+                every submitted bulk job has been resolved.
+        """
+        stop = stop or asyncio.Event()
+        limits = httpx.Limits(
+            max_connections=self.workers + 1, max_keepalive_connections=self.workers + 1
+        )
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        async with httpx.AsyncClient(headers=headers, limits=limits, timeout=30) as client:
+            workers = [self._worker(client, stop, until_empty) for _ in range(self.workers)]
+            if not until_empty:
+                await asyncio.gather(*workers, self._bulk_status_loop(client, stop))
+                return
+
+            await asyncio.gather(*workers)
+            while self.outbox.pending_bulk_jobs():
+                await asyncio.sleep(self.bulk_poll_seconds)
+                await self.poll_bulk_jobs(client)
+                if not self.outbox.pending_bulk_jobs():
+                    await asyncio.gather(
+                        *(self._worker(client, stop, until_empty) for _ in range(self.workers))
+                    )
+
+
+def start_outbox_sender(outbox: Optional[EmailOutbox] = None) -> threading.Thread:
+    """Run an `OutboxSender` on a background thread with its own event loop."""
+    sender = OutboxSender(outbox or get_outbox())
+    thread = threading.Thread(
+        target=lambda: asyncio.run(sender.run()), name="email-outbox", daemon=True
+    )
+    thread.start()
+    logger.info(f"Email outbox sender started with {sender.workers} workers")
+    return thread
+
+
+if __name__ == "__main__":
+    logger.info("Starting email outbox sender...")
+    asyncio.run(OutboxSender(get_outbox()).run())
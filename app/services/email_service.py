@@ -2,9 +2,13 @@ import logging
 import os
 from typing import Dict, List, Optional
 
+import httpx
 from dotenv import load_dotenv
 from mailersend import emails
 
+from app.services import metrics
+from app.services.email_outbox import BULK_EMAIL_LIMIT, MAILERSEND_API_URL, get_outbox
+
 # Load environment variables
 load_dotenv()
 
@@ -29,6 +33,55 @@ except Exception as e:
     raise ValueError("Failed to initialize MailerSend client") from e
 
 
+def build_email_payload(
+    recipient: str,
+    subject: str,
+    body: str,
+    html_body: Optional[str] = None,
+    cc: Optional[List[str]] = None,
+    bcc: Optional[List[str]] = None,
+    attachments: Optional[List[Dict[str, str]]] = None,
+) -> Dict:
+    """
+    Build a MailerSend email payload.
+
+    Args:
+        recipient (str): Recipient email address.
+        subject (str): Email subject.
+        body (str): Plain text email content.
+        html_body (str, optional): HTML email content. Defaults to None.
+        cc (List[str], optional): List of CC email addresses. Defaults to None.
+        bcc (List[str], optional): List of BCC email addresses. Defaults to None.
+        attachments (List[Dict[str, str]], optional): List of attachments with keys
+            "content" (base64 encoded) and "filename". Defaults to None.
+
+    Returns:
+        dict: The email payload.
+    """
+    email_data = {
+        "from": {
+            "email": os.getenv(
+                "MAILERSEND_SENDER_EMAIL", "your-verified-sender-email@example.com"
+            ),
+            "name": "Personal Assistant App",
+        },
+        "to": [{"email": recipient}],
+        "subject": subject,
+        "text": body,
+    }
+
+    if html_body:
+        email_data["html"] = html_body
+    if cc:
+        email_data["cc"] = [{"email": email} for email in cc]
+    if bcc:
+        email_data["bcc"] = [{"email": email} for email in bcc]
+    if attachments:
+        email_data["attachments"] = attachments
+    return email_data
+
+
+@metrics.instrumented("mailersend")
 def send_email(
     recipient: str,
     subject: str,
@@ -55,26 +108,9 @@ def send_email(
         dict: A success or error message.
     """
     try:
-        email_data = {
-            "from": {
-                "email": os.getenv(
-                    "MAILERSEND_SENDER_EMAIL", "your-verified-sender-email@example.com"
-                ),
-                "name": "Personal Assistant App",
-            },
-            "to": [{"email": recipient}],
-            "subject": subject,
-            "text": body,
-        }
-
-        if html_body:
-            email_data["html"] = html_body
-        if cc:
-            email_data["cc"] = [{"email": email} for email in cc]
-        if bcc:
-            email_data["bcc"] = [{"email": email} for email in bcc]
-        if attachments:
-            email_data["attachments"] = attachments
+        email_data = build_email_payload(
+            recipient, subject, body, html_body, cc, bcc, attachments
+        )
 
         # Send the email
         mailer_client.send(email_data)
@@ -83,3 +119,87 @@ def send_email(
     except Exception as e:
         logger.error(f"Failed to send email to {recipient}: {str(e)}")
         return {"error": f"Failed to send email to {recipient}: {str(e)}"}
+
+
+def send_bulk(messages: List[Dict]) -> Dict:
+    """
+    Send many emails through the MailerSend bulk email endpoint.
+
+    Messages are submitted in chunks of up to `BULK_EMAIL_LIMIT`, one bulk job
+    per chunk. MailerSend processes bulk jobs asynchronously, so each job is
+    recorded in the email outbox, whose sender polls the job status and marks
+    every message as sent or failed. Use `get_outbox().bulk_job_status()` to
+    inspect a job.
+
+    Args:
+        messages (List[Dict]): Messages with the keyword arguments of
+            `build_email_payload` (`recipient`, `subject`, `body`, ...).
+
+    Returns:
+        dict: The submitted bulk job IDs, or an error message listing the
+            chunks that could not be submitted.
+    """
+    payloads = [build_email_payload(**message) for message in messages]
+    headers = {"Authorization": f"Bearer {api_key}"}
+    bulk_email_ids, errors = [], []
+
+    with httpx.Client(base_url=MAILERSEND_API_URL, headers=headers, timeout=30) as client:
+        for start in range(0, len(payloads), BULK_EMAIL_LIMIT):
+            chunk = payloads[start : start + BULK_EMAIL_LIMIT]
+            try:
+                with metrics.track_call("mailersend", "bulk_email"):
+                    response = client.post("/bulk-email", json=chunk)
+                    response.raise_for_status()
+                bulk_email_id = response.json()["bulk_email_id"]
+                get_outbox().record_submitted(chunk, bulk_email_id)
+                bulk_email_ids.append(bulk_email_id)
+            except Exception as e:
+                logger.error(f"Failed to submit bulk emails {start}-{start + len(chunk)}: {str(e)}")
+                errors.append(f"messages {start}-{start + len(chunk) - 1}: {str(e)}")
+
+    logger.info(f"Submitted {len(payloads)} emails in {len(bulk_email_ids)} bulk jobs")
+    result = {
+        "message": f"Submitted {len(bulk_email_ids)} bulk email jobs",
+        "bulk_email_ids": bulk_email_ids,
+    }
+    if errors:
+        result["error"] = f"Failed to submit bulk emails: {'; '.join(errors)}"
+    return result
+
+
+def queue_email(
+    recipient: str,
+    subject: str,
+    body: str,
+    html_body: Optional[str] = None,
+    dedupe_key: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    Queue an email in the durable outbox instead of sending it inline.
+
+    The outbox sender delivers queued emails in the background, retrying
+    failed sends, and submits emails that are ready at the same time through
+    the MailerSend bulk endpoint.
+
+    Args:
+        recipient (str): Recipient email address.
+        subject (str): Email subject.
+        body (str): Plain text email content.
+        html_body (str, optional): HTML email content. Defaults to None.
+        dedupe_key (str, optional): Key that prevents the same email from being
+            queued twice. Defaults to None.
+
+    Returns:
+        dict: A success or error message.
+    """
+    try:
+        payload = build_email_payload(recipient, subject, body, html_body)
+        message_id = get_outbox().enqueue(payload, dedupe_key=dedupe_key)
+        if message_id is None:
+            logger.info(f"Email to {recipient} already queued ({dedupe_key})")
+            return {"message": f"Email to {recipient} already queued"}
+        logger.info(f"Email to {recipient} queued as outbox message {message_id}")
+        return {"message": f"Email queued for {recipient}", "outbox_id": message_id}
+    except Exception as e:
+        logger.error(f"Failed to queue email to {recipient}: {str(e)}")
+        return {"error": f"Failed to queue email to {recipient}: {str(e)}"}
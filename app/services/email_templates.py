@@ -0,0 +1,64 @@
+import html
+import logging
+import os
+from functools import lru_cache
+from string import Template
+from typing import Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATE_DIR = os.getenv(
+    "EMAIL_TEMPLATE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "email"),
+)
+
+
+@lru_cache(maxsize=None)
+def get_template(filename: str) -> Template:
+    """Load and compile a template file once; later calls reuse the compiled template."""
+    with open(os.path.join(EMAIL_TEMPLATE_DIR, filename), encoding="utf-8") as f:
+        return Template(f.read())
+
+
+def _escaped(values: Dict) -> Dict[str, str]:
+    return {key: html.escape(str(value)) for key, value in values.items()}
+
+
+def render_email(name: str, items: Optional[List[Dict]] = None, **values) -> Dict[str, str]:
+    """
+    Render the text and HTML versions of an email.
+
+    The first line of `{name}.txt` is the subject and the rest is the text body;
+    `{name}.html` is the HTML body. For digests, each of `items` is rendered with
+    `{name}_item.txt`/`.html` into the `${items}` placeholder, and `${count}` is
+    the number of items. Values are HTML-escaped in the HTML version.
+
+    Args:
+        name (str): Template name, e.g. "reminder" or "overdue_digest".
+        items (List[Dict], optional): Values of each digest item.
+        **values: Template values.
+
+    Returns:
+        dict: The `subject`, `body` and `html_body`, ready for `queue_email`.
+
+    Raises:
+        KeyError: If a template placeholder has no value.
+    """
+    text_values, html_values = dict(values), _escaped(values)
+    if items is not None:
+        text_item, html_item = get_template(f"{name}_item.txt"), get_template(f"{name}_item.html")
+        text_values["items"] = "".join(text_item.substitute(item) for item in items)
+        html_values["items"] = "".join(html_item.substitute(_escaped(item)) for item in items)
+        text_values["count"] = html_values["count"] = str(len(items))
+
+    subject, _, body = get_template(f"{name}.txt").substitute(text_values).partition("\n\n")
+    return {
+        "subject": subject.strip(),
+        "body": body,
+        "html_body": get_template(f"{name}.html").substitute(html_values),
+    }
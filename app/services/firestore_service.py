@@ -1,13 +1,18 @@
+import asyncio
 import logging
 import os
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union
+import threading
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 import firebase_admin
 from dotenv import load_dotenv
 from firebase_admin import credentials, firestore
+from google.api_core.exceptions import NotFound
 from pydantic import BaseModel
 
+from app.services import metrics, recurrence, task_index, user_cache
+
 # Load environment variables
 load_dotenv()
 
@@ -40,7 +45,160 @@ def parse_iso_date(date_str: str) -> datetime:
         raise ValueError(f"Invalid ISO date format: {date_str}") from e
 
 
+def to_due_at(due_date: str) -> datetime:
+    """
+    Convert an ISO due date into an aware UTC datetime.
+
+    The result is stored as the `due_at` Timestamp field, which the due-reminder
+    query filters and orders on. Naive dates are interpreted as server-local time.
+    """
+    parsed = parse_iso_date(due_date)
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    return parsed.astimezone(timezone.utc)
+
+
+def with_due_at(item: Dict) -> Dict:
+    """
+    Return `item` with the normalised forms of its `due_date`, when present.
+
+    `due_date` is kept as the display string. `due_at` is the due time as a UTC
+    Timestamp, for range queries, and `due_epoch` is the same time in integer
+    seconds since the epoch, for cheap comparisons in code. An empty
+    `due_date` sets both to null, which keeps the item in queries ordered by
+    `due_at` (a missing field would drop it from them).
+    """
+    if item.get("due_date"):
+        due_at = to_due_at(item["due_date"])
+        return {**item, "due_at": due_at, "due_epoch": int(due_at.timestamp())}
+    if "due_date" in item:
+        return {**item, "due_at": None, "due_epoch": None}
+    return item
+
+
+# Single-flight Reads
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Merges concurrent identical reads into one call.
+
+    The first thread to ask for a key runs the read; threads asking for the
+    same key while it is in flight wait for it and share its result (or
+    exception) instead of issuing their own Firestore call.
+
+    Counts are exported as `single_flight_reads_total`.
+    """
+
+    mode = "thread"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            else:
+                self.shared += 1
+        metrics.record_single_flight(self.mode, shared=not leader)
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._flights)}
+
+
+class AsyncSingleFlight:
+    """
+    Asyncio counterpart of `SingleFlight`.
+
+    The read runs as a task that every caller awaits through `asyncio.shield`,
+    so a caller that is cancelled does not cancel the read for the others.
+    """
+
+    mode = "asyncio"
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._flights.get(key)
+        shared = task is not None and task.get_loop() is asyncio.get_running_loop()
+        if shared:
+            self.shared += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._flights[key] = task
+            self.calls += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+        metrics.record_single_flight(self.mode, shared)
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._flights)}
+
+
+# Shared by the sync reads below and the async reads in async_firestore_service.
+read_flights = SingleFlight()
+async_read_flights = AsyncSingleFlight()
+
+
+def single_flight_stats() -> Dict[str, Dict[str, int]]:
+    """Reads issued and duplicate reads merged into them, per mode."""
+    return {"thread": read_flights.stats(), "asyncio": async_read_flights.stats()}
+
+
 def get_user_data(user_id: str) -> Union[Dict, str]:
+    return user_cache.read_through(
+        user_id,
+        "profile",
+        lambda: read_flights.do(
+            f"profile:{user_id}:{user_cache.generation(user_id, 'profile')}",
+            lambda: load_user_data(user_id),
+        ),
+    )
+
+
+@metrics.instrumented("firestore")
+def load_user_data(user_id: str) -> Union[Dict, str]:
     try:
         user_ref = db.collection("users").document(user_id)
         user_data = user_ref.get()
@@ -54,6 +212,29 @@ def get_user_data(user_id: str) -> Union[Dict, str]:
         return "Error retrieving user data"
 
 
+# How a user receives due reminders and overdue tasks: one email per tick or
+# day ("digest"), or one email per item ("immediate").
+NOTIFICATION_MODES = ("digest", "immediate")
+DEFAULT_NOTIFICATION_MODE = os.getenv("DEFAULT_NOTIFICATION_MODE", "digest")
+# Used when a user's profile has no email address.
+DEFAULT_RECIPIENT = "recipient-email@example.com"
+
+
+def get_notification_settings(user_id: str) -> Dict:
+    """
+    Return the email address and notification mode of a user, falling back to
+    the defaults when the profile is missing or does not set them.
+    """
+    user_data = get_user_data(user_id)
+    if not isinstance(user_data, dict):
+        user_data = {}
+    mode = user_data.get("notification_mode")
+    return {
+        "email": user_data.get("email") or DEFAULT_RECIPIENT,
+        "notification_mode": mode if mode in NOTIFICATION_MODES else DEFAULT_NOTIFICATION_MODE,
+    }
+
+
 # Pydantic Models
 
 
@@ -62,6 +243,7 @@ class ReminderModel(BaseModel):
     due_date: str
     recurring: Optional[bool] = False
     recurrence_interval: Optional[str] = None
+    recurrence_rule: Optional[str] = None
 
 
 class TaskModel(BaseModel):
@@ -71,50 +253,154 @@ class TaskModel(BaseModel):
     category: Optional[str] = None
     recurring: Optional[bool] = False
     recurrence_interval: Optional[str] = None
+    recurrence_rule: Optional[str] = None
 
 
 # Shared Functions
 
+# Firestore rejects batches with more than 500 writes.
+BATCH_LIMIT = 500
+
+# Fields every new item starts with, per collection.
+NEW_ITEM_DEFAULTS = {"reminders": {"sent": False}, "tasks": {"status": "Pending"}}
+# Task statuses that can be overdue.
+OPEN_TASK_STATUSES = tuple(
+    status.strip()
+    for status in os.getenv("OPEN_TASK_STATUSES", "Pending,In Progress").split(",")
+    if status.strip()
+)
+
+
+def prepare_new_item(collection: str, item: Dict, item_id: str) -> Dict:
+    """Return a new item with its ID, its collection's defaults and `due_at`."""
+    return with_due_at({**item, "id": item_id, **NEW_ITEM_DEFAULTS[collection]})
 
-def update_collection(user_id: str, collection: str, updates: List[Dict]):
+
+def user_collection(user_id: str, collection: str):
+    """Return the `users/{user_id}/{collection}` subcollection reference."""
+    return db.collection("users").document(user_id).collection(collection)
+
+
+def list_collection(user_id: str, collection: str) -> Union[List, Dict]:
+    """
+    Return all of a user's items in a collection, from the user cache or one
+    coalesced read. Reads issued after a write never join one started before it.
+    """
+    return user_cache.read_through(
+        user_id,
+        collection,
+        lambda: read_flights.do(
+            f"{collection}:{user_id}:{user_cache.generation(user_id, collection)}",
+            lambda: load_collection(user_id, collection),
+        ),
+    )
+
+
+@metrics.instrumented("firestore")
+def load_collection(user_id: str, collection: str) -> Union[List, Dict]:
     try:
-        user_ref = db.collection("users").document(user_id)
-        user_ref.update({collection: updates})
-        logger.info(f"Updated {collection} for user: {user_id}")
+        items = [doc.to_dict() for doc in user_collection(user_id, collection).stream()]
+        logger.info(f"Retrieved {collection} for user: {user_id}")
+        return items
+    except Exception as e:
+        logger.error(f"Failed to retrieve {collection} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to retrieve {collection}: {str(e)}"}
+
+
+@metrics.instrumented("firestore")
+def get_items(user_id: str, collection: str, item_ids: List[str]) -> List[Dict]:
+    """Read several of a user's items in one batched read, skipping missing ones."""
+    items_ref = user_collection(user_id, collection)
+    snapshots = db.get_all([items_ref.document(item_id) for item_id in item_ids])
+    return [snapshot.to_dict() for snapshot in snapshots if snapshot.exists]
+
+
+def index_updates(user_id: str, collection: str, updates: Dict[str, Dict]):
+    """Apply committed field updates to the user's task search index."""
+    if collection == "tasks":
+        for item_id, fields in updates.items():
+            task_index.update_task(user_id, item_id, fields)
+
+
+@metrics.instrumented("firestore")
+def update_collection(user_id: str, collection: str, updates: List[Dict]) -> Dict:
+    """
+    Merge each item in `updates` into its own document, keyed by the item's `id`.
+
+    Writes are committed in batches of at most `BATCH_LIMIT` documents, so the
+    cost is proportional to the number of changed items rather than to the
+    size of the whole collection.
+    """
+    try:
+        items_ref = user_collection(user_id, collection)
+        written = {}
+        for start in range(0, len(updates), BATCH_LIMIT):
+            batch = db.batch()
+            for item in updates[start : start + BATCH_LIMIT]:
+                item_id = item.get("id") or items_ref.document().id
+                written[item_id] = {**item, "id": item_id}
+                batch.set(items_ref.document(item_id), written[item_id], merge=True)
+            batch.commit()
+        user_cache.invalidate(user_id, collection)
+        index_updates(user_id, collection, written)
+        logger.info(f"Updated {len(updates)} {collection} for user: {user_id}")
+        return {"message": f"Updated {len(updates)} {collection}"}
     except Exception as e:
         logger.error(f"Failed to update {collection} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to update {collection}: {str(e)}"}
+
+
+@metrics.instrumented("firestore")
+def bulk_update_collection(
+    user_id: str, collection: str, updates: Dict[str, Dict]
+) -> Dict:
+    """
+    Apply field updates to several existing items in a single write batch.
+
+    Args:
+        user_id (str): Owner of the items.
+        collection (str): "reminders" or "tasks".
+        updates (dict): Field updates keyed by item ID.
+
+    Returns:
+        dict: A success or error message.
+    """
+    try:
+        items_ref = user_collection(user_id, collection)
+        item_ids = list(updates)
+        for start in range(0, len(item_ids), BATCH_LIMIT):
+            batch = db.batch()
+            for item_id in item_ids[start : start + BATCH_LIMIT]:
+                batch.update(items_ref.document(item_id), with_due_at(updates[item_id]))
+            batch.commit()
+        user_cache.invalidate(user_id, collection)
+        index_updates(user_id, collection, updates)
+        logger.info(f"Bulk updated {len(item_ids)} {collection} for user: {user_id}")
+        return {"message": f"Updated {len(item_ids)} {collection}"}
+    except Exception as e:
+        logger.error(f"Failed to bulk update {collection} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to update {collection}: {str(e)}"}
 
 
 # Reminder Functions
 
 
 def get_reminders(user_id: str) -> Union[List, Dict]:
-    user_data = get_user_data(user_id)
-    if isinstance(user_data, str):
-        return {"error": user_data}
-    logger.info(f"Retrieved reminders for user: {user_id}")
-    return user_data.get("reminders", [])
+    return list_collection(user_id, "reminders")
 
 
+@metrics.instrumented("firestore")
 def add_reminder(user_id: str, reminder: Union[Dict, ReminderModel]) -> Dict:
     try:
-        user_ref = db.collection("users").document(user_id)
-        user_data = user_ref.get()
-
-        if not user_data.exists:
-            user_ref.set({"reminders": []})
+        reminder_ref = user_collection(user_id, "reminders").document()
 
         # Use .model_dump() if the reminder is a Pydantic model; otherwise, leave it as is
         reminder_data = (
             reminder.model_dump() if isinstance(reminder, ReminderModel) else reminder
         )
-        reminder_data.update(
-            {
-                "id": db.collection("users").document().id,
-                "sent": False,
-            }
-        )
-        user_ref.update({"reminders": firestore.ArrayUnion([reminder_data])})
+        reminder_data = prepare_new_item("reminders", reminder_data, reminder_ref.id)
+        reminder_ref.set(reminder_data)
+        user_cache.invalidate(user_id, "reminders")
         logger.info(f"Added reminder for user: {user_id}")
         return {"message": "Reminder added successfully", "reminder": reminder_data}
     except Exception as e:
@@ -122,20 +408,17 @@ def add_reminder(user_id: str, reminder: Union[Dict, ReminderModel]) -> Dict:
         return {"error": f"Failed to add reminder: {str(e)}"}
 
 
+@metrics.instrumented("firestore")
 def update_reminder(user_id: str, reminder_id: str, updates: Dict) -> Dict:
     try:
-        user_data = get_user_data(user_id)
-
-        if isinstance(user_data, str):
-            return {"error": user_data}
-
-        reminders = user_data.get("reminders", [])
-        updated_reminders = [
-            {**reminder, **updates} if reminder["id"] == reminder_id else reminder
-            for reminder in reminders
-        ]
-        update_collection(user_id, "reminders", updated_reminders)
+        reminder_ref = user_collection(user_id, "reminders").document(reminder_id)
+        reminder_ref.update(with_due_at(updates))
+        user_cache.invalidate(user_id, "reminders")
+        logger.info(f"Updated reminder {reminder_id} for user: {user_id}")
         return {"message": "Reminder updated successfully"}
+    except NotFound:
+        logger.warning(f"Reminder not found: {reminder_id} for user {user_id}")
+        return {"error": "Reminder not found"}
     except Exception as e:
         logger.error(
             f"Failed to update reminder {reminder_id} for user {user_id}: {str(e)}"
@@ -143,89 +426,225 @@ def update_reminder(user_id: str, reminder_id: str, updates: Dict) -> Dict:
         return {"error": f"Failed to update reminder: {str(e)}"}
 
 
-def reschedule_recurring_reminders(user_id: str) -> Dict:
-    try:
-        user_data = get_user_data(user_id)
-
-        if isinstance(user_data, str):
-            return {
-                "message": f"No reminders found for user {user_id}. Skipping rescheduling."
-            }
-
-        reminders = user_data.get("reminders", [])
-        updated_reminders = []
-        for reminder in reminders:
-            if reminder.get("recurring", False) and reminder.get("sent", False):
-                due_date = parse_iso_date(reminder["due_date"])
-                if reminder["recurrence_interval"] == "daily":
-                    new_due_date = due_date + timedelta(days=1)
-                elif reminder["recurrence_interval"] == "weekly":
-                    new_due_date = due_date + timedelta(weeks=1)
-                elif reminder["recurrence_interval"] == "monthly":
-                    new_due_date = due_date + timedelta(days=30)
-                else:
-                    continue
-
-                updated_reminders.append(
-                    {**reminder, "due_date": new_due_date.isoformat(), "sent": False}
-                )
-            else:
-                updated_reminders.append(reminder)
+def bulk_update_reminders(user_id: str, updates: Dict[str, Dict]) -> Dict:
+    return bulk_update_collection(user_id, "reminders", updates)
+
 
-        update_collection(user_id, "reminders", updated_reminders)
+@metrics.instrumented("firestore")
+def reschedule_recurring_reminders(user_id: str, now: Optional[datetime] = None) -> Dict:
+    """
+    Move a user's sent recurring reminders to their next occurrence after `now`.
+
+    Reminders that missed several occurrences skip straight to the next one,
+    and reminders whose series has ended stop recurring.
+    """
+    try:
+        sent_recurring = (
+            user_collection(user_id, "reminders")
+            .where(filter=firestore.FieldFilter("recurring", "==", True))
+            .where(filter=firestore.FieldFilter("sent", "==", True))
+            .stream()
+        )
+        reminders = [{**snapshot.to_dict(), "id": snapshot.id} for snapshot in sent_recurring]
+
+        updates = recurrence.advance_items(reminders, now)
+        if not updates:
+            return {"message": f"No recurring reminders to reschedule for user {user_id}"}
+
+        for update in updates.values():
+            if "due_date" in update:
+                update["sent"] = False
+        result = bulk_update_collection(user_id, "reminders", updates)
+        if "error" in result:
+            return result
         return {"message": "Recurring reminders rescheduled"}
     except Exception as e:
         logger.error(f"Failed to reschedule reminders for user {user_id}: {str(e)}")
         return {"error": f"Failed to reschedule reminders: {str(e)}"}
 
 
+def iter_due_reminder_pages(
+    now: Optional[datetime] = None, page_size: int = 200
+) -> Iterator[List[Tuple[str, Dict]]]:
+    """
+    Yield the unsent reminders that are due at `now`, one page of
+    `(user_id, reminder)` pairs at a time.
+
+    Uses a collection-group query over all `reminders` subcollections, served by
+    the (`sent`, `due_at`) composite index, and pages through it with cursors.
+    The cost of a scan is proportional to the number of due reminders.
+    """
+    now = now or datetime.now(timezone.utc)
+    query = (
+        db.collection_group("reminders")
+        .where(filter=firestore.FieldFilter("sent", "==", False))
+        .where(filter=firestore.FieldFilter("due_at", "<=", now))
+        .order_by("due_at")
+        .limit(page_size)
+    )
+
+    last_snapshot = None
+    while True:
+        page = query.start_after(last_snapshot) if last_snapshot else query
+        with metrics.track_call("firestore", "iter_due_reminders"):
+            snapshots = list(page.stream())
+        yield [
+            (snapshot.reference.parent.parent.id, snapshot.to_dict()) for snapshot in snapshots
+        ]
+        if len(snapshots) < page_size:
+            return
+        last_snapshot = snapshots[-1]
+
+
+def iter_due_reminders(
+    now: Optional[datetime] = None, page_size: int = 200
+) -> Iterator[Tuple[str, Dict]]:
+    """Yield `(user_id, reminder)` for every unsent reminder that is due at `now`."""
+    for page in iter_due_reminder_pages(now, page_size):
+        yield from page
+
+
 # Task Functions
 
 
 def get_tasks(user_id: str) -> Union[List, Dict]:
-    user_data = get_user_data(user_id)
-    if isinstance(user_data, str):
-        return {"error": user_data}
-    return user_data.get("tasks", [])
+    return list_collection(user_id, "tasks")
 
 
-def add_task(user_id: str, task: TaskModel) -> Dict:
+@metrics.instrumented("firestore")
+def add_task(user_id: str, task: Union[Dict, TaskModel]) -> Dict:
     try:
-        user_ref = db.collection("users").document(user_id)
-        user_data = user_ref.get()
+        task_ref = user_collection(user_id, "tasks").document()
 
-        if not user_data.exists:
-            user_ref.set({"tasks": []})
-
-        task_data = task.dict()
-        task_data.update(
-            {
-                "id": db.collection("users").document().id,
-                "status": "Pending",
-            }
-        )
-        user_ref.update({"tasks": firestore.ArrayUnion([task_data])})
+        task_data = task.model_dump() if isinstance(task, TaskModel) else task
+        task_data = prepare_new_item("tasks", task_data, task_ref.id)
+        task_ref.set(task_data)
+        user_cache.invalidate(user_id, "tasks")
+        task_index.add_task(user_id, task_data)
         return {"message": "Task added successfully", "task": task_data}
     except Exception as e:
         logger.error(f"Failed to add task for user {user_id}: {str(e)}")
         return {"error": f"Failed to add task: {str(e)}"}
 
 
-def search_tasks(user_id: str, query: str) -> Union[List, Dict]:
+@metrics.instrumented("firestore")
+def update_task(user_id: str, task_id: str, updates: Dict) -> Dict:
     try:
-        tasks = get_tasks(user_id)
-        if isinstance(tasks, dict) and "error" in tasks:
-            return tasks
-
-        query_lower = query.lower()
-        filtered_tasks = [
-            task
-            for task in tasks
-            if query_lower in task["title"].lower()
-            or query_lower in task.get("description", "").lower()
-            or query_lower in task.get("category", "").lower()
-        ]
-        return filtered_tasks
+        updates = with_due_at({k: v for k, v in updates.items() if k != "id"})
+        user_collection(user_id, "tasks").document(task_id).update(updates)
+        user_cache.invalidate(user_id, "tasks")
+        task_index.update_task(user_id, task_id, updates)
+        logger.info(f"Updated task {task_id} for user: {user_id}")
+        return {"message": "Task updated successfully"}
+    except NotFound:
+        logger.warning(f"Task not found: {task_id} for user {user_id}")
+        return {"error": "Task not found"}
+    except Exception as e:
+        logger.error(f"Failed to update task {task_id} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to update task: {str(e)}"}
+
+
+@metrics.instrumented("firestore")
+def delete_task(user_id: str, task_id: str) -> Dict:
+    try:
+        user_collection(user_id, "tasks").document(task_id).delete()
+        user_cache.invalidate(user_id, "tasks")
+        task_index.remove_task(user_id, task_id)
+        logger.info(f"Deleted task {task_id} for user: {user_id}")
+        return {"message": "Task deleted successfully"}
+    except Exception as e:
+        logger.error(f"Failed to delete task {task_id} for user {user_id}: {str(e)}")
+        return {"error": f"Failed to delete task: {str(e)}"}
+
+
+@metrics.instrumented("firestore")
+def get_overdue_tasks(user_id: str, now: Optional[datetime] = None) -> Union[List, Dict]:
+    """
+    Return a user's open tasks that were due before `now`, earliest first.
+
+    The range is read from the (`status`, `due_at`) index, so the cost is
+    proportional to the number of overdue tasks rather than to all tasks.
+    """
+    try:
+        query = (
+            user_collection(user_id, "tasks")
+            .where(filter=firestore.FieldFilter("status", "in", list(OPEN_TASK_STATUSES)))
+            .where(filter=firestore.FieldFilter("due_at", "<", now or datetime.now(timezone.utc)))
+            .order_by("due_at")
+        )
+        tasks = [{**snapshot.to_dict(), "id": snapshot.id} for snapshot in query.stream()]
+        logger.info(f"Retrieved {len(tasks)} overdue tasks for user: {user_id}")
+        return tasks
+    except Exception as e:
+        logger.error(f"Failed to retrieve overdue tasks for user {user_id}: {str(e)}")
+        return {"error": f"Failed to retrieve overdue tasks: {str(e)}"}
+
+
+@metrics.instrumented("firestore")
+def reschedule_recurring_tasks(user_id: str, now: Optional[datetime] = None) -> Dict:
+    """
+    Reopen a user's completed recurring tasks at their next occurrence after `now`.
+    """
+    try:
+        completed_recurring = (
+            user_collection(user_id, "tasks")
+            .where(filter=firestore.FieldFilter("recurring", "==", True))
+            .where(filter=firestore.FieldFilter("status", "==", "Completed"))
+            .stream()
+        )
+        tasks = [{**snapshot.to_dict(), "id": snapshot.id} for snapshot in completed_recurring]
+
+        updates = recurrence.advance_items(tasks, now)
+        if not updates:
+            return {"message": f"No recurring tasks to reschedule for user {user_id}"}
+
+        for update in updates.values():
+            if "due_date" in update:
+                update["status"] = "Pending"
+        result = bulk_update_collection(user_id, "tasks", updates)
+        if "error" in result:
+            return result
+        return {"message": "Recurring tasks rescheduled"}
+    except Exception as e:
+        logger.error(f"Failed to reschedule tasks for user {user_id}: {str(e)}")
+        return {"error": f"Failed to reschedule tasks: {str(e)}"}
+
+
+def load_task_index(
+    user_id: str, version: Optional[str]
+) -> Union[task_index.TaskIndex, Dict]:
+    tasks = get_tasks(user_id)
+    if isinstance(tasks, dict) and "error" in tasks:
+        return tasks
+    return task_index.build_index(user_id, tasks, version)
+
+
+def search_tasks(user_id: str, query: str, limit: Optional[int] = None) -> Union[List, Dict]:
+    """
+    Search a user's tasks by title, category and description.
+
+    The search runs against the user's in-memory word index, which is built
+    from the tasks on the first search and then kept up to date by the task
+    write functions. Writes in other processes make it rebuild.
+
+    Args:
+        user_id (str): Owner of the tasks.
+        query (str): Case-insensitive text to look for.
+        limit (int, optional): Maximum number of results.
+
+    Returns:
+        list: Matching tasks, best matches first, or an error message.
+    """
+    try:
+        index = task_index.get_index(user_id)
+        if index is None:
+            version = task_index.current_version(user_id)
+            index = read_flights.do(
+                f"task-index:{user_id}:{version}", lambda: load_task_index(user_id, version)
+            )
+            if isinstance(index, dict):
+                return index
+        return index.search(query, limit)
     except Exception as e:
         logger.error(f"Failed to search tasks for user {user_id}: {str(e)}")
         return {"error": str(e)}
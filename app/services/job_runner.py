@@ -0,0 +1,168 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+
+from app.services import metrics
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of items a job processes at the same time.
+SCHEDULER_CONCURRENCY = int(os.getenv("SCHEDULER_CONCURRENCY", "16"))
+
+_lock = threading.Lock()
+# Jobs whose run has not returned yet, including while it reads its next item.
+_running: Set[str] = set()
+# Number of unfinished work items per job, including items left running after a
+# deadline. A job that is running or has outstanding work is not started again.
+_outstanding: Dict[str, int] = {}
+_overruns: Dict[str, int] = {}
+_last_stats: Dict[str, Dict] = {}
+
+
+def _release(job_name: str, _future: Future):
+    with _lock:
+        _outstanding[job_name] -= 1
+
+
+def _try_start(job_name: str) -> bool:
+    with _lock:
+        if job_name in _running or _outstanding.get(job_name, 0) > 0:
+            _overruns[job_name] = _overruns.get(job_name, 0) + 1
+            return False
+        _running.add(job_name)
+        _outstanding[job_name] = 0
+        return True
+
+
+def _finish(job_name: str):
+    with _lock:
+        _running.discard(job_name)
+
+
+def run_concurrently(
+    job_name: str,
+    items: Iterable,
+    handler: Callable[[Any], Any],
+    max_workers: Optional[int] = None,
+    deadline_seconds: Optional[float] = None,
+) -> Dict:
+    """
+    Run `handler` over `items` on a bounded thread pool.
+
+    At most `max_workers` items are in flight, and `items` is only advanced when
+    a worker is free, so lazily generated inputs are never materialised. Once
+    `deadline_seconds` have passed no further items are started and the call
+    returns; items that are still running finish in the background. The job is
+    skipped (and counted as an overrun) while a run has not returned, e.g. while
+    it reads its next item, and until its remaining items finish.
+
+    Args:
+        job_name (str): Name used for logging, stats and overlap detection.
+        items (Iterable): Work items, e.g. user IDs.
+        handler (Callable): Function called once per item.
+        max_workers (int, optional): Concurrency limit. Defaults to
+            SCHEDULER_CONCURRENCY.
+        deadline_seconds (float, optional): Time budget for the run. Defaults to
+            no deadline.
+
+    Returns:
+        dict: Per-run stats (processed, failed, unfinished, duration, overruns).
+    """
+    max_workers = max_workers or SCHEDULER_CONCURRENCY
+    if not _try_start(job_name):
+        logger.warning(f"Skipping {job_name}: previous run still has work in flight")
+        stats = {"job": job_name, "skipped": True, "overruns": _overruns[job_name]}
+        metrics.record_job_run(stats)
+        return stats
+
+    try:
+        return _run(job_name, items, handler, max_workers, deadline_seconds)
+    finally:
+        _finish(job_name)
+
+
+def _run(
+    job_name: str,
+    items: Iterable,
+    handler: Callable[[Any], Any],
+    max_workers: int,
+    deadline_seconds: Optional[float],
+) -> Dict:
+    started = time.monotonic()
+    deadline = started + deadline_seconds if deadline_seconds else None
+    processed, failed, timed_out = 0, 0, False
+    in_flight = set()
+
+    def remaining() -> Optional[float]:
+        return max(deadline - time.monotonic(), 0) if deadline else None
+
+    def collect(done):
+        nonlocal processed, failed
+        for future in done:
+            if future.exception() is not None:
+                failed += 1
+                logger.error(f"Error in {job_name}: {str(future.exception())}")
+            else:
+                processed += 1
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=job_name)
+    try:
+        for item in items:
+            while len(in_flight) >= max_workers:
+                done, in_flight = wait(
+                    in_flight, timeout=remaining(), return_when=FIRST_COMPLETED
+                )
+                collect(done)
+                if deadline and time.monotonic() >= deadline:
+                    break
+            if deadline and time.monotonic() >= deadline:
+                timed_out = True
+                break
+
+            with _lock:
+                _outstanding[job_name] += 1
+            future = pool.submit(handler, item)
+            future.add_done_callback(lambda f: _release(job_name, f))
+            in_flight.add(future)
+
+        done, in_flight = wait(in_flight, timeout=remaining())
+        collect(done)
+        timed_out = timed_out or bool(in_flight)
+    finally:
+        pool.shutdown(wait=False)
+
+    if timed_out:
+        with _lock:
+            _overruns[job_name] = _overruns.get(job_name, 0) + 1
+
+    stats = {
+        "job": job_name,
+        "processed": processed,
+        "failed": failed,
+        "unfinished": len(in_flight),
+        "duration_seconds": round(time.monotonic() - started, 3),
+        "overran": timed_out,
+        "overruns": _overruns.get(job_name, 0),
+    }
+    _last_stats[job_name] = stats
+    metrics.record_job_run(stats)
+    logger.info(f"Finished {job_name}: {stats}")
+    return stats
+
+
+def get_job_stats() -> Dict[str, Dict]:
+    """Return the stats of the most recent run of every job."""
+    return dict(_last_stats)
+
+
+def run_threaded(job: Callable[[], Any]):
+    """Run a scheduled job on its own thread so a slow job does not delay others."""
+    threading.Thread(target=job, name=job.__name__, daemon=True).start()
@@ -0,0 +1,99 @@
+import logging
+import os
+import zlib
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterator, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from firebase_admin import firestore
+
+from app.services import metrics, user_cache
+from app.services.firestore_service import db
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# "nightly" runs every user's maintenance at server midnight. "local" runs it
+# in per-user slots at the user's local off-peak time.
+MAINTENANCE_MODE = os.getenv("MAINTENANCE_MODE", "nightly")
+# Local hour at which a user's maintenance window starts.
+MAINTENANCE_LOCAL_HOUR = int(os.getenv("MAINTENANCE_LOCAL_HOUR", "3"))
+# Users are hash-bucketed across this many minutes from the start of the window.
+MAINTENANCE_WINDOW_MINUTES = int(os.getenv("MAINTENANCE_WINDOW_MINUTES", "60"))
+# Time zone of users who have not set one.
+DEFAULT_TIMEZONE = os.getenv("DEFAULT_TIMEZONE", "UTC")
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def user_timezone(name: Optional[str]) -> ZoneInfo:
+    """Return a user's time zone, or the default one if it is unset or unknown."""
+    if name:
+        try:
+            return ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            logger.warning(f"Unknown time zone {name}, using {DEFAULT_TIMEZONE}")
+    return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def bucket_of(user_id: str) -> int:
+    """
+    Minute offset of a user within the maintenance window. Salted, so it is
+    independent of the user's scheduler shard.
+    """
+    return zlib.crc32(f"maintenance:{user_id}".encode()) % MAINTENANCE_WINDOW_MINUTES
+
+
+def maintenance_slot(user_id: str, tz: ZoneInfo, on: Optional[date] = None) -> int:
+    """
+    Return the UTC minute of the day at which a user's maintenance runs on the
+    local date `on` (default: today in `tz`).
+
+    The slot is recomputed after every run, so it follows daylight saving changes.
+    """
+    on = on or datetime.now(tz).date()
+    local = datetime.combine(on, time(MAINTENANCE_LOCAL_HOUR), tzinfo=tz)
+    at = (local + timedelta(minutes=bucket_of(user_id))).astimezone(timezone.utc)
+    return at.hour * 60 + at.minute
+
+
+def current_slot(now: Optional[datetime] = None) -> int:
+    now = (now or datetime.now(timezone.utc)).astimezone(timezone.utc)
+    return now.hour * 60 + now.minute
+
+
+@metrics.instrumented("firestore")
+def set_maintenance_slot(user_id: str, slot: int, maintained_on: Optional[str] = None):
+    """Store a user's next slot, and the local date of the run that just finished."""
+    fields = {"maintenance_slot": slot}
+    if maintained_on:
+        fields["maintained_on"] = maintained_on
+    db.collection("users").document(user_id).set(fields, merge=True)
+    user_cache.invalidate(user_id, "profile")
+
+
+def _users_in_range(low: int, high: int) -> Iterator[str]:
+    query = (
+        db.collection("users")
+        .where(filter=firestore.FieldFilter("maintenance_slot", ">", low))
+        .where(filter=firestore.FieldFilter("maintenance_slot", "<=", high))
+        .select([])
+    )
+    for snapshot in query.stream():
+        yield snapshot.id
+
+
+def iter_slot_users(after: int, until: int) -> Iterator[str]:
+    """
+    Yield the users whose slot is after `after` and at or before `until`,
+    wrapping around midnight UTC. Only document references are fetched.
+    """
+    if after <= until:
+        yield from _users_in_range(after, until)
+    else:
+        yield from _users_in_range(after, MINUTES_PER_DAY - 1)
+        yield from _users_in_range(-1, until)
@@ -0,0 +1,258 @@
+import asyncio
+import functools
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    start_http_server,
+)
+from starlette.routing import Match
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# Set when the API runs several worker processes; each writes its samples to
+# this directory and /metrics reports the sum over all of them.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+# Port of the scheduler's metrics endpoint; 0 disables it.
+SCHEDULER_METRICS_PORT = int(os.getenv("SCHEDULER_METRICS_PORT", "9100"))
+
+# Route label of requests that match no route, so unknown paths do not create
+# a time series each.
+UNMATCHED_ROUTE = "unmatched"
+
+# Firestore and MailerSend calls take milliseconds to seconds; reminders are
+# sent within seconds of coming due, or at the next sweep if delivery failed.
+CALL_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+LAG_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 900, 1800, 3600, 21600)
+JOB_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 55, 120, 600, 1800, 3600, 21600)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests handled.", ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to handle an HTTP request, including streaming the response.",
+    ["method", "route"],
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being handled.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+
+DEPENDENCY_CALLS = Counter(
+    "dependency_calls_total",
+    "Calls to Firestore and MailerSend, by outcome.",
+    ["dependency", "operation", "outcome"],
+)
+DEPENDENCY_DURATION = Histogram(
+    "dependency_call_duration_seconds",
+    "Duration of calls to Firestore and MailerSend.",
+    ["dependency", "operation"],
+    buckets=CALL_BUCKETS,
+)
+SINGLE_FLIGHT_READS = Counter(
+    "single_flight_reads_total",
+    "Coalesced reads, by mode (thread or asyncio) and whether the caller issued "
+    "the read or shared one already in flight.",
+    ["mode", "outcome"],
+)
+
+JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds",
+    "Duration of a scheduler job run.",
+    ["job"],
+    buckets=JOB_BUCKETS,
+)
+JOB_ITEMS = Counter(
+    "scheduler_job_items_total",
+    "Items processed by scheduler jobs, by outcome.",
+    ["job", "outcome"],
+)
+JOB_OVERRUNS = Counter(
+    "scheduler_job_overruns_total",
+    "Scheduler job runs that hit their deadline or were skipped because the "
+    "previous run was still busy.",
+    ["job"],
+)
+REMINDER_LAG = Histogram(
+    "reminder_send_lag_seconds",
+    "Time between a reminder coming due and its email being queued.",
+    buckets=LAG_BUCKETS,
+)
+
+
+# Dependency Calls
+def record_call(dependency: str, operation: str, seconds: float, outcome: str = "ok"):
+    DEPENDENCY_CALLS.labels(dependency, operation, outcome).inc()
+    DEPENDENCY_DURATION.labels(dependency, operation).observe(seconds)
+
+
+@contextmanager
+def track_call(dependency: str, operation: str):
+    """Record the block as one call, failed if it raises."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        record_call(dependency, operation, time.perf_counter() - started, outcome)
+
+
+def _outcome(result: Any) -> str:
+    # Service functions report failures as {"error": ...} rather than raising.
+    return "error" if isinstance(result, dict) and "error" in result else "ok"
+
+
+def instrumented(dependency: str, operation: Optional[str] = None):
+    """
+    Decorate a function that calls `dependency`, recording every call's
+    duration and outcome under `operation` (the function name by default).
+
+    Works on plain and async functions. A call fails if it raises or returns a
+    dict with an "error" key.
+    """
+
+    def decorate(fn: Callable) -> Callable:
+        name = operation or fn.__name__
+
+        if asyncio.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                outcome = "error"
+                try:
+                    result = await fn(*args, **kwargs)
+                    outcome = _outcome(result)
+                    return result
+                finally:
+                    record_call(dependency, name, time.perf_counter() - started, outcome)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = fn(*args, **kwargs)
+                outcome = _outcome(result)
+                return result
+            finally:
+                record_call(dependency, name, time.perf_counter() - started, outcome)
+
+        return wrapper
+
+    return decorate
+
+
+def record_single_flight(mode: str, shared: bool):
+    SINGLE_FLIGHT_READS.labels(mode, "shared" if shared else "issued").inc()
+
+
+# Scheduler
+def record_job_run(stats: Dict):
+    """Record a `job_runner.run_concurrently` result."""
+    job = stats["job"]
+    if stats.get("skipped"):
+        JOB_OVERRUNS.labels(job).inc()
+        return
+    JOB_DURATION.labels(job).observe(stats["duration_seconds"])
+    for outcome in ("processed", "failed", "unfinished"):
+        JOB_ITEMS.labels(job, outcome).inc(stats[outcome])
+    if stats["overran"]:
+        JOB_OVERRUNS.labels(job).inc()
+
+
+def observe_reminder_lag(reminders: Iterable[Dict], now: Optional[float] = None):
+    """Record how late each reminder is, from its `due_epoch`, at send time."""
+    now = time.time() if now is None else now
+    for reminder in reminders:
+        if reminder.get("due_epoch") is not None:
+            REMINDER_LAG.observe(max(now - reminder["due_epoch"], 0))
+
+
+def start_metrics_server(port: int = SCHEDULER_METRICS_PORT):
+    """Serve /metrics on `port` from a background thread, for non-API processes."""
+    if port:
+        start_http_server(port)
+        logger.info(f"Metrics served on port {port}")
+
+
+# API
+def render_metrics() -> Tuple[bytes, str]:
+    """Return the metrics exposition and its content type."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def route_of(scope) -> str:
+    """Return the path template of the route a request matched, e.g. /tasks/{task_id}."""
+    route = scope.get("route")
+    if route is None and scope.get("app") is not None:
+        # Requests rejected before routing (e.g. rate limited) are matched here.
+        for candidate in scope["app"].routes:
+            match, _ = candidate.matches(scope)
+            if match != Match.NONE:
+                route = candidate
+                break
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, latency histograms and in-flight
+    requests, labelled by route template rather than raw path.
+
+    Add it last, so it is outermost and also sees rejected requests.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def recording_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            in_flight.dec()
+            route = route_of(scope)
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
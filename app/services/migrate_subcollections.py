@@ -0,0 +1,88 @@
+import logging
+from typing import Dict, Optional
+
+from firebase_admin import firestore
+
+from app.services import user_cache
+from app.services.firestore_service import db, update_collection, with_due_at
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# Collections that used to be stored as arrays on the `users/{uid}` document.
+LEGACY_ARRAY_FIELDS = ("reminders", "tasks")
+
+
+def migrate_user(user_id: str, user_data: Optional[Dict] = None) -> Dict:
+    """
+    Move a user's legacy `reminders`/`tasks` arrays into per-item subcollections.
+
+    Items are written to `users/{uid}/{collection}/{id}` before the array field is
+    removed, so the migration can be re-run safely after a partial failure.
+
+    Args:
+        user_id (str): The user to migrate.
+        user_data (dict, optional): The already-loaded user document, if available.
+
+    Returns:
+        dict: Number of migrated items per collection, or an error message.
+    """
+    try:
+        user_ref = db.collection("users").document(user_id)
+        if user_data is None:
+            snapshot = user_ref.get()
+            if not snapshot.exists:
+                return {"error": "User not found"}
+            user_data = snapshot.to_dict()
+
+        migrated = {}
+        for field in LEGACY_ARRAY_FIELDS:
+            items = user_data.get(field)
+            if not isinstance(items, list):
+                continue
+            result = update_collection(user_id, field, [with_due_at(i) for i in items])
+            if "error" in result:
+                return result
+            user_ref.update({field: firestore.DELETE_FIELD})
+            migrated[field] = len(items)
+
+        user_cache.invalidate(user_id)
+        logger.info(f"Migrated user {user_id}: {migrated}")
+        return {"message": "User migrated successfully", "migrated": migrated}
+    except Exception as e:
+        logger.error(f"Failed to migrate user {user_id}: {str(e)}")
+        return {"error": f"Failed to migrate user: {str(e)}"}
+
+
+def migrate_all_users() -> Dict:
+    """
+    Stream every user document and migrate its legacy arrays.
+
+    Users are read one document at a time from a streaming query, so memory use
+    does not grow with the number of users.
+
+    Returns:
+        dict: Counts of migrated and failed users.
+    """
+    migrated, failed = 0, 0
+    for snapshot in db.collection("users").stream():
+        user_data = snapshot.to_dict() or {}
+        if not any(isinstance(user_data.get(f), list) for f in LEGACY_ARRAY_FIELDS):
+            continue
+        result = migrate_user(snapshot.id, user_data)
+        if "error" in result:
+            failed += 1
+        else:
+            migrated += 1
+
+    logger.info(f"Migration finished: {migrated} users migrated, {failed} failed")
+    return {"migrated_users": migrated, "failed_users": failed}
+
+
+if __name__ == "__main__":
+    logger.info("Migrating reminders and tasks to per-item subcollections...")
+    migrate_all_users()
@@ -0,0 +1,345 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.services.token_cache import verify_token_async
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# "memory" limits each worker process on its own; "redis" shares the buckets
+# between workers.
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+# Sustained request cost per second and burst size allowed per user.
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "10"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "50"))
+# Buckets kept by the in-memory backend; the least recently used are dropped.
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# Bearer tokens that failed verification are limited by client address without
+# being verified again for this long, so repeating a bad token costs nothing.
+REJECTED_TOKEN_TTL_SECONDS = float(os.getenv("REJECTED_TOKEN_TTL_SECONDS", "30"))
+REJECTED_TOKEN_CACHE_SIZE = int(os.getenv("REJECTED_TOKEN_CACHE_SIZE", "10000"))
+
+# Requests are rejected with 503 beyond this many in flight per process.
+MAX_IN_FLIGHT_REQUESTS = int(os.getenv("MAX_IN_FLIGHT_REQUESTS", "256"))
+# Requests are shed, increasingly often, while the average time to first byte
+# is above this.
+SHED_LATENCY_SECONDS = float(os.getenv("SHED_LATENCY_SECONDS", "2.0"))
+# At most this share of requests is shed for latency, so the average keeps
+# being measured and recovers.
+MAX_SHED_RATIO = 0.9
+LATENCY_SMOOTHING = 0.1
+
+# Token cost of a request, by method and path. Other requests cost 1. Costs
+# roughly follow the Firestore reads and writes a request makes.
+ROUTE_COSTS: Dict[Tuple[str, str], float] = {
+    ("GET", "/tasks/search"): 2,
+    ("POST", "/reminders:batch"): 10,
+    ("POST", "/tasks:batch"): 10,
+    ("GET", "/export"): 20,
+    ("POST", "/import"): 20,
+}
+
+
+class RateLimitBackend(ABC):
+    """Interface of a token bucket store."""
+
+    # Whether `take` blocks on I/O and should run on a worker thread.
+    blocking = False
+
+    @abstractmethod
+    def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        """
+        Take `cost` tokens from the bucket `key`, which refills at `rate` tokens
+        per second up to `burst`.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds until they
+                are available.
+        """
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """In-process token buckets, bounded to `max_keys` buckets."""
+
+    def __init__(
+        self, max_keys: int = RATE_LIMIT_MAX_KEYS, clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+# Refill and take atomically, so concurrent workers share one bucket per user.
+TAKE_SCRIPT = """
+local rate, burst, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]),
+    tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets shared by all worker processes, stored in Redis.
+
+    Any client with the `redis-py` `register_script` interface works. Buckets
+    expire once they would be full again.
+    """
+
+    blocking = True
+
+    def __init__(self, client):
+        self._take = client.register_script(TAKE_SCRIPT)
+
+    def take(self, key: str, cost: float, rate: float, burst: float) -> float:
+        return float(self._take(keys=[f"ratelimit:{key}"], args=[rate, burst, cost, time.time()]))
+
+
+def create_backend(name: str = RATE_LIMIT_BACKEND) -> RateLimitBackend:
+    if name == "redis":
+        import redis  # Optional dependency, only needed for the shared backend.
+
+        return RedisRateLimitBackend(redis.Redis.from_url(RATE_LIMIT_REDIS_URL))
+    return MemoryRateLimitBackend()
+
+
+backend: RateLimitBackend = create_backend()
+
+
+def set_backend(new_backend: RateLimitBackend):
+    """Replace the default rate limit backend, e.g. with a shared one."""
+    global backend
+    backend = new_backend
+
+
+class LoadShedder:
+    """
+    Rejects requests while the process is overloaded: when too many requests
+    are in flight, or, with a probability growing with the overshoot, while the
+    average time to first byte (which is dominated by Firestore calls) is above
+    its threshold.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = MAX_IN_FLIGHT_REQUESTS,
+        latency_threshold: float = SHED_LATENCY_SECONDS,
+        chance: Callable[[], float] = random.random,
+    ):
+        self.max_in_flight = max_in_flight
+        self.latency_threshold = latency_threshold
+        self.chance = chance
+        self.in_flight = 0
+        self.latency = 0.0
+        self.shed = 0
+
+    def shed_ratio(self) -> float:
+        overshoot = (self.latency - self.latency_threshold) / self.latency_threshold
+        return min(max(overshoot, 0.0), MAX_SHED_RATIO)
+
+    def admit(self) -> Optional[str]:
+        """Admit a request, or return why it is shed."""
+        if self.in_flight >= self.max_in_flight:
+            reason = "Too many requests in flight"
+        elif self.chance() < self.shed_ratio():
+            reason = "Server is responding slowly"
+        else:
+            self.in_flight += 1
+            return None
+        self.shed += 1
+        return reason
+
+    def observe(self, latency: float):
+        self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+
+    def release(self):
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, float]:
+        return {"in_flight": self.in_flight, "latency_seconds": self.latency, "shed": self.shed}
+
+
+def _rejection(status_code: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class RejectedTokenCache:
+    """
+    Bounded LRU set of bearer tokens that recently failed verification.
+
+    Like the token cache, entries are keyed by the SHA-256 digest of the token.
+    Only used on the event loop, so it takes no lock.
+    """
+
+    def __init__(
+        self,
+        ttl: float = REJECTED_TOKEN_TTL_SECONDS,
+        max_size: int = REJECTED_TOKEN_CACHE_SIZE,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self._expiry: "OrderedDict[bytes, float]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def __contains__(self, token: str) -> bool:
+        key = self._key(token)
+        expires_at = self._expiry.get(key)
+        if expires_at is None:
+            return False
+        if expires_at > self.clock():
+            return True
+        del self._expiry[key]
+        return False
+
+    def add(self, token: str):
+        key = self._key(token)
+        self._expiry[key] = self.clock() + self.ttl
+        self._expiry.move_to_end(key)
+        while len(self._expiry) > self.max_size:
+            self._expiry.popitem(last=False)
+
+
+rejected_tokens = RejectedTokenCache()
+
+
+async def client_key(scope) -> str:
+    """
+    Return the rate limit key of a request: the user ID of a valid bearer token
+    (verified tokens are cached, so the endpoint does not verify it again), or
+    else the client address. Tokens that recently failed verification are not
+    verified again.
+    """
+    for name, value in scope.get("headers", []):
+        if name == b"authorization" and value[:7].lower() == b"bearer ":
+            token = value[7:].decode()
+            if token in rejected_tokens:
+                break
+            try:
+                claims = await verify_token_async(token)
+                return f"uid:{claims['uid']}"
+            except Exception:
+                rejected_tokens.add(token)
+                break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware that sheds load and applies per-user token buckets.
+
+    Shed requests get a 503 and rate-limited ones a 429, both with a
+    `Retry-After` header, before any endpoint work is done.
+    """
+
+    def __init__(
+        self,
+        app,
+        bucket_backend: Optional[RateLimitBackend] = None,
+        rate: float = RATE_LIMIT_PER_SECOND,
+        burst: float = RATE_LIMIT_BURST,
+        costs: Optional[Dict[Tuple[str, str], float]] = None,
+        shedder: Optional[LoadShedder] = None,
+    ):
+        self.app = app
+        # Defaults to the module's backend, looked up on every request.
+        self.bucket_backend = bucket_backend
+        self.rate = rate
+        self.burst = burst
+        self.costs = ROUTE_COSTS if costs is None else costs
+        self.shedder = shedder or LoadShedder()
+        self.limited = 0
+
+    async def _take(self, key: str, cost: float) -> float:
+        buckets = self.bucket_backend or backend
+        try:
+            if buckets.blocking:
+                return await asyncio.to_thread(buckets.take, key, cost, self.rate, self.burst)
+            return buckets.take(key, cost, self.rate, self.burst)
+        except Exception as e:
+            # Fail open: a broken limiter must not take the API down.
+            logger.error(f"Rate limiter failed for {key}: {str(e)}")
+            return 0.0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        reason = self.shedder.admit()
+        if reason is not None:
+            return await _rejection(503, reason, 1)(scope, receive, send)
+
+        started = time.monotonic()
+        observed = False
+
+        async def timed_send(message):
+            nonlocal observed
+            if message["type"] == "http.response.start" and not observed:
+                observed = True
+                self.shedder.observe(time.monotonic() - started)
+            await send(message)
+
+        try:
+            key = await client_key(scope)
+            cost = min(self.costs.get((scope["method"], scope["path"]), 1), self.burst)
+            wait = await self._take(key, cost)
+            if wait > 0:
+                self.limited += 1
+                logger.warning(f"Rate limited {key} on {scope['method']} {scope['path']}")
+                return await _rejection(429, "Rate limit exceeded", wait)(scope, receive, send)
+            await self.app(scope, receive, timed_send)
+        finally:
+            self.shedder.release()
@@ -0,0 +1,266 @@
+import calendar
+import logging
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# Rules equivalent to the original `recurrence_interval` values.
+LEGACY_INTERVALS = {
+    "daily": "FREQ=DAILY",
+    "weekly": "FREQ=WEEKLY",
+    "monthly": "FREQ=MONTHLY",
+    "yearly": "FREQ=YEARLY",
+}
+
+
+def _clamped_date(year: int, month: int, day: int) -> date:
+    """Return the given day of a month; days past the month's end fall on its last day."""
+    days_in_month = calendar.monthrange(year, month)[1]
+    if day < 0:
+        day = days_in_month + day + 1
+    return date(year, month, max(1, min(day, days_in_month)))
+
+
+def _nth_weekday(year: int, month: int, ordinal: int, weekday: int) -> date:
+    """Return the `ordinal`-th (negative: from the end) `weekday` of a month."""
+    if ordinal > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (ordinal - 1))
+    last = _clamped_date(year, month, -1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-ordinal - 1))
+
+
+def _parse_until(value: str) -> datetime:
+    """Parse an UNTIL value: an RFC 5545 date or date-time, or an ISO 8601 date-time."""
+    if value.endswith("Z"):
+        return datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+    try:
+        return datetime.strptime(value, "%Y%m%dT%H%M%S")
+    except ValueError:
+        pass
+    try:
+        # A bare date includes the whole day.
+        return datetime.strptime(value, "%Y%m%d").replace(hour=23, minute=59, second=59)
+    except ValueError:
+        return datetime.fromisoformat(value)
+
+
+class RecurrenceRule:
+    """
+    A subset of RFC 5545 RRULEs that can be evaluated in constant time.
+
+    Supported parts:
+        FREQ: DAILY, WEEKLY, MONTHLY or YEARLY.
+        INTERVAL: Number of periods between occurrences (default 1).
+        BYDAY: Weekdays for WEEKLY rules (e.g. "MO,WE,FR"), or one weekday with
+            an ordinal from -4 to 4 for MONTHLY rules (e.g. "2TU", "-1FR").
+        BYMONTHDAY: One day of the month for MONTHLY rules; -1 is the last day.
+        COUNT: Total number of occurrences.
+        UNTIL: Last allowed occurrence time.
+
+    Occurrences keep the time of day of the series start. Days past the end of
+    a month (e.g. the 31st, or Feb 29 in yearly rules) fall on the month's
+    last day, so monthly series never drift.
+    """
+
+    def __init__(
+        self,
+        freq: str,
+        interval: int = 1,
+        weekdays: Tuple[int, ...] = (),
+        month_day: Optional[int] = None,
+        nth_weekday: Optional[Tuple[int, int]] = None,
+        count: Optional[int] = None,
+        until: Optional[datetime] = None,
+    ):
+        self.freq = freq
+        self.interval = interval
+        self.weekdays = weekdays
+        self.month_day = month_day
+        self.nth_weekday = nth_weekday
+        self.count = count
+        self.until = until
+
+    @classmethod
+    def parse(cls, text: str) -> "RecurrenceRule":
+        """
+        Parse an RRULE string such as "FREQ=MONTHLY;INTERVAL=2;BYMONTHDAY=-1".
+
+        Raises:
+            ValueError: If the rule is malformed or uses unsupported parts.
+        """
+        if text.upper().startswith("RRULE:"):
+            text = text[len("RRULE:") :]
+        try:
+            parts = dict(part.split("=", 1) for part in text.upper().split(";") if part)
+        except ValueError:
+            raise ValueError(f"Invalid recurrence rule: {text}")
+
+        unsupported = set(parts) - {"FREQ", "INTERVAL", "BYDAY", "BYMONTHDAY", "COUNT", "UNTIL"}
+        if unsupported:
+            raise ValueError(f"Unsupported recurrence rule parts: {', '.join(sorted(unsupported))}")
+        freq = parts.get("FREQ")
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Invalid recurrence frequency: {freq}")
+
+        try:
+            rule = cls(freq, interval=int(parts.get("INTERVAL", "1")))
+            if "COUNT" in parts:
+                rule.count = int(parts["COUNT"])
+            if "UNTIL" in parts:
+                rule.until = _parse_until(parts["UNTIL"])
+            if "BYMONTHDAY" in parts:
+                rule.month_day = int(parts["BYMONTHDAY"])
+            if "BYDAY" in parts:
+                days = parts["BYDAY"].split(",")
+                if freq == "WEEKLY":
+                    rule.weekdays = tuple(sorted({WEEKDAYS.index(day) for day in days}))
+                elif len(days) == 1:
+                    rule.nth_weekday = (int(days[0][:-2]), WEEKDAYS.index(days[0][-2:]))
+                else:
+                    raise ValueError
+        except ValueError:
+            raise ValueError(f"Invalid recurrence rule: {text}")
+
+        if rule.interval < 1 or (rule.count is not None and rule.count < 1):
+            raise ValueError(f"Invalid recurrence rule: {text}")
+        if rule.weekdays and freq != "WEEKLY":
+            raise ValueError("BYDAY weekdays are only supported for WEEKLY rules")
+        if (rule.month_day is not None or rule.nth_weekday) and freq != "MONTHLY":
+            raise ValueError("BYMONTHDAY and ordinal BYDAY are only supported for MONTHLY rules")
+        if rule.month_day is not None and rule.nth_weekday:
+            raise ValueError("BYMONTHDAY and BYDAY cannot be combined")
+        if rule.month_day is not None and not (1 <= abs(rule.month_day) <= 31):
+            raise ValueError(f"Invalid BYMONTHDAY: {rule.month_day}")
+        if rule.nth_weekday and not (1 <= abs(rule.nth_weekday[0]) <= 4):
+            raise ValueError("Ordinal BYDAY must be between -4 and 4, excluding 0")
+        return rule
+
+    def _period_of(self, start: datetime, moment: datetime) -> int:
+        """Index of the period (of `interval` days, weeks, months or years) containing `moment`."""
+        if self.freq == "DAILY":
+            elapsed = (moment.date() - start.date()).days
+        elif self.freq == "WEEKLY":
+            week_start = start.date() - timedelta(days=start.weekday())
+            elapsed = (moment.date() - week_start).days // 7
+        elif self.freq == "MONTHLY":
+            elapsed = (moment.year - start.year) * 12 + moment.month - start.month
+        else:
+            elapsed = moment.year - start.year
+        return elapsed // self.interval
+
+    def _dates_in_period(self, start: datetime, period: int) -> List[date]:
+        """Occurrence dates of a period, in order. Every period has the same number."""
+        steps = period * self.interval
+        if self.freq == "DAILY":
+            return [start.date() + timedelta(days=steps)]
+        if self.freq == "WEEKLY":
+            week_start = start.date() - timedelta(days=start.weekday()) + timedelta(weeks=steps)
+            return [week_start + timedelta(days=day) for day in self.weekdays or (start.weekday(),)]
+        if self.freq == "MONTHLY":
+            year, month = divmod(start.year * 12 + start.month - 1 + steps, 12)
+            month += 1
+            if self.nth_weekday:
+                return [_nth_weekday(year, month, *self.nth_weekday)]
+            return [_clamped_date(year, month, self.month_day or start.day)]
+        return [_clamped_date(start.year + steps, start.month, start.day)]
+
+    def next_after(self, start: datetime, after: datetime) -> Optional[datetime]:
+        """
+        Return the first occurrence of the series starting at `start` that is
+        later than `after`, or None if the series has ended by then.
+
+        The occurrence is computed directly from the period containing `after`,
+        so catching up over any number of missed periods costs the same.
+        """
+        first_period = self._dates_in_period(start, 0)
+        skipped = sum(day < start.date() for day in first_period)
+        period = max(self._period_of(start, after), 0)
+        # `after` falls in `period`, so the next occurrence is in it or the next one.
+        for candidate in (period, period + 1):
+            for position, day in enumerate(self._dates_in_period(start, candidate)):
+                occurrence = datetime.combine(day, start.timetz())
+                if occurrence <= after or occurrence < start:
+                    continue
+                number = candidate * len(first_period) + position - skipped
+                if self.count is not None and number >= self.count:
+                    return None
+                if self.until is not None and occurrence > _in_frame(self.until, start):
+                    return None
+                return occurrence
+        return None
+
+
+def _in_frame(moment: datetime, reference: datetime) -> datetime:
+    """Express `moment` as naive local time or as an aware time, like `reference`."""
+    if reference.tzinfo is None and moment.tzinfo is not None:
+        return moment.astimezone().replace(tzinfo=None)
+    if reference.tzinfo is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=reference.tzinfo)
+    return moment
+
+
+@lru_cache(maxsize=1024)
+def parse_rule(text: str) -> RecurrenceRule:
+    return RecurrenceRule.parse(text)
+
+
+def rule_for(item: Dict) -> Optional[RecurrenceRule]:
+    """
+    Return the recurrence rule of a reminder or task: its `recurrence_rule`, or
+    the rule matching its legacy `recurrence_interval`.
+    """
+    if item.get("recurrence_rule"):
+        return parse_rule(item["recurrence_rule"])
+    legacy = LEGACY_INTERVALS.get((item.get("recurrence_interval") or "").lower())
+    return parse_rule(legacy) if legacy else None
+
+
+def advance_items(items: Iterable[Dict], now: Optional[datetime] = None) -> Dict[str, Dict]:
+    """
+    Move recurring items to their next occurrence after `now`, in one pass.
+
+    The series start is kept in `recurrence_start`, so rules anchored to a day
+    of the month (e.g. the 31st) and COUNT limits are evaluated against the
+    original due date rather than the latest occurrence.
+
+    Args:
+        items (Iterable[Dict]): Items with an `id`, a `due_date` and a rule.
+        now (datetime, optional): Current time. Defaults to the server clock.
+
+    Returns:
+        dict: Field updates keyed by item ID. Items whose series has ended get
+            `{"recurring": False}`; items without a valid rule are left out.
+    """
+    updates = {}
+    for item in items:
+        try:
+            rule = rule_for(item)
+            if rule is None:
+                continue
+            due_date = datetime.fromisoformat(item["due_date"])
+            start = datetime.fromisoformat(item.get("recurrence_start") or item["due_date"])
+            current = _in_frame(now, due_date) if now else datetime.now(due_date.tzinfo)
+            next_due = rule.next_after(start, max(current, due_date))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Skipping item {item.get('id')} with invalid recurrence: {str(e)}")
+            continue
+
+        if next_due is None:
+            updates[item["id"]] = {"recurring": False}
+        else:
+            updates[item["id"]] = {
+                "due_date": next_due.isoformat(),
+                "recurrence_start": start.isoformat(),
+            }
+    return updates
@@ -1,16 +1,36 @@
+import hashlib
 import logging
+import os
+import threading
 import time
-from datetime import datetime, timedelta
-from typing import List
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import schedule
 
-from app.services.email_service import send_email
-from app.services.firestore_service import (expire_old_reminders,
-                                            get_overdue_tasks, get_reminders,
+from app.services import metrics
+from app.services.archive import archive_completed_tasks, expire_old_reminders
+from app.services.email_outbox import start_outbox_sender
+from app.services.email_service import queue_email
+from app.services.email_templates import render_email
+from app.services.firestore_service import (bulk_update_reminders, get_items,
+                                            get_notification_settings,
+                                            get_overdue_tasks, get_user_data,
+                                            iter_due_reminder_pages,
                                             reschedule_recurring_reminders,
-                                            reschedule_recurring_tasks,
-                                            update_reminder)
+                                            reschedule_recurring_tasks)
+from app.services.job_runner import (SCHEDULER_CONCURRENCY, run_concurrently,
+                                     run_threaded)
+from app.services.maintenance import (MAINTENANCE_MODE, MINUTES_PER_DAY,
+                                      current_slot, iter_slot_users,
+                                      maintenance_slot, set_maintenance_slot,
+                                      user_timezone)
+from app.services.reminder_timer import ReminderTimer, watch_unsent_reminders
+from app.services.sharding import (SCHEDULER_NODE_ID, SCHEDULER_SHARDS,
+                                   ShardCoordinator, shard_of)
+from app.services.user_directory import iter_user_ids
 
 # Configure logging
 logging.basicConfig(
@@ -20,131 +40,518 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-# Utility Functions
-def fetch_all_user_ids() -> List[str]:
+# Job deadlines. The reminder tick must finish before the next one starts.
+REMINDER_TICK_DEADLINE_SECONDS = float(
+    os.getenv("REMINDER_TICK_DEADLINE_SECONDS", "55")
+)
+DAILY_JOB_DEADLINE_SECONDS = float(os.getenv("DAILY_JOB_DEADLINE_SECONDS", "21600"))
+# Reminders are delivered by the timer as they come due; this periodic sweep
+# only catches reminders whose delivery failed or was missed.
+REMINDER_SWEEP_MINUTES = int(os.getenv("REMINDER_SWEEP_MINUTES", "15"))
+
+SHARD_RELEASE_TIMEOUT_SECONDS = 10
+# Sent reminders and completed tasks due more than this many days ago are
+# moved to cold storage.
+REMINDER_EXPIRY_DAYS = int(os.getenv("REMINDER_EXPIRY_DAYS", "30"))
+TASK_ARCHIVE_DAYS = int(os.getenv("TASK_ARCHIVE_DAYS", "30"))
+# Time of day (server-local) of the job that assigns maintenance slots.
+ASSIGN_SLOTS_AT = os.getenv("ASSIGN_SLOTS_AT", "00:00")
+
+# Set when the scheduler runs as one of several sharded nodes.
+shard_coordinator: Optional[ShardCoordinator] = None
+
+# Last maintenance slot whose users were processed, and the lock that keeps
+# maintenance ticks from overlapping.
+maintenance_cursor: Optional[int] = None
+maintenance_lock = threading.Lock()
+
+
+def owns_user(user_id: str) -> bool:
+    """Whether this node handles the user: always, unless sharding is enabled."""
+    return shard_coordinator is None or shard_coordinator.owns(user_id)
+
+
+def owned_user_ids(job: str) -> Iterator[str]:
+    """
+    Enumerate the users a daily job should process on this node.
+
+    With sharding, each node checkpoints its own progress through the user list
+    and skips users of shards it does not own. Every node still pages through
+    all user IDs, so enumeration cost does not shrink as nodes are added.
+
+    A shard this node takes over mid-job may have users the node had already
+    paged past, and that the previous owner had not reached yet. After its own
+    pass, the node goes through the list again, up to where it gained each
+    shard, for the users of the shards it gained. The jobs are idempotent, so
+    users the previous owner had already processed are just processed again.
+    A job resumed from a checkpoint after a restart does not know which shards
+    it held before, so users it had paged past in shards gained since are not
+    covered until the next run.
+    """
+    if shard_coordinator is None:
+        return iter_user_ids(job=job)
+    return _owned_user_ids(job)
+
+
+def _owned_user_ids(job: str) -> Iterator[str]:
+    started_with = shard_coordinator.owned
+    # Shards gained mid-pass, mapped to the first user ID seen after the gain.
+    gained = {}
+    for user_id in iter_user_ids(job=f"{job}:{SCHEDULER_NODE_ID}"):
+        for shard in shard_coordinator.owned - started_with - gained.keys():
+            gained[shard] = user_id
+        if owns_user(user_id):
+            yield user_id
+
+    if not gained:
+        return
+    logger.info(f"Catching up {job} for shards {sorted(gained)} gained mid-run")
+    for user_id in iter_user_ids():
+        for shard in [shard for shard, stop_at in gained.items() if stop_at == user_id]:
+            del gained[shard]
+        if not gained:
+            return
+        if shard_of(user_id, shard_coordinator.shards) in gained and owns_user(user_id):
+            yield user_id
+
+
+# Per-item Handlers
+def digest_key(kind: str, user_id: str, items: List[Dict]) -> str:
+    """Dedupe key of a digest: the same items always produce the same key."""
+    parts = sorted(f"{item['id']}@{item.get('due_date')}" for item in items)
+    digest = hashlib.sha1("|".join(parts).encode()).hexdigest()
+    return f"{kind}:{user_id}:{digest}"
+
+
+def send_user_due_reminders(item: Tuple[str, List[Dict]]):
+    """
+    Queue a user's due reminder emails and mark them as sent in one batched write.
+
+    In digest mode, all of the user's due reminders go out in a single email.
+    """
+    user_id, reminders = item
+    settings = get_notification_settings(user_id)
+    recipient = settings["email"]
+    sent = {}
+    if settings["notification_mode"] == "digest" and len(reminders) > 1:
+        email = render_email(
+            "reminder_digest",
+            items=[
+                {"title": reminder["title"], "due_date": reminder["due_date"]}
+                for reminder in reminders
+            ],
+        )
+        result = queue_email(
+            recipient=recipient,
+            dedupe_key=digest_key("reminder-digest", user_id, reminders),
+            **email,
+        )
+        if "error" not in result:
+            sent = {reminder["id"]: {"sent": True} for reminder in reminders}
+            logger.info(f"Queued digest of {len(reminders)} reminders for user {user_id}.")
+    else:
+        for reminder in reminders:
+            email = render_email(
+                "reminder", title=reminder["title"], due_date=reminder["due_date"]
+            )
+            result = queue_email(
+                recipient=recipient,
+                dedupe_key=f"reminder:{user_id}:{reminder['id']}:{reminder['due_date']}",
+                **email,
+            )
+            if "error" in result:
+                continue
+            sent[reminder["id"]] = {"sent": True}
+            logger.info(f"Queued reminder email for '{reminder['title']}' to recipient.")
+    if sent:
+        metrics.observe_reminder_lag(reminder for reminder in reminders if reminder["id"] in sent)
+        bulk_update_reminders(user_id, sent)
+
+
+def deliver_user_due_reminders(user_id: str, reminder_ids: List[str]):
     """
-    Fetch all user IDs dynamically from Firestore.
-    Replace this function's logic with a Firestore query to retrieve all users.
+    Send reminders fired by the timer, re-reading them first so reminders that
+    were sent, moved or deleted in the meantime are skipped.
     """
-    # Example: Replace with Firestore query logic
-    return ["firebase_user_id_1", "firebase_user_id_2"]
+    if not owns_user(user_id):
+        return
+    try:
+        now = int(time.time())
+        reminders = [
+            reminder
+            for reminder in get_items(user_id, "reminders", reminder_ids)
+            if not reminder.get("sent") and (reminder.get("due_epoch") or now + 1) <= now
+        ]
+        if reminders:
+            send_user_due_reminders((user_id, reminders))
+    except Exception as e:
+        logger.error(f"Failed to deliver due reminders for user {user_id}: {str(e)}")
+
+
+def reschedule_user_reminders(user_id: str):
+    reschedule_recurring_reminders(user_id)
+    logger.info(f"Rescheduled recurring reminders for user {user_id}")
+
+
+def expire_user_reminders(user_id: str, expiry_threshold: str):
+    expire_old_reminders(user_id, expiry_threshold)
+    logger.info(f"Expired old reminders for user {user_id}")
+
+
+def archive_user_tasks(user_id: str, threshold: str):
+    archive_completed_tasks(user_id, threshold)
+    logger.info(f"Archived completed tasks for user {user_id}")
+
+
+def overdue_task_values(task: Dict) -> Dict:
+    return {
+        "title": task["title"],
+        "due_date": task["due_date"],
+        "description": task.get("description") or "No description provided.",
+        "priority": task.get("priority") or "No priority specified",
+    }
+
+
+def notify_user_overdue_tasks(user_id: str):
+    """
+    Email a user about their overdue tasks: one digest a day in digest mode,
+    otherwise one email per task.
+    """
+    overdue_tasks = get_overdue_tasks(user_id)
+    if "error" in overdue_tasks or not overdue_tasks:
+        return
+    settings = get_notification_settings(user_id)
+    today = date.today().isoformat()
+    if settings["notification_mode"] == "digest":
+        queue_email(
+            recipient=settings["email"],
+            dedupe_key=f"overdue-digest:{user_id}:{today}",
+            **render_email(
+                "overdue_digest", items=[overdue_task_values(task) for task in overdue_tasks]
+            ),
+        )
+        logger.info(f"Queued digest of {len(overdue_tasks)} overdue tasks for user {user_id}.")
+        return
+    for task in overdue_tasks:
+        queue_email(
+            recipient=settings["email"],
+            dedupe_key=f"overdue:{user_id}:{task['id']}:{today}",
+            **render_email("overdue_task", **overdue_task_values(task)),
+        )
+        logger.info(f"Queued overdue task email for '{task['title']}' to recipient.")
+
+
+def reschedule_user_tasks(user_id: str):
+    reschedule_recurring_tasks(user_id)
+    logger.info(f"Rescheduled recurring tasks for user {user_id}")
+
+
+def expiry_threshold(now: datetime, days: int = REMINDER_EXPIRY_DAYS) -> str:
+    return (now - timedelta(days=days)).isoformat()
+
+
+def maintain_user(user_id: str):
+    """
+    Run a user's daily maintenance at their local off-peak time, then move their
+    slot to the same local time tomorrow.
+
+    The local date of the run is stored with the slot, so a user picked up twice
+    on the same local day (e.g. after a daylight saving change) is skipped.
+    """
+    profile = get_user_data(user_id)
+    if not isinstance(profile, dict):
+        profile = {}
+    tz = user_timezone(profile.get("timezone"))
+    local_now = datetime.now(tz)
+    today = local_now.date()
+    if profile.get("maintained_on") == today.isoformat():
+        return
+
+    local_time = local_now.replace(tzinfo=None)
+    reschedule_user_reminders(user_id)
+    expire_user_reminders(user_id, expiry_threshold(local_time))
+    reschedule_user_tasks(user_id)
+    archive_user_tasks(user_id, expiry_threshold(local_time, TASK_ARCHIVE_DAYS))
+    set_maintenance_slot(
+        user_id,
+        maintenance_slot(user_id, tz, today + timedelta(days=1)),
+        maintained_on=today.isoformat(),
+    )
+
+
+def assign_user_slot(user_id: str):
+    """Give a user without a maintenance slot one in their local off-peak window."""
+    profile = get_user_data(user_id)
+    if not isinstance(profile, dict):
+        profile = {}
+    if profile.get("maintenance_slot") is None:
+        tz = user_timezone(profile.get("timezone"))
+        set_maintenance_slot(user_id, maintenance_slot(user_id, tz))
 
 
 # Scheduler Functions
-def check_and_send_reminders():
+def iter_due_reminder_groups(now: datetime) -> Iterator[Tuple[str, List[Dict]]]:
+    """
+    Yield `(user_id, reminders)` for the due reminders of the users this node
+    owns, grouped one query page at a time.
+
+    Only one page is held in memory. A user whose due reminders span pages is
+    yielded once per page.
     """
-    Check reminders and send email notifications for due reminders.
+    for page in iter_due_reminder_pages(now):
+        due_by_user = defaultdict(list)
+        for user_id, reminder in page:
+            if owns_user(user_id):
+                due_by_user[user_id].append(reminder)
+        yield from due_by_user.items()
+
+
+def check_and_send_reminders() -> Dict:
+    """
+    Send email notifications for due reminders.
+
+    Due reminders are read from the indexed due-queue query rather than by
+    scanning every user's reminders, grouped by user and sent concurrently.
+    Pages are read as workers free up, so the reads count towards the tick's
+    deadline. Each user's reminders are marked as sent in a single batched write.
+
+    With sharding, every node reads all due reminders and drops those of
+    users it does not own.
     """
     try:
-        user_ids = fetch_all_user_ids()
-        for user_id in user_ids:
-            reminders = get_reminders(user_id)
-            if "error" not in reminders:
-                for reminder in reminders:
-                    due_date = datetime.fromisoformat(reminder["due_date"])
-                    if due_date <= datetime.now() and not reminder.get("sent", False):
-                        send_email(
-                            recipient="recipient-email@example.com",
-                            subject=f"Reminder: {reminder['title']}",
-                            body=f"""Your reminder '{reminder['title']}' is due on
-                            {reminder['due_date']}.""",
-                        )
-                        update_reminder(user_id, reminder["id"], {"sent": True})
-                        logger.info(
-                            f"""Sent reminder email for '{reminder['title']}'
-                            to recipient."""
-                        )
+        return run_concurrently(
+            "check_and_send_reminders",
+            iter_due_reminder_groups(datetime.now(timezone.utc)),
+            send_user_due_reminders,
+            deadline_seconds=REMINDER_TICK_DEADLINE_SECONDS,
+        )
     except Exception as e:
         logger.error(f"Error in check_and_send_reminders: {str(e)}")
+        return {"error": str(e)}
 
 
-def reschedule_all_recurring_reminders():
+def reschedule_all_recurring_reminders() -> Dict:
     """
     Reschedule recurring reminders for all users.
     """
     try:
-        user_ids = fetch_all_user_ids()
-        for user_id in user_ids:
-            reschedule_recurring_reminders(user_id)
-            logger.info(f"Rescheduled recurring reminders for user {user_id}")
+        return run_concurrently(
+            "reschedule_all_recurring_reminders",
+            owned_user_ids("reschedule_all_recurring_reminders"),
+            reschedule_user_reminders,
+            deadline_seconds=DAILY_JOB_DEADLINE_SECONDS,
+        )
     except Exception as e:
         logger.error(f"Error in reschedule_all_recurring_reminders: {str(e)}")
+        return {"error": str(e)}
 
 
-def remove_expired_reminders():
+def remove_expired_reminders() -> Dict:
     """
     Remove reminders older than the expiry threshold for all users.
     """
     try:
-        expiry_threshold = (datetime.now() - timedelta(days=30)).isoformat()
-        user_ids = fetch_all_user_ids()
-        for user_id in user_ids:
-            expire_old_reminders(user_id, expiry_threshold)
-            logger.info(f"Expired old reminders for user {user_id}")
+        threshold = expiry_threshold(datetime.now())
+        return run_concurrently(
+            "remove_expired_reminders",
+            owned_user_ids("remove_expired_reminders"),
+            lambda user_id: expire_user_reminders(user_id, threshold),
+            deadline_seconds=DAILY_JOB_DEADLINE_SECONDS,
+        )
     except Exception as e:
         logger.error(f"Error in remove_expired_reminders: {str(e)}")
+        return {"error": str(e)}
 
 
-def notify_overdue_tasks():
+def archive_all_completed_tasks() -> Dict:
+    """
+    Move completed tasks older than the archive threshold to cold storage for all users.
+    """
+    try:
+        threshold = expiry_threshold(datetime.now(), TASK_ARCHIVE_DAYS)
+        return run_concurrently(
+            "archive_all_completed_tasks",
+            owned_user_ids("archive_all_completed_tasks"),
+            lambda user_id: archive_user_tasks(user_id, threshold),
+            deadline_seconds=DAILY_JOB_DEADLINE_SECONDS,
+        )
+    except Exception as e:
+        logger.error(f"Error in archive_all_completed_tasks: {str(e)}")
+        return {"error": str(e)}
+
+
+def notify_overdue_tasks() -> Dict:
     """
     Notify users about overdue tasks.
     """
     try:
-        user_ids = fetch_all_user_ids()
-        for user_id in user_ids:
-            overdue_tasks = get_overdue_tasks(user_id)
-            if "error" not in overdue_tasks and overdue_tasks:
-                for task in overdue_tasks:
-                    send_email(
-                        recipient="recipient-email@example.com",
-                        subject=f"Overdue Task: {task['title']}",
-                        body=f"""Your task '{task['title']}' was due on
-                        {task['due_date']}.\n\n"
-                        f"Description: {task.get('''description',
-                                                'No description provided.''')}\n"
-                        f"Priority: {task.get('priority', 'No priority specified')}\n\n"
-                        f"Please complete it as soon as possible.""",
-                    )
-                    logger.info(
-                        f"Sent overdue task email for '{task['title']}' to recipient."
-                    )
+        return run_concurrently(
+            "notify_overdue_tasks",
+            owned_user_ids("notify_overdue_tasks"),
+            notify_user_overdue_tasks,
+            deadline_seconds=DAILY_JOB_DEADLINE_SECONDS,
+        )
     except Exception as e:
         logger.error(f"Error in notify_overdue_tasks: {str(e)}")
+        return {"error": str(e)}
 
 
-def reschedule_all_recurring_tasks():
+def reschedule_all_recurring_tasks() -> Dict:
     """
     Reschedule recurring tasks for all users.
     """
     try:
-        user_ids = fetch_all_user_ids()
-        for user_id in user_ids:
-            reschedule_recurring_tasks(user_id)
-            logger.info(f"Rescheduled recurring tasks for user {user_id}")
+        return run_concurrently(
+            "reschedule_all_recurring_tasks",
+            owned_user_ids("reschedule_all_recurring_tasks"),
+            reschedule_user_tasks,
+            deadline_seconds=DAILY_JOB_DEADLINE_SECONDS,
+        )
     except Exception as e:
         logger.error(f"Error in reschedule_all_recurring_tasks: {str(e)}")
+        return {"error": str(e)}
+
+
+def run_maintenance_slots() -> Dict:
+    """
+    Run the maintenance of every user whose slot has come up since the last tick.
+
+    Slots are UTC minutes of the day. Each tick covers the slots after the last
+    processed one, so minutes missed while a tick overran are caught up. A tick
+    that hits its deadline leaves the cursor where it was, so the next tick
+    retries the users it did not reach; users it did maintain are skipped then,
+    as their `maintained_on` is today.
+    """
+    global maintenance_cursor
+    if not maintenance_lock.acquire(blocking=False):
+        logger.warning("Skipping run_maintenance_slots: previous tick still running")
+        return {"job": "run_maintenance_slots", "skipped": True}
+    try:
+        now_slot = current_slot()
+        after = maintenance_cursor
+        if after is None:
+            after = (now_slot - 1) % MINUTES_PER_DAY
+        stats = run_concurrently(
+            "run_maintenance_slots",
+            (user_id for user_id in iter_slot_users(after, now_slot) if owns_user(user_id)),
+            maintain_user,
+            deadline_seconds=REMINDER_TICK_DEADLINE_SECONDS,
+        )
+        if not stats.get("skipped") and not stats.get("overran"):
+            maintenance_cursor = now_slot
+        return stats
+    except Exception as e:
+        logger.error(f"Error in run_maintenance_slots: {str(e)}")
+        return {"error": str(e)}
+    finally:
+        maintenance_lock.release()
+
+
+def assign_maintenance_slots() -> Dict:
+    """
+    Assign maintenance slots to users who have none yet, e.g. new users.
+    """
+    try:
+        return run_concurrently(
+            "assign_maintenance_slots",
+            owned_user_ids("assign_maintenance_slots"),
+            assign_user_slot,
+            deadline_seconds=DAILY_JOB_DEADLINE_SECONDS,
+        )
+    except Exception as e:
+        logger.error(f"Error in assign_maintenance_slots: {str(e)}")
+        return {"error": str(e)}
 
 
 # Scheduling
+def start_reminder_timer() -> ReminderTimer:
+    """
+    Deliver reminders the moment they come due.
+
+    A Firestore listener feeds every unsent reminder into an in-memory timer,
+    whose thread sleeps until the next due time. Due reminders are delivered
+    per user on a bounded thread pool.
+    """
+    pool = ThreadPoolExecutor(
+        max_workers=SCHEDULER_CONCURRENCY, thread_name_prefix="deliver_due_reminders"
+    )
+
+    def dispatch(keys: List[Tuple[str, str]]):
+        ids_by_user = defaultdict(list)
+        for user_id, reminder_id in keys:
+            ids_by_user[user_id].append(reminder_id)
+        for user_id, reminder_ids in ids_by_user.items():
+            pool.submit(deliver_user_due_reminders, user_id, reminder_ids)
+
+    timer = ReminderTimer(dispatch)
+    threading.Thread(target=timer.run, name="reminder-timer", daemon=True).start()
+    watch = watch_unsent_reminders(timer, owns_user)
+
+    if shard_coordinator is not None:
+        lock = threading.Lock()
+
+        def resubscribe(_owned):
+            # Reload the pending reminders of the shards this node now owns.
+            nonlocal watch
+            with lock:
+                watch.unsubscribe()
+                timer.clear()
+                watch = watch_unsent_reminders(timer, owns_user)
+
+        shard_coordinator.on_change = resubscribe
+
+    logger.info("Reminder timer started.")
+    return timer
+
+
+def start_sharding() -> threading.Thread:
+    """Join the scheduler cluster and claim this node's share of the shards."""
+    global shard_coordinator
+    shard_coordinator = ShardCoordinator()
+    return shard_coordinator.start()
+
+
 def schedule_jobs():
     """
     Schedule all jobs using the `schedule` library.
+
+    Each job runs on its own thread, so a long daily job does not hold up the
+    reminder sweep. In "local" maintenance mode, recurring items and expiry are
+    handled per user in their local off-peak slot instead of at server midnight.
     """
-    schedule.every(1).minutes.do(check_and_send_reminders)
-    schedule.every().day.at("00:00").do(reschedule_all_recurring_reminders)
-    schedule.every().day.at("00:00").do(remove_expired_reminders)
-    schedule.every().day.at("09:00").do(notify_overdue_tasks)
-    schedule.every().day.at("00:00").do(reschedule_all_recurring_tasks)
+    schedule.every(REMINDER_SWEEP_MINUTES).minutes.do(run_threaded, check_and_send_reminders)
+    schedule.every().day.at("09:00").do(run_threaded, notify_overdue_tasks)
+    if MAINTENANCE_MODE == "local":
+        schedule.every().minute.do(run_threaded, run_maintenance_slots)
+        schedule.every().day.at(ASSIGN_SLOTS_AT).do(run_threaded, assign_maintenance_slots)
+    else:
+        schedule.every().day.at("00:00").do(run_threaded, reschedule_all_recurring_reminders)
+        schedule.every().day.at("00:00").do(run_threaded, remove_expired_reminders)
+        schedule.every().day.at("00:00").do(run_threaded, reschedule_all_recurring_tasks)
+        schedule.every().day.at("00:00").do(run_threaded, archive_all_completed_tasks)
     logger.info("All jobs scheduled successfully.")
 
 
 # Main Scheduler Loop
 if __name__ == "__main__":
     logger.info("Starting reminder scheduler...")
+    metrics.start_metrics_server()
+    coordinator_thread = start_sharding() if SCHEDULER_SHARDS > 1 else None
+    start_outbox_sender()
+    start_reminder_timer()
     schedule_jobs()
-    while True:
-        try:
-            schedule.run_pending()
-            time.sleep(1)
-        except Exception as e:
-            logger.error(f"Error in the main scheduler loop: {str(e)}")
+    if MAINTENANCE_MODE == "local":
+        run_threaded(assign_maintenance_slots)
+    try:
+        while True:
+            try:
+                schedule.run_pending()
+                # Sleep until the next job is due instead of polling.
+                time.sleep(max(schedule.idle_seconds() or 0, 1))
+            except Exception as e:
+                logger.error(f"Error in the main scheduler loop: {str(e)}")
+    finally:
+        if coordinator_thread is not None:
+            # Hand the shards over right away rather than when the leases expire.
+            shard_coordinator.stop()
+            coordinator_thread.join(timeout=SHARD_RELEASE_TIMEOUT_SECONDS)
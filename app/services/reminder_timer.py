@@ -0,0 +1,196 @@
+import heapq
+import logging
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from firebase_admin import firestore
+
+from app.services.firestore_service import db
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# Longest the timer thread sleeps without re-checking for a stop request.
+MAX_SLEEP_SECONDS = 60.0
+# Cancelled entries stay in the heap until popped; the heap is rebuilt when they
+# make up more than half of it.
+MIN_COMPACT_SIZE = 1024
+
+ReminderKey = Tuple[str, str]
+
+
+class TimerEntry:
+    """A pending reminder: its due time (epoch seconds) and its owner and ID."""
+
+    __slots__ = ("due", "user_id", "reminder_id", "cancelled")
+
+    def __init__(self, due: int, user_id: str, reminder_id: str):
+        self.due = due
+        self.user_id = user_id
+        self.reminder_id = reminder_id
+        self.cancelled = False
+
+    def __lt__(self, other: "TimerEntry") -> bool:
+        return self.due < other.due
+
+
+class ReminderTimer:
+    """
+    Min-heap of upcoming reminders that fires each one when it comes due.
+
+    `run` sleeps until the earliest due time and wakes early when an earlier
+    reminder is scheduled. Rescheduled and cancelled reminders are marked
+    cancelled in place rather than removed from the heap, so every change
+    costs O(log n).
+
+    Args:
+        on_due (Callable): Called on the timer thread with the `(user_id,
+            reminder_id)` keys of reminders that came due. It should hand the
+            work off rather than block.
+        clock (Callable, optional): Returns the current epoch time.
+    """
+
+    def __init__(
+        self,
+        on_due: Callable[[List[ReminderKey]], None],
+        clock: Callable[[], float] = time.time,
+    ):
+        self.on_due = on_due
+        self.clock = clock
+        self._heap: List[TimerEntry] = []
+        self._entries: Dict[ReminderKey, TimerEntry] = {}
+        self._cancelled = 0
+        self._condition = threading.Condition()
+        self._stopped = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cancel(self, key: ReminderKey) -> Optional[TimerEntry]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            entry.cancelled = True
+            self._cancelled += 1
+        return entry
+
+    def _compact(self):
+        if self._cancelled > MIN_COMPACT_SIZE and self._cancelled * 2 > len(self._heap):
+            self._heap = [entry for entry in self._heap if not entry.cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def schedule(self, user_id: str, reminder_id: str, due: int):
+        """Add a reminder, or move an already scheduled one to a new due time."""
+        key = (sys.intern(user_id), reminder_id)
+        with self._condition:
+            current = self._entries.get(key)
+            if current is not None and current.due == due:
+                return
+            self._cancel(key)
+            entry = TimerEntry(due, key[0], reminder_id)
+            self._entries[key] = entry
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] is entry:
+                self._condition.notify()
+            self._compact()
+
+    def cancel(self, user_id: str, reminder_id: str):
+        with self._condition:
+            self._cancel((user_id, reminder_id))
+            self._compact()
+
+    def clear(self):
+        with self._condition:
+            self._heap.clear()
+            self._entries.clear()
+            self._cancelled = 0
+
+    def pop_due(self, now: float) -> List[ReminderKey]:
+        """Remove and return the keys of all reminders due at or before `now`."""
+        due = []
+        with self._condition:
+            while self._heap and self._heap[0].due <= now:
+                entry = heapq.heappop(self._heap)
+                if entry.cancelled:
+                    self._cancelled -= 1
+                    continue
+                del self._entries[(entry.user_id, entry.reminder_id)]
+                due.append((entry.user_id, entry.reminder_id))
+        return due
+
+    def _seconds_to_next(self) -> float:
+        while self._heap and self._heap[0].cancelled:
+            heapq.heappop(self._heap)
+            self._cancelled -= 1
+        if not self._heap:
+            return MAX_SLEEP_SECONDS
+        return min(self._heap[0].due - self.clock(), MAX_SLEEP_SECONDS)
+
+    def run(self):
+        """Fire reminders as they come due until `stop` is called."""
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                wait = self._seconds_to_next()
+                if wait > 0:
+                    self._condition.wait(timeout=wait)
+                    continue
+            due = self.pop_due(self.clock())
+            if due:
+                try:
+                    self.on_due(due)
+                except Exception as e:
+                    logger.error(f"Failed to dispatch {len(due)} due reminders: {str(e)}")
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+
+def watch_unsent_reminders(
+    timer: ReminderTimer, accept_user: Optional[Callable[[str], bool]] = None
+):
+    """
+    Keep `timer` in sync with every unsent reminder through a Firestore
+    listener.
+
+    The listener delivers the current unsent reminders once, then only the
+    changes: new and updated reminders are (re)scheduled, and reminders that
+    are sent or deleted leave the query and are cancelled.
+
+    Args:
+        timer (ReminderTimer): The timer to keep in sync.
+        accept_user (Callable, optional): Only reminders of users it accepts are
+            scheduled, e.g. the users of this node's shards. The filter runs
+            on the client: the listener still receives every unsent reminder.
+
+    Returns:
+        The listener's watch handle; call `unsubscribe()` on it to stop.
+    """
+
+    def on_snapshot(_snapshots, changes, _read_time):
+        for change in changes:
+            snapshot = change.document
+            user_id = snapshot.reference.parent.parent.id
+            if accept_user and not accept_user(user_id):
+                continue
+            due = (snapshot.to_dict() or {}).get("due_epoch")
+            if change.type.name == "REMOVED" or due is None:
+                timer.cancel(user_id, snapshot.id)
+            else:
+                timer.schedule(user_id, snapshot.id, due)
+
+    query = (
+        db.collection_group("reminders")
+        .where(filter=firestore.FieldFilter("sent", "==", False))
+        .order_by("due_at")
+    )
+    return query.on_snapshot(on_snapshot)
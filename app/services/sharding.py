@@ -0,0 +1,185 @@
+import logging
+import math
+import os
+import socket
+import threading
+import time
+import zlib
+from typing import Callable, FrozenSet, Optional
+
+from firebase_admin import firestore
+
+from app.services.firestore_service import db
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# Number of shards users are hash-partitioned into. 1 disables sharding.
+SCHEDULER_SHARDS = int(os.getenv("SCHEDULER_SHARDS", "1"))
+SCHEDULER_NODE_ID = os.getenv("SCHEDULER_NODE_ID") or f"{socket.gethostname()}-{os.getpid()}"
+SHARD_LEASE_SECONDS = float(os.getenv("SHARD_LEASE_SECONDS", "30"))
+SHARD_RENEW_SECONDS = float(os.getenv("SHARD_RENEW_SECONDS", "10"))
+
+LEASE_COLLECTION = "scheduler_leases"
+NODE_COLLECTION = "scheduler_nodes"
+
+
+def shard_of(user_id: str, shards: int) -> int:
+    """Return the shard of a user. Stable across processes, unlike `hash`."""
+    return zlib.crc32(user_id.encode()) % shards
+
+
+class FirestoreLeaseStore:
+    """
+    Shard leases and node heartbeats stored in Firestore.
+
+    A lease is a `scheduler_leases/{shard}` document holding its owner and
+    expiry time. It is acquired and released in transactions, so at most one
+    node holds an unexpired lease on a shard.
+    """
+
+    def __init__(self, client=None):
+        self.db = client or db
+
+    def _lease_ref(self, shard: int):
+        return self.db.collection(LEASE_COLLECTION).document(str(shard))
+
+    def acquire(self, shard: int, node_id: str, ttl: float) -> bool:
+        """Acquire or renew a lease. Returns False if another node holds it."""
+
+        @firestore.transactional
+        def claim(transaction, lease_ref) -> bool:
+            snapshot = lease_ref.get(transaction=transaction)
+            lease = snapshot.to_dict() if snapshot.exists else None
+            now = time.time()
+            if lease and lease["owner"] != node_id and lease["expires_at"] > now:
+                return False
+            transaction.set(
+                lease_ref, {"shard": shard, "owner": node_id, "expires_at": now + ttl}
+            )
+            return True
+
+        return claim(self.db.transaction(), self._lease_ref(shard))
+
+    def release(self, shard: int, node_id: str):
+        @firestore.transactional
+        def release(transaction, lease_ref):
+            snapshot = lease_ref.get(transaction=transaction)
+            if snapshot.exists and snapshot.to_dict().get("owner") == node_id:
+                transaction.delete(lease_ref)
+
+        release(self.db.transaction(), self._lease_ref(shard))
+
+    def heartbeat(self, node_id: str, ttl: float):
+        self.db.collection(NODE_COLLECTION).document(node_id).set(
+            {"expires_at": time.time() + ttl}
+        )
+
+    def live_nodes(self) -> int:
+        query = self.db.collection(NODE_COLLECTION).where(
+            filter=firestore.FieldFilter("expires_at", ">", time.time())
+        )
+        return sum(1 for _ in query.select([]).stream())
+
+    def remove_node(self, node_id: str):
+        self.db.collection(NODE_COLLECTION).document(node_id).delete()
+
+
+class ShardCoordinator:
+    """
+    Claims a fair share of the scheduler shards for this node.
+
+    Every `renew_seconds` the node renews its heartbeat and its leases, and
+    aims to own `ceil(shards / live nodes)` shards: it releases shards beyond
+    that share so a new node can claim them, and claims unowned or expired
+    shards up to it. When a node dies, its leases expire and the survivors
+    take its shards over on their next renewal.
+
+    Ownership is only trusted until the leases would expire, so a node that
+    stalls past its lease stops processing instead of overlapping the new owner.
+    """
+
+    def __init__(
+        self,
+        shards: int = SCHEDULER_SHARDS,
+        node_id: str = SCHEDULER_NODE_ID,
+        store: Optional[FirestoreLeaseStore] = None,
+        lease_seconds: float = SHARD_LEASE_SECONDS,
+        renew_seconds: float = SHARD_RENEW_SECONDS,
+        on_change: Optional[Callable[[FrozenSet[int]], None]] = None,
+    ):
+        self.shards = shards
+        self.node_id = node_id
+        self.store = store or FirestoreLeaseStore()
+        self.lease_seconds = lease_seconds
+        self.renew_seconds = renew_seconds
+        self.on_change = on_change
+        self._owned: FrozenSet[int] = frozenset()
+        self._valid_until = 0.0
+        self._stop = threading.Event()
+
+    @property
+    def owned(self) -> FrozenSet[int]:
+        return self._owned if time.time() < self._valid_until else frozenset()
+
+    def owns(self, user_id: str) -> bool:
+        return shard_of(user_id, self.shards) in self.owned
+
+    def rebalance(self) -> FrozenSet[int]:
+        """Renew this node's leases and converge on its fair share of shards."""
+        started = time.time()
+        self.store.heartbeat(self.node_id, self.lease_seconds)
+        target = math.ceil(self.shards / max(self.store.live_nodes(), 1))
+
+        owned = set()
+        for shard in sorted(self._owned):
+            if len(owned) < target and self.store.acquire(shard, self.node_id, self.lease_seconds):
+                owned.add(shard)
+        for shard in self._owned - owned:
+            self.store.release(shard, self.node_id)
+
+        # Nodes start probing at different shards, so they rarely contend.
+        offset = shard_of(self.node_id, self.shards)
+        for step in range(self.shards):
+            if len(owned) >= target:
+                break
+            shard = (offset + step) % self.shards
+            if shard not in owned and self.store.acquire(shard, self.node_id, self.lease_seconds):
+                owned.add(shard)
+
+        changed = frozenset(owned) != self._owned
+        self._owned = frozenset(owned)
+        self._valid_until = started + self.lease_seconds
+        if changed:
+            logger.info(f"Node {self.node_id} owns shards {sorted(owned)} of {self.shards}")
+            if self.on_change:
+                self.on_change(self._owned)
+        return self._owned
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.rebalance()
+            except Exception as e:
+                logger.error(f"Failed to renew shard leases: {str(e)}")
+            self._stop.wait(self.renew_seconds)
+
+        for shard in self._owned:
+            self.store.release(shard, self.node_id)
+        self.store.remove_node(self.node_id)
+        self._owned = frozenset()
+        logger.info(f"Node {self.node_id} released its shards")
+
+    def start(self) -> threading.Thread:
+        """Claim shards now, then keep renewing them on a background thread."""
+        self.rebalance()
+        thread = threading.Thread(target=self.run, name="shard-coordinator", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
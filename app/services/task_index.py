@@ -0,0 +1,332 @@
+import heapq
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.services import user_cache
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# Number of users whose index is kept in memory.
+TASK_INDEX_MAX_USERS = int(os.getenv("TASK_INDEX_MAX_USERS", "1000"))
+# An index is valid while the user's task version in the user cache is the one
+# it was built at; every task write changes the version. Indexes are also rebuilt
+# after this long, which only matters when workers do not share a cache backend.
+TASK_INDEX_MAX_AGE_SECONDS = float(os.getenv("TASK_INDEX_MAX_AGE_SECONDS", "3600"))
+VERSION_SECTION = "tasks"
+
+# Vocabulary words are indexed under all their substrings of up to this length.
+MAX_GRAM = 3
+
+# Searchable fields and their weight in the ranking.
+SEARCH_FIELDS = ("title", "category", "description")
+TITLE_WEIGHT, CATEGORY_WEIGHT, DESCRIPTION_WEIGHT = 3, 2, 1
+
+
+_WORD = re.compile(r"\w+")
+
+
+def _words(text: str) -> Set[str]:
+    return set(_WORD.findall(text))
+
+
+def _grams(word: str) -> Set[str]:
+    return {
+        word[start : start + size]
+        for size in range(1, MAX_GRAM + 1)
+        for start in range(len(word) - size + 1)
+    }
+
+
+def _field_score(value: str, needle: str, weight: int) -> int:
+    position = value.find(needle)
+    if position < 0:
+        return 0
+    if value == needle:
+        return 3 * weight
+    if position == 0 or not value[position - 1].isalnum():
+        return 2 * weight
+    return weight
+
+
+def _score(text: Tuple[str, ...], needle: str) -> int:
+    """
+    Rank a task for a lowercased query. A match scores its field's weight, twice
+    that at the start of a word, and three times that for an exact field match.
+    """
+    # Unrolled over SEARCH_FIELDS, as this runs once per match; most matches
+    # are in one field, so the others are ruled out without a call.
+    title, category, description = text
+    score = 0
+    if needle in title:
+        score += _field_score(title, needle, TITLE_WEIGHT)
+    if needle in category:
+        score += _field_score(category, needle, CATEGORY_WEIGHT)
+    if needle in description:
+        score += _field_score(description, needle, DESCRIPTION_WEIGHT)
+    return score
+
+
+class TaskIndex:
+    """
+    Inverted word index of one user's tasks.
+
+    Every task is indexed under the words of its lowercased title, category and
+    description, and every vocabulary word under its substrings of up to
+    `MAX_GRAM` characters. A search finds the vocabulary words containing each
+    word of the query through those substrings, without scanning the
+    vocabulary, intersects the posting sets of the matching words, and checks
+    only those candidates for a substring match, so it returns the same tasks
+    as a full scan.
+    """
+
+    def __init__(self, tasks: Iterable[Dict] = (), version: Optional[str] = None):
+        self._tasks: Dict[str, Dict] = {}
+        self._text: Dict[str, Tuple[str, ...]] = {}
+        # All searchable fields of a task, lowercased and joined with a
+        # separator that never occurs in a query.
+        self._blobs: Dict[str, str] = {}
+        # Word -> IDs of the tasks containing it. The keys are the vocabulary.
+        self._postings: Dict[str, Set[str]] = {}
+        # Substring of up to MAX_GRAM characters -> vocabulary words containing it.
+        self._gram_words: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.built_at = time.monotonic()
+        # The user's task version the index reflects.
+        self.version = version
+        for task in tasks:
+            self._add(task)
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def _add(self, task: Dict):
+        task_id = task["id"]
+        text = tuple((task.get(field) or "").lower() for field in SEARCH_FIELDS)
+        blob = "\0".join(text)
+        self._tasks[task_id] = task
+        self._text[task_id] = text
+        self._blobs[task_id] = blob
+        postings = self._postings
+        for word in _words(blob):
+            ids = postings.get(word)
+            if ids is None:
+                postings[word] = {task_id}
+                self._add_word(word)
+            else:
+                ids.add(task_id)
+
+    def _add_word(self, word: str):
+        gram_words = self._gram_words
+        for gram in _grams(word):
+            words = gram_words.get(gram)
+            if words is None:
+                gram_words[gram] = {word}
+            else:
+                words.add(word)
+
+    def _discard_word(self, word: str):
+        for gram in _grams(word):
+            words = self._gram_words.get(gram)
+            if words is not None:
+                words.discard(word)
+                if not words:
+                    del self._gram_words[gram]
+
+    def _discard(self, task_id: str):
+        self._tasks.pop(task_id, None)
+        self._text.pop(task_id, None)
+        blob = self._blobs.pop(task_id, None)
+        if blob is None:
+            return
+        for word in _words(blob):
+            ids = self._postings.get(word)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del self._postings[word]
+                    self._discard_word(word)
+
+    def _matching_words(self, part: str) -> Set[str]:
+        """Return the vocabulary words that contain `part`."""
+        if len(part) <= MAX_GRAM:
+            return self._gram_words.get(part, set())
+        gram_sets = []
+        for start in range(len(part) - MAX_GRAM + 1):
+            words = self._gram_words.get(part[start : start + MAX_GRAM])
+            if not words:
+                return set()
+            gram_sets.append(words)
+        gram_sets.sort(key=len)
+        words = gram_sets[0].intersection(*gram_sets[1:])
+        return {word for word in words if part in word}
+
+    def _candidates(self, needle: str) -> Optional[Set[str]]:
+        """
+        Return a superset of the tasks containing `needle`, or None if the
+        query has no words to look up.
+        """
+        candidates = None
+        for part in sorted(_words(needle), key=len, reverse=True):
+            ids = set()
+            for word in self._matching_words(part):
+                ids |= self._postings[word]
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                break
+        return candidates
+
+    def add(self, task: Dict):
+        """Index a new task, replacing any task with the same ID."""
+        with self._lock:
+            self._discard(task["id"])
+            self._add(task)
+
+    def update(self, task_id: str, fields: Dict) -> bool:
+        """
+        Merge field updates into an indexed task.
+
+        Returns:
+            bool: False if the task is not in the index.
+        """
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return False
+            self._discard(task_id)
+            self._add({**task, **fields, "id": task_id})
+            return True
+
+    def remove(self, task_id: str):
+        with self._lock:
+            self._discard(task_id)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Return the tasks whose title, category or description contains `query`
+        (case-insensitively), best matches first.
+        """
+        needle = query.lower()
+        with self._lock:
+            blobs = self._blobs
+            candidates = self._candidates(needle)
+            if candidates is None:
+                matches = [i for i, blob in blobs.items() if needle in blob]
+            elif _WORD.fullmatch(needle):
+                # A single-word query is contained in every candidate's words.
+                matches = candidates
+            else:
+                matches = [i for i in candidates if needle in blobs[i]]
+
+            text = self._text
+            ranked = [(-_score(text[i], needle), text[i][0], i) for i in matches]
+            ranked = heapq.nsmallest(limit, ranked) if limit else sorted(ranked)
+            return [self._tasks[task_id] for _, _, task_id in ranked]
+
+
+_lock = threading.Lock()
+_indexes: "OrderedDict[str, TaskIndex]" = OrderedDict()
+
+
+def get_index(user_id: str) -> Optional[TaskIndex]:
+    """
+    Return the user's index, or None if it is not loaded or is out of date:
+    its task version changed, e.g. through a write in another process, or it is
+    older than `TASK_INDEX_MAX_AGE_SECONDS`.
+    """
+    with _lock:
+        index = _indexes.get(user_id)
+    if index is None:
+        return None
+    current = user_cache.version(user_id, VERSION_SECTION)
+    expired = time.monotonic() - index.built_at > TASK_INDEX_MAX_AGE_SECONDS
+    # Without a version (the cache backend failed) the index is kept.
+    if expired or (current is not None and current != index.version):
+        _drop(user_id, index)
+        return None
+    with _lock:
+        if user_id in _indexes:
+            _indexes.move_to_end(user_id)
+    return index
+
+
+def current_version(user_id: str) -> Optional[str]:
+    """Read before loading a user's tasks, and pass to `build_index`."""
+    return user_cache.version(user_id, VERSION_SECTION)
+
+
+def build_index(user_id: str, tasks: Iterable[Dict], version: Optional[str] = None) -> TaskIndex:
+    """
+    Index a user's tasks and keep the index for later searches.
+
+    Args:
+        user_id (str): Owner of the tasks.
+        tasks (Iterable[Dict]): The user's tasks.
+        version (str, optional): `current_version` from before the tasks were
+            read, so a write made while they were read makes the index stale.
+    """
+    started = time.monotonic()
+    index = TaskIndex(tasks, version)
+    with _lock:
+        _indexes[user_id] = index
+        _indexes.move_to_end(user_id)
+        while len(_indexes) > TASK_INDEX_MAX_USERS:
+            _indexes.popitem(last=False)
+    logger.info(
+        f"Indexed {len(index)} tasks for user {user_id} "
+        f"in {time.monotonic() - started:.3f}s"
+    )
+    return index
+
+
+def _drop(user_id: str, index: TaskIndex):
+    with _lock:
+        if _indexes.get(user_id) is index:
+            del _indexes[user_id]
+
+
+def drop(user_id: str):
+    """Drop the user's index here and, through its version, in other processes."""
+    user_cache.bump_version(user_id, VERSION_SECTION)
+    with _lock:
+        _indexes.pop(user_id, None)
+
+
+# Write hooks. Every task write changes the user's task version, so indexes in
+# other processes are rebuilt on their next search. An index loaded here is
+# updated in place and moves to the new version, unless it had already missed
+# a write made elsewhere; then it is dropped and rebuilt on the next search.
+
+
+def _apply(user_id: str, change) -> None:
+    with _lock:
+        index = _indexes.get(user_id)
+    before = user_cache.version(user_id, VERSION_SECTION) if index is not None else None
+    after = user_cache.bump_version(user_id, VERSION_SECTION)
+    if index is None:
+        return
+    if before is None or after is None or before != index.version or change(index) is False:
+        _drop(user_id, index)
+    else:
+        index.version = after
+
+
+def add_task(user_id: str, task: Dict):
+    _apply(user_id, lambda index: index.add(task))
+
+
+def update_task(user_id: str, task_id: str, fields: Dict):
+    _apply(user_id, lambda index: index.update(task_id, fields))
+
+
+def remove_task(user_id: str, task_id: str):
+    _apply(user_id, lambda index: index.remove(task_id))
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from firebase_admin import _token_gen, auth
+from firebase_admin.auth import verify_id_token
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# Cached tokens are dropped this many seconds before their `exp`, so clock skew
+# never lets an expired token through.
+TOKEN_CACHE_EXPIRY_MARGIN_SECONDS = 5
+CERT_REFRESH_SECONDS = float(os.getenv("AUTH_CERT_REFRESH_SECONDS", "3600"))
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of decoded Firebase ID tokens.
+
+    Entries are keyed by the SHA-256 digest of the token, so raw tokens are
+    never held in memory, and expire at the token's `exp` claim.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        key = self._key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is not None:
+                if claims["exp"] - TOKEN_CACHE_EXPIRY_MARGIN_SECONDS > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: Dict):
+        if "exp" not in claims:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+token_cache = TokenCache()
+
+
+def verify_token(token: str, verify: Optional[Callable[[str], Dict]] = None) -> Dict:
+    """
+    Return the decoded claims of a Firebase ID token, verifying it only on a
+    cache miss.
+
+    Args:
+        token (str): The Firebase ID token.
+        verify (Callable, optional): Verifier used on a cache miss. Defaults to
+            `firebase_admin.auth.verify_id_token`.
+
+    Returns:
+        dict: The decoded token claims.
+
+    Raises:
+        Exception: Whatever `verify` raises for an invalid or expired token.
+    """
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = (verify or verify_id_token)(token)
+        token_cache.put(token, claims)
+    return claims
+
+
+async def verify_token_async(token: str) -> Dict:
+    """
+    Async variant of `verify_token`.
+
+    Cache hits return without leaving the event loop; on a miss the blocking
+    verification runs on a worker thread.
+    """
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = await asyncio.to_thread(verify_id_token, token)
+        token_cache.put(token, claims)
+    return claims
+
+
+def _certificate_request() -> Optional[Callable]:
+    """
+    Return the caching HTTP request of the Admin SDK's ID token verifier, or
+    None if this firebase-admin version does not have it.
+
+    The SDK exposes no public hook for this, so its internals are used; the
+    version is pinned in requirements.txt for that reason.
+    """
+    try:
+        return auth._get_client(None)._token_verifier.request
+    except AttributeError as e:
+        logger.error(
+            f"Firebase ID token certificate refresh is disabled: this firebase-admin "
+            f"version has no certificate request to warm ({str(e)})"
+        )
+        return None
+
+
+def refresh_certificates(request: Optional[Callable] = None):
+    """
+    Fetch the ID token signing certificates through the Admin SDK's caching
+    HTTP session, so that verification never waits on a certificate download.
+    """
+    request = request or _certificate_request()
+    if request is None:
+        return
+    try:
+        request(url=_token_gen.ID_TOKEN_CERT_URI, method="GET")
+        logger.info("Refreshed Firebase ID token certificates")
+    except Exception as e:
+        logger.error(f"Failed to refresh Firebase ID token certificates: {str(e)}")
+
+
+def start_certificate_refresher(
+    interval: float = CERT_REFRESH_SECONDS,
+) -> Optional[threading.Thread]:
+    """
+    Refresh the signing certificates every `interval` seconds in the background.
+
+    Returns:
+        The refresher thread, or None if the Admin SDK's certificate request
+        cannot be found, in which case certificates are fetched on demand.
+    """
+    request = _certificate_request()
+    if request is None:
+        return None
+
+    def run():
+        while True:
+            refresh_certificates(request)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="auth-cert-refresher", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,324 @@
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# "memory" keeps entries in this process; "redis" shares them between workers.
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "memory")
+USER_CACHE_REDIS_URL = os.getenv("USER_CACHE_REDIS_URL", "redis://localhost:6379/0")
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+USER_CACHE_MAX_BYTES = int(os.getenv("USER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Sections of a user's data that are cached independently, so a write to one
+# collection does not evict the others.
+SECTIONS = ("profile", "reminders", "tasks")
+# The first page of a collection's list endpoint is cached in its own section,
+# which is dropped together with the collection.
+PAGED_SECTIONS = ("reminders", "tasks")
+
+
+def first_page_section(collection: str) -> str:
+    return f"{collection}:first_page"
+
+
+def _key(user_id: str, section: str) -> str:
+    return f"user:{user_id}:{section}"
+
+
+def _size_of(value: Any) -> int:
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class CacheBackend(ABC):
+    """Interface of a user data cache backend."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value of `key`, or None on a miss."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float):
+        """Cache `value` under `key` for `ttl` seconds."""
+
+    @abstractmethod
+    def delete(self, *keys: str):
+        """Drop `keys` from the cache."""
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU cache with per-entry TTL, bounded by entry count and by the
+    approximate (pickled) size of the cached values.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = USER_CACHE_MAX_ENTRIES,
+        max_bytes: int = USER_CACHE_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, size = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self._bytes -= size
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: float):
+        size = _size_of(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache shared by all worker processes, stored in Redis.
+
+    Any client with the `redis-py` `get`/`set`/`delete` interface works.
+    Eviction is left to the Redis `maxmemory` policy.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.client.get(key)
+        return pickle.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any, ttl: float):
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self.client.set(key, payload, px=int(ttl * 1000))
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*keys)
+
+
+def create_backend(name: str = USER_CACHE_BACKEND) -> CacheBackend:
+    if name == "redis":
+        import redis  # Optional dependency, only needed for the shared backend.
+
+        return RedisCacheBackend(redis.Redis.from_url(USER_CACHE_REDIS_URL))
+    return MemoryCacheBackend()
+
+
+backend: CacheBackend = create_backend()
+
+
+def set_backend(new_backend: CacheBackend):
+    """Replace the cache backend, e.g. with a shared one for multi-worker deployments."""
+    global backend
+    backend = new_backend
+
+
+# Invalidation counters, striped over a fixed number of slots to bound memory.
+# A load only stores its result if its key's slot was not bumped meanwhile, so
+# data read before a write cannot be cached after that write's invalidation.
+# Colliding keys at worst skip one store. Invalidations by other processes are
+# not seen here; with a shared backend their window is bounded by the TTL.
+GENERATION_SLOTS = 4096
+_generations = [0] * GENERATION_SLOTS
+_generations_lock = threading.Lock()
+
+
+def _slot(key: str) -> int:
+    return zlib.crc32(key.encode()) % GENERATION_SLOTS
+
+
+def _generation(key: str) -> int:
+    return _generations[_slot(key)]
+
+
+def generation(user_id: str, section: str) -> int:
+    """
+    Return the invalidation counter of a user's `section`. It changes on every
+    write to the section, so reads keyed by it never join a read that started
+    before the latest write.
+    """
+    return _generation(_key(user_id, section))
+
+
+def _bump(keys):
+    with _generations_lock:
+        for key in keys:
+            _generations[_slot(key)] += 1
+
+
+def _cached(key: str) -> Optional[Any]:
+    try:
+        return backend.get(key)
+    except Exception as e:
+        logger.error(f"User cache read failed for {key}: {str(e)}")
+        return None
+
+
+def _store(key: str, value: Any, generation: int):
+    # Error results are returned to the caller but never cached.
+    if isinstance(value, str) or (isinstance(value, dict) and "error" in value):
+        return
+    if _generation(key) != generation:
+        # Invalidated while loading; the value may predate the write.
+        return
+    try:
+        backend.set(key, value, USER_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.error(f"User cache write failed for {key}: {str(e)}")
+
+
+def read_through(
+    user_id: str,
+    section: str,
+    loader: Callable[[], Any],
+    accept: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """
+    Return a user's cached `section`, loading and caching it on a miss.
+
+    Cached values are shared between callers and must not be mutated. A cached
+    value that `accept` rejects is treated as a miss.
+    """
+    key = _key(user_id, section)
+    value = _cached(key)
+    if value is None or (accept is not None and not accept(value)):
+        generation = _generation(key)
+        value = loader()
+        _store(key, value, generation)
+    return value
+
+
+async def read_through_async(
+    user_id: str,
+    section: str,
+    loader: Callable[[], Awaitable[Any]],
+    accept: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """Async variant of `read_through`, for an async `loader`."""
+    key = _key(user_id, section)
+    value = _cached(key)
+    if value is None or (accept is not None and not accept(value)):
+        generation = _generation(key)
+        value = await loader()
+        _store(key, value, generation)
+    return value
+
+
+def invalidate(user_id: str, *sections: str):
+    """
+    Drop the given sections (all sections by default) of a user's cache, and
+    the cached first page of dropped collections.
+    """
+    sections = sections or SECTIONS
+    sections += tuple(first_page_section(s) for s in sections if s in PAGED_SECTIONS)
+    keys = [_key(user_id, section) for section in sections]
+    _bump(keys)
+    try:
+        backend.delete(*keys)
+    except Exception as e:
+        logger.error(f"User cache invalidation failed for {user_id}: {str(e)}")
+
+
+# Versions
+
+# Tokens that change on every write to a user's section, for data derived from
+# it outside this cache, such as the task search index. They are stored in the
+# cache backend, so with a shared backend a write in one process is seen by all.
+VERSION_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _version_key(user_id: str, section: str) -> str:
+    return _key(user_id, f"{section}:version")
+
+
+def version(user_id: str, section: str) -> Optional[str]:
+    """
+    Return the version token of a user's section, creating one if there is none.
+
+    Returns:
+        str: The token, or None if the backend failed.
+    """
+    key = _version_key(user_id, section)
+    try:
+        token = backend.get(key)
+        if token is None:
+            token = uuid.uuid4().hex
+            backend.set(key, token, VERSION_TTL_SECONDS)
+        return token
+    except Exception as e:
+        logger.error(f"User cache version read failed for {key}: {str(e)}")
+        return None
+
+
+def bump_version(user_id: str, section: str) -> Optional[str]:
+    """Give a user's section a new version token and return it, or None on failure."""
+    key = _version_key(user_id, section)
+    token = uuid.uuid4().hex
+    try:
+        backend.set(key, token, VERSION_TTL_SECONDS)
+        return token
+    except Exception as e:
+        logger.error(f"User cache version write failed for {key}: {str(e)}")
+        return None
@@ -0,0 +1,139 @@
+import logging
+import os
+from typing import Iterator, List, Optional, Tuple
+
+from firebase_admin import auth, firestore
+
+from app.services.firestore_service import db
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+logger = logging.getLogger(__name__)
+
+# "auth" pages through Firebase Authentication, "firestore" through the `users`
+# collection. Auth is the default because every signed-up user exists there,
+# whereas a `users/{uid}` document only exists once something was written to it.
+USER_ID_SOURCE = os.getenv("USER_ID_SOURCE", "auth")
+USER_ID_PAGE_SIZE = int(os.getenv("USER_ID_PAGE_SIZE", "500"))
+
+CHECKPOINT_COLLECTION = "scheduler_checkpoints"
+
+Page = Tuple[List[str], Optional[str]]
+
+
+def iter_auth_user_pages(page_size: int, cursor: Optional[str] = None) -> Iterator[Page]:
+    """
+    Page through Firebase Authentication users.
+
+    Args:
+        page_size (int): Maximum number of users per page (at most 1000).
+        cursor (str, optional): Page token to resume from.
+
+    Yields:
+        tuple: The page's user IDs and the page token of the following page.
+    """
+    page = auth.list_users(page_token=cursor, max_results=page_size)
+    while page:
+        yield [user.uid for user in page.users], page.next_page_token or None
+        page = page.get_next_page()
+
+
+def iter_firestore_user_pages(
+    page_size: int, cursor: Optional[str] = None
+) -> Iterator[Page]:
+    """
+    Page through the `users` collection in document ID order.
+
+    Only document references are fetched, never user data.
+
+    Args:
+        page_size (int): Maximum number of users per page.
+        cursor (str, optional): Last user ID of the previous page.
+
+    Yields:
+        tuple: The page's user IDs and the cursor of the following page.
+    """
+    query = (
+        db.collection("users")
+        .order_by(firestore.FieldPath.document_id())
+        .select([])
+        .limit(page_size)
+    )
+    while True:
+        page = query.start_after({"__name__": cursor}) if cursor else query
+        user_ids = [snapshot.id for snapshot in page.stream()]
+        cursor = user_ids[-1] if len(user_ids) == page_size else None
+        yield user_ids, cursor
+        if cursor is None:
+            return
+
+
+PAGE_SOURCES = {
+    "auth": iter_auth_user_pages,
+    "firestore": iter_firestore_user_pages,
+}
+
+
+# Checkpoints
+
+
+def load_checkpoint(job: str, source: str) -> Optional[str]:
+    snapshot = db.collection(CHECKPOINT_COLLECTION).document(job).get()
+    if not snapshot.exists:
+        return None
+    checkpoint = snapshot.to_dict()
+    if checkpoint.get("source") != source:
+        logger.warning(f"Ignoring checkpoint for {job} from source {checkpoint.get('source')}")
+        return None
+    return checkpoint.get("cursor")
+
+
+def save_checkpoint(job: str, source: str, cursor: str):
+    db.collection(CHECKPOINT_COLLECTION).document(job).set(
+        {"source": source, "cursor": cursor, "updated_at": firestore.SERVER_TIMESTAMP}
+    )
+
+
+def clear_checkpoint(job: str):
+    db.collection(CHECKPOINT_COLLECTION).document(job).delete()
+
+
+def iter_user_ids(
+    job: Optional[str] = None,
+    source: Optional[str] = None,
+    page_size: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Lazily yield every user ID, one page at a time.
+
+    When `job` is given, the cursor of the next page is checkpointed once the
+    consumer has pulled every ID of the current page, and a later run of the
+    same job resumes from there. The checkpoint is cleared after the last page.
+
+    Args:
+        job (str, optional): Name of the job to checkpoint progress for.
+        source (str, optional): "auth" or "firestore". Defaults to USER_ID_SOURCE.
+        page_size (int, optional): Users per page. Defaults to USER_ID_PAGE_SIZE.
+
+    Yields:
+        str: User IDs.
+    """
+    source = source or USER_ID_SOURCE
+    page_size = page_size or USER_ID_PAGE_SIZE
+    cursor = load_checkpoint(job, source) if job else None
+    if cursor:
+        logger.info(f"Resuming {job} from checkpoint {cursor}")
+
+    seen = 0
+    for user_ids, next_cursor in PAGE_SOURCES[source](page_size, cursor):
+        yield from user_ids
+        seen += len(user_ids)
+        if job and next_cursor:
+            save_checkpoint(job, source, next_cursor)
+
+    if job:
+        clear_checkpoint(job)
+        logger.info(f"Enumerated {seen} users for {job}")
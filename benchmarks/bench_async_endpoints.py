@@ -0,0 +1,71 @@
+"""
+Compare request concurrency of the async `GET /reminders` endpoint with the
+previous thread-pool (`def`) implementation on a single worker process.
+
+Firestore is replaced by a fake with a fixed latency, so the benchmark measures
+how many requests can wait on the database at the same time. Sync handlers are
+capped by Starlette's 40-thread pool; async handlers are not.
+
+Usage:
+    FIREBASE_CREDENTIALS=... python -m benchmarks.bench_async_endpoints
+"""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import httpx
+from fastapi import Depends
+
+from app.main import app, get_current_user
+
+FIRESTORE_LATENCY_SECONDS = 0.05
+CONCURRENCY_LEVELS = [10, 40, 100, 400, 1000]
+REMINDERS = [{"id": "r1", "title": "Meeting", "due_date": "2024-12-31T10:00:00"}]
+
+
+async def fake_list_page(user_id: str, collection: str, limit: int, cursor=None, fields=None):
+    await asyncio.sleep(FIRESTORE_LATENCY_SECONDS)
+    return {"items": REMINDERS, "next_cursor": None}
+
+
+def fake_get_reminders_blocking(user_id: str):
+    time.sleep(FIRESTORE_LATENCY_SECONDS)
+    return REMINDERS
+
+
+@app.get("/bench/sync-reminders", include_in_schema=False)
+def retrieve_reminders_sync(user_id: str = Depends(get_current_user)):
+    return fake_get_reminders_blocking(user_id["uid"])
+
+
+async def bench_user():
+    return {"uid": "bench_user"}
+
+
+async def run_level(client: httpx.AsyncClient, path: str, concurrency: int) -> float:
+    started = time.perf_counter()
+    responses = await asyncio.gather(*(client.get(path) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    assert all(response.status_code == 200 for response in responses)
+    return concurrency / elapsed
+
+
+async def main():
+    app.dependency_overrides[get_current_user] = bench_user
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"Firestore latency: {FIRESTORE_LATENCY_SECONDS * 1000:.0f} ms per call")
+        print(f"{'concurrency':>12} {'sync req/s':>12} {'async req/s':>12} {'speedup':>8}")
+        for concurrency in CONCURRENCY_LEVELS:
+            sync_rps = await run_level(client, "/bench/sync-reminders", concurrency)
+            async_rps = await run_level(client, "/reminders", concurrency)
+            print(
+                f"{concurrency:>12} {sync_rps:>12.0f} {async_rps:>12.0f}"
+                f" {async_rps / sync_rps:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    with patch("app.main.list_page", fake_list_page):
+        asyncio.run(main())
@@ -0,0 +1,97 @@
+"""
+Compare `search_tasks` on the word index with the previous full scan, for a
+user with 100k tasks.
+
+The scan lowercases the title, description and category of every task on every
+search; the index is built once and then only checks the tasks that contain a
+vocabulary word matching each word of the query.
+
+Usage:
+    FIREBASE_CREDENTIALS=... python -m benchmarks.bench_task_search
+"""
+
+import random
+import time
+
+from app.services.task_index import TaskIndex
+
+TASK_COUNT = 100_000
+SEARCHES = 20
+VOCABULARY_SIZE = 5000
+CATEGORIES = ["Work", "Home", "Errands", "Travel", "Health", "Finance"]
+SYLLABLES = (
+    "ba be bi bo bu da de di do ka ke ki ko la le li lo "
+    "ma me mi mo na ne ni no ra re ri ro sa se si so ta te ti to"
+).split()
+
+
+def make_vocabulary(rng: random.Random):
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_tasks(count: int):
+    rng = random.Random(0)
+    words = make_vocabulary(rng)
+    return [
+        {
+            "id": f"task{i}",
+            "title": " ".join(rng.choices(words, k=3)).capitalize(),
+            "description": " ".join(rng.choices(words, k=12)),
+            "category": rng.choice(CATEGORIES),
+        }
+        for i in range(count)
+    ]
+
+
+def make_queries(tasks):
+    sample = tasks[42]
+    title_words = sample["title"].lower().split()
+    return [
+        title_words[0],  # A whole word.
+        " ".join(title_words[:2]),  # A phrase from one task.
+        title_words[1][:4],  # A word prefix.
+        "zz",  # A fragment of many vocabulary words.
+        "xyzzy",  # No match.
+        "travel",  # A category: matches a sixth of all tasks.
+    ]
+
+
+def scan_search(tasks, query: str):
+    query_lower = query.lower()
+    return [
+        task
+        for task in tasks
+        if query_lower in task["title"].lower()
+        or query_lower in (task.get("description") or "").lower()
+        or query_lower in (task.get("category") or "").lower()
+    ]
+
+
+def timed(search, query: str) -> float:
+    started = time.perf_counter()
+    for _ in range(SEARCHES):
+        search(query)
+    return (time.perf_counter() - started) / SEARCHES * 1000
+
+
+def main():
+    tasks = make_tasks(TASK_COUNT)
+    queries = make_queries(tasks)
+    started = time.perf_counter()
+    index = TaskIndex(tasks)
+    print(f"Indexed {TASK_COUNT} tasks in {time.perf_counter() - started:.2f}s")
+    print(f"{'query':>20} {'matches':>8} {'scan ms':>9} {'index ms':>9} {'top 50 ms':>10}")
+    for query in queries:
+        matches = len(scan_search(tasks, query))
+        assert len(index.search(query)) == matches
+        scan_ms = timed(lambda q: scan_search(tasks, q), query)
+        index_ms = timed(index.search, query)
+        top_ms = timed(lambda q: index.search(q, 50), query)
+        print(f"{query:>20} {matches:>8} {scan_ms:>9.2f} {index_ms:>9.2f} {top_ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import pytest
+
+from app.services import rate_limit, user_cache
+from app.services.user_cache import MemoryCacheBackend
+
+
+@pytest.fixture
+def memory_user_cache():
+    """Use a fresh in-memory user cache, restoring the previous backend afterwards."""
+    previous = user_cache.backend
+    backend = MemoryCacheBackend()
+    user_cache.set_backend(backend)
+    yield backend
+    user_cache.set_backend(previous)
+
+
+class UnlimitedBackend(rate_limit.RateLimitBackend):
+    def take(self, key, cost, rate, burst):
+        return 0.0
+
+
+@pytest.fixture
+def unlimited_rate_limit():
+    """Disable rate limiting, restoring the previous backend afterwards."""
+    previous = rate_limit.backend
+    rate_limit.set_backend(UnlimitedBackend())
+    yield
+    rate_limit.set_backend(previous)
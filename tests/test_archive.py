@@ -0,0 +1,80 @@
+import gzip
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from app.services import archive
+
+
+def _snapshot(item):
+    snapshot = MagicMock(id=item["id"])
+    snapshot.to_dict.return_value = item
+    return snapshot
+
+
+def _query(mock_collection, pages):
+    query = mock_collection.return_value.where.return_value.where.return_value
+    query = query.order_by.return_value.limit.return_value
+    query.stream.return_value = pages[0]
+    query.start_after.return_value.stream.side_effect = pages[1:]
+    return query
+
+
+def test_archive_streams_items_to_ndjson_and_deletes_them(tmp_path):
+    due_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    old = _snapshot({"id": "r1", "title": "Old", "due_date": "2024-01-01", "due_at": due_at})
+    recurring = _snapshot({"id": "r2", "title": "Weekly", "recurring": True})
+
+    with patch.object(archive, "ARCHIVE_DIR", str(tmp_path)), patch(
+        "app.services.archive.user_collection"
+    ) as mock_collection, patch("app.services.archive.db") as mock_db:
+        _query(mock_collection, [[old, recurring]])
+        result = archive.expire_old_reminders("test_user", "2024-06-01T00:00:00")
+
+        assert result["archived"] == 1
+        batch = mock_db.batch.return_value
+        batch.delete.assert_called_once_with(old.reference)
+        batch.commit.assert_called_once()
+        items = list(archive.read_archive(result["file"]))
+        assert items == [{**old.to_dict(), "due_at": due_at.isoformat()}]
+
+
+def test_archive_without_finished_items_writes_nothing(tmp_path):
+    with patch.object(archive, "ARCHIVE_DIR", str(tmp_path)), patch(
+        "app.services.archive.user_collection"
+    ) as mock_collection:
+        _query(mock_collection, [[]])
+        result = archive.archive_completed_tasks("test_user", "2024-06-01T00:00:00")
+
+    assert result["archived"] == 0
+    assert archive.archive_files("test_user", "tasks") == []
+
+
+def test_restore_selected_items_rewrites_the_archive(tmp_path):
+    directory = tmp_path / "test_user" / "tasks"
+    directory.mkdir(parents=True)
+    path = directory / "20240101T000000-abc.ndjson.gz"
+    with gzip.open(path, "wt") as f:
+        f.write('{"id": "t1", "title": "A", "due_date": "2024-01-01T10:00:00"}\n')
+        f.write('{"id": "t2", "title": "B", "due_date": "2024-01-02T10:00:00"}\n')
+
+    with patch.object(archive, "ARCHIVE_DIR", str(tmp_path)), patch(
+        "app.services.archive.user_collection"
+    ) as mock_collection, patch("app.services.archive.db") as mock_db:
+        result = archive.restore_items("test_user", "tasks", {"t1"})
+
+        assert result["restored"] == 1
+        mock_collection.return_value.document.assert_called_once_with("t1")
+        restored = mock_db.batch.return_value.set.call_args.args[1]
+        assert restored["due_epoch"] == int(restored["due_at"].timestamp())
+        assert [item["id"] for item in archive.read_archive(str(path))] == ["t2"]
+
+        archive.restore_items("test_user", "tasks")
+        assert not path.exists()
+
+
+def test_truncated_archive_yields_complete_items(tmp_path):
+    path = tmp_path / "truncated.ndjson.gz"
+    data = gzip.compress(b'{"id": "r1"}\n{"id": "r2"}\n')
+    path.write_bytes(data[: len(data) - 8])
+
+    assert [item["id"] for item in archive.read_archive(str(path))] == ["r1", "r2"]
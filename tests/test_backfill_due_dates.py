@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from app.services.backfill_due_dates import backfill_user
+from app.services.firestore_service import with_due_at
+
+
+def _snapshot(item_id, data):
+    snapshot = MagicMock()
+    snapshot.id = item_id
+    snapshot.to_dict.return_value = data
+    return snapshot
+
+
+def test_with_due_at_adds_utc_timestamp_and_epoch():
+    item = with_due_at({"due_date": "2024-12-31T10:00:00+02:00"})
+
+    assert item["due_date"] == "2024-12-31T10:00:00+02:00"
+    assert item["due_at"] == datetime(2024, 12, 31, 8, 0, tzinfo=timezone.utc)
+    assert item["due_epoch"] == 1735632000
+
+
+def test_backfill_user_updates_only_items_missing_due_fields():
+    done = {"due_date": "2024-12-31T10:00:00", "due_at": "set", "due_epoch": 1}
+    snapshots = [
+        _snapshot("new", {"due_date": "2024-12-31T10:00:00+00:00"}),
+        _snapshot("done", done),
+        _snapshot("invalid", {"due_date": "not a date"}),
+    ]
+
+    with patch("app.services.backfill_due_dates.user_collection") as mock_collection, patch(
+        "app.services.backfill_due_dates.bulk_update_collection"
+    ) as mock_bulk_update:
+        mock_collection.return_value.select.return_value.stream.side_effect = [snapshots, []]
+        mock_bulk_update.return_value = {"message": "Updated 1 reminders"}
+        result = backfill_user("test_user")
+
+    assert result["backfilled"] == {"reminders": 2, "tasks": 0}
+    mock_bulk_update.assert_called_once_with(
+        "test_user",
+        "reminders",
+        {
+            "new": {"due_date": "2024-12-31T10:00:00+00:00"},
+            # Null due fields keep undated items in pages ordered by due_at.
+            "invalid": {"due_at": None, "due_epoch": None},
+        },
+    )
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+from app.main import Reminder, Task
+from app.services import data_transfer
+from app.services.data_transfer import import_ndjson, iter_ndjson
+
+MODELS = {"reminders": Reminder, "tasks": Task}
+
+
+async def _chunks(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _collect(lines):
+    return [record async for record in lines]
+
+
+def test_iter_ndjson_splits_lines_across_chunks():
+    records = asyncio.run(_collect(iter_ndjson(_chunks(b'{"a": 1}\n{"b"', b": 2}\n\n{oops}"))))
+
+    assert records[:2] == [(1, {"a": 1}), (2, {"b": 2})]
+    assert records[2][0] == 4 and isinstance(records[2][1], ValueError)
+
+
+def test_iter_ndjson_drops_oversized_lines():
+    with patch.object(data_transfer, "MAX_IMPORT_LINE_BYTES", 8):
+        records = asyncio.run(
+            _collect(iter_ndjson(_chunks(b'{"a": "long', b'er than 8"}\n{"b": 2}\n')))
+        )
+
+    assert isinstance(records[0][1], ValueError)
+    assert records[1] == (2, {"b": 2})
+
+
+@patch("app.services.data_transfer.import_items", new_callable=AsyncMock)
+def test_import_batches_valid_records_and_reports_errors(mock_import_items):
+    mock_import_items.side_effect = lambda user_id, collection, items: {"imported": len(items)}
+    lines = [
+        {"collection": "tasks", "item": {"id": "t1", "title": "A", "due_date": "2024-01-01",
+                                         "status": "Completed", "due_epoch": 1}},
+        {"collection": "reminders", "item": {"title": "B", "due_date": "2024-01-02"}},
+        {"collection": "notes", "item": {}},
+        {"collection": "tasks", "item": {"title": "No due date"}},
+    ]
+    body = "".join(json.dumps(line) + "\n" for line in lines).encode()
+
+    with patch.object(data_transfer, "BATCH_LIMIT", 1):
+        summary = asyncio.run(import_ndjson("test_user", _chunks(body), MODELS))
+
+    assert summary["imported"] == {"reminders": 1, "tasks": 1}
+    assert [error["line"] for error in summary["errors"]] == [3, 4]
+    task = mock_import_items.await_args_list[0].args[2][0]
+    assert task["status"] == "Completed" and task["priority"] == "Medium"
+    assert "due_epoch" not in task
+
+
+@patch("app.services.data_transfer.import_items", new_callable=AsyncMock)
+def test_import_fails_only_lines_with_invalid_ids_or_kept_fields(mock_import_items):
+    mock_import_items.side_effect = lambda user_id, collection, items: {"imported": len(items)}
+    item = {"title": "A", "due_date": "2024-01-01"}
+    lines = [
+        {"collection": "reminders", "item": {**item, "id": "r1"}},
+        {"collection": "reminders", "item": {**item, "id": 7}},
+        {"collection": "reminders", "item": {**item, "id": ""}},
+        {"collection": "reminders", "item": {**item, "id": "a/b"}},
+        {"collection": "reminders", "item": {**item, "id": "__id__"}},
+        {"collection": "reminders", "item": {**item, "id": ".."}},
+        {"collection": "reminders", "item": {**item, "sent": "yes"}},
+        {"collection": "reminders", "item": {**item, "recurrence_start": "soon"}},
+    ]
+    body = "".join(json.dumps(line) + "\n" for line in lines).encode()
+
+    summary = asyncio.run(import_ndjson("test_user", _chunks(body), MODELS))
+
+    assert summary["imported"] == {"reminders": 1, "tasks": 0}
+    assert [error["line"] for error in summary["errors"]] == [2, 3, 4, 5, 6, 7, 8]
+
+
+@patch("app.services.data_transfer.import_items", new_callable=AsyncMock)
+def test_import_drops_fields_the_model_does_not_define(mock_import_items):
+    mock_import_items.return_value = {"imported": 1}
+    line = {
+        "collection": "reminders",
+        "item": {"id": "r1", "title": "A", "due_date": "2024-01-01", "sent": True,
+                 "recurrence_start": "2024-01-01T00:00:00", "owner": "someone-else"},
+    }
+    body = (json.dumps(line) + "\n").encode()
+
+    asyncio.run(import_ndjson("test_user", _chunks(body), MODELS))
+
+    reminder = mock_import_items.await_args.args[2][0]
+    assert "owner" not in reminder
+    assert reminder["sent"] is True
+    assert reminder["recurrence_start"] == "2024-01-01T00:00:00"
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from app.services.email_outbox import EmailOutbox, OutboxSender
+
+
+class StubMailerSend(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    responses = []
+    received = []
+    bulk_status = {}
+
+    def _respond(self, body=None):
+        status, headers = StubMailerSend.responses.pop(0) if StubMailerSend.responses else (202, {})
+        if self.path == "/bulk-email" and status == 202:
+            body = {"message": "The bulk email is being processed.", "bulk_email_id": "bulk-1"}
+        elif self.path.startswith("/bulk-email/"):
+            status, body = 200, {"data": StubMailerSend.bulk_status}
+        content = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        StubMailerSend.received.append((self.path, json.loads(body), self.client_address))
+        self._respond()
+
+    def do_GET(self):
+        StubMailerSend.received.append((self.path, None, self.client_address))
+        self._respond()
+
+    def log_message(self, *args):
+        pass
+
+
+def _run_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubMailerSend)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_outbox_sender_retries_rate_limited_messages(tmp_path):
+    StubMailerSend.received = []
+    StubMailerSend.responses = [(429, {"retry-after": "0"}), (500, {})]
+    server = _run_stub_server()
+    outbox = EmailOutbox(str(tmp_path / "outbox.sqlite3"))
+    for i in range(5):
+        outbox.enqueue({"to": [{"email": f"user{i}@example.com"}]}, dedupe_key=f"m{i}")
+    assert outbox.enqueue({"to": []}, dedupe_key="m0") is None
+
+    sender = OutboxSender(
+        outbox,
+        api_key="test",
+        api_url=f"http://127.0.0.1:{server.server_port}",
+        workers=2,
+        backoff_seconds=0,
+        bulk_limit=1,
+    )
+    asyncio.run(sender.run(until_empty=True))
+    server.shutdown()
+
+    assert outbox.stats() == {"sent": 5}
+    assert len(StubMailerSend.received) == 7
+    assert {path for path, _, _ in StubMailerSend.received} == {"/email"}
+    # Keep-alive: two workers never need more than two connections.
+    assert len({address for _, _, address in StubMailerSend.received}) <= 2
+
+
+def test_outbox_marks_client_errors_failed(tmp_path):
+    StubMailerSend.received = []
+    StubMailerSend.responses = [(422, {})]
+    server = _run_stub_server()
+    outbox = EmailOutbox(str(tmp_path / "outbox.sqlite3"))
+    outbox.enqueue({"to": [{"email": "invalid"}]})
+
+    sender = OutboxSender(
+        outbox, api_key="test", api_url=f"http://127.0.0.1:{server.server_port}", workers=1
+    )
+    asyncio.run(sender.run(until_empty=True))
+    server.shutdown()
+
+    assert outbox.stats() == {"failed": 1}
+
+
+def test_outbox_sender_submits_ready_messages_as_bulk_job(tmp_path):
+    StubMailerSend.received = []
+    StubMailerSend.responses = []
+    StubMailerSend.bulk_status = {
+        "id": "bulk-1",
+        "state": "completed",
+        "validation_errors": {"message.1.to.0.email": ["The email must be valid."]},
+    }
+    server = _run_stub_server()
+    outbox = EmailOutbox(str(tmp_path / "outbox.sqlite3"))
+    for i in range(3):
+        outbox.enqueue({"to": [{"email": f"user{i}@example.com"}]})
+
+    sender = OutboxSender(
+        outbox,
+        api_key="test",
+        api_url=f"http://127.0.0.1:{server.server_port}",
+        workers=1,
+        bulk_poll_seconds=0,
+    )
+    asyncio.run(sender.run(until_empty=True))
+    server.shutdown()
+
+    paths = [path for path, _, _ in StubMailerSend.received]
+    assert paths == ["/bulk-email", "/bulk-email/bulk-1"]
+    assert len(StubMailerSend.received[0][1]) == 3
+    assert outbox.bulk_job_status("bulk-1") == {"sent": 2, "failed": 1}
+
+
+def test_outbox_sender_retries_unreadable_bulk_response(tmp_path):
+    StubMailerSend.received = []
+    # A success status without a bulk job ID in the body.
+    StubMailerSend.responses = [(200, {})]
+    StubMailerSend.bulk_status = {"id": "bulk-1", "state": "completed"}
+    server = _run_stub_server()
+    outbox = EmailOutbox(str(tmp_path / "outbox.sqlite3"))
+    for i in range(2):
+        outbox.enqueue({"to": [{"email": f"user{i}@example.com"}]})
+
+    sender = OutboxSender(
+        outbox,
+        api_key="test",
+        api_url=f"http://127.0.0.1:{server.server_port}",
+        workers=1,
+        backoff_seconds=0,
+        bulk_poll_seconds=0,
+    )
+    asyncio.run(sender.run(until_empty=True))
+    server.shutdown()
+
+    paths = [path for path, _, _ in StubMailerSend.received]
+    assert paths == ["/bulk-email", "/bulk-email", "/bulk-email/bulk-1"]
+    assert outbox.stats() == {"sent": 2}
+
+
+def test_failed_bulk_job_is_not_requeued_past_max_attempts(tmp_path):
+    outbox = EmailOutbox(str(tmp_path / "outbox.sqlite3"))
+    for i in range(2):
+        outbox.enqueue({"to": [{"email": f"user{i}@example.com"}]})
+
+    outbox.mark_submitted([message_id for message_id, _, _ in outbox.claim(2)], "bulk-1")
+    outbox.requeue_bulk_job("bulk-1", "Bulk job failed", max_attempts=2)
+    assert outbox.stats() == {"queued": 2}
+
+    outbox.mark_submitted([message_id for message_id, _, _ in outbox.claim(2)], "bulk-2")
+    outbox.requeue_bulk_job("bulk-2", "Bulk job failed", max_attempts=2)
+    assert outbox.stats() == {"failed": 2}
@@ -1,6 +1,6 @@
 from unittest.mock import patch
 
-from app.services.email_service import send_email
+from app.services.email_service import send_bulk, send_email
 
 
 def test_send_email_success():
@@ -8,3 +8,24 @@ def test_send_email_success():
         mock_send.return_value = None
         result = send_email("test@example.com", "Test Subject", "Test Body")
         assert result["message"] == "Email sent successfully to test@example.com"
+
+
+def test_send_bulk_chunks_messages():
+    messages = [
+        {"recipient": f"user{i}@example.com", "subject": "Subject", "body": "Body"}
+        for i in range(1200)
+    ]
+    with patch("app.services.email_service.httpx.Client") as mock_client, patch(
+        "app.services.email_service.get_outbox"
+    ) as mock_outbox:
+        post = mock_client.return_value.__enter__.return_value.post
+        post.return_value.json.side_effect = [
+            {"bulk_email_id": "bulk-1"},
+            {"bulk_email_id": "bulk-2"},
+            {"bulk_email_id": "bulk-3"},
+        ]
+        result = send_bulk(messages)
+
+    assert result["bulk_email_ids"] == ["bulk-1", "bulk-2", "bulk-3"]
+    assert [len(call.kwargs["json"]) for call in post.call_args_list] == [500, 500, 200]
+    assert mock_outbox.return_value.record_submitted.call_count == 3
@@ -0,0 +1,47 @@
+from unittest.mock import patch
+
+from app.services.email_templates import get_template, render_email
+from app.services.firestore_service import get_notification_settings
+
+
+def test_render_email_splits_subject_and_escapes_html():
+    email = render_email("reminder", title="Pay <rent>", due_date="2024-12-31T10:00:00")
+
+    assert email["subject"] == "Reminder: Pay <rent>"
+    assert email["body"].startswith("Your reminder 'Pay <rent>' is due on 2024-12-31T10:00:00.")
+    assert "Pay &lt;rent&gt;" in email["html_body"]
+
+
+def test_render_digest_lists_every_item():
+    items = [
+        {"title": "Report", "due_date": "2024-01-01", "priority": "High"},
+        {"title": "Taxes", "due_date": "2024-01-02", "priority": "Low"},
+    ]
+    email = render_email("overdue_digest", items=items)
+
+    assert email["subject"] == "You have 2 overdue tasks"
+    assert "- Report (due 2024-01-01, priority: High)" in email["body"]
+    assert email["html_body"].count("<li>") == 2
+
+
+def test_templates_are_compiled_once():
+    render_email("reminder", title="A", due_date="2024-01-01")
+    with patch("builtins.open") as mock_open:
+        render_email("reminder", title="B", due_date="2024-01-02")
+        mock_open.assert_not_called()
+    assert get_template("reminder.txt") is get_template("reminder.txt")
+
+
+def test_notification_settings_default_to_digest():
+    with patch(
+        "app.services.firestore_service.get_user_data", return_value="User not found"
+    ):
+        settings = get_notification_settings("test_user")
+    assert settings == {"email": "recipient-email@example.com", "notification_mode": "digest"}
+
+    with patch(
+        "app.services.firestore_service.get_user_data",
+        return_value={"email": "a@example.com", "notification_mode": "immediate"},
+    ):
+        settings = get_notification_settings("test_user")
+    assert settings == {"email": "a@example.com", "notification_mode": "immediate"}
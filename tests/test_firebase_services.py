@@ -1,6 +1,27 @@
-from unittest.mock import patch
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 
-from app.services.firestore_service import add_reminder
+import pytest
+
+from app.services import user_cache
+from app.services.async_firestore_service import (
+    apply_batch,
+    decode_cursor,
+    encode_cursor,
+    list_page,
+)
+from app.services.firestore_service import (
+    add_reminder,
+    bulk_update_reminders,
+    get_overdue_tasks,
+    get_reminders,
+    iter_due_reminders,
+    reschedule_recurring_reminders,
+    search_tasks,
+    update_reminder,
+    update_task,
+)
 
 
 def test_add_reminder_success():
@@ -11,3 +32,182 @@ def test_add_reminder_success():
         mock_db.return_value.document.return_value.update.return_value = None
         result = add_reminder(user_id, reminder)
         assert result["message"] == "Reminder added successfully"
+
+
+def test_update_reminder_writes_single_document():
+    with patch("app.services.firestore_service.db.collection") as mock_db:
+        reminders = mock_db.return_value.document.return_value.collection.return_value
+        result = update_reminder("test_user", "reminder_1", {"sent": True})
+
+        assert result["message"] == "Reminder updated successfully"
+        reminders.document.assert_called_once_with("reminder_1")
+        reminders.document.return_value.update.assert_called_once_with({"sent": True})
+
+
+def _reminder_snapshot(user_id, reminder_id):
+    snapshot = MagicMock()
+    snapshot.reference.parent.parent.id = user_id
+    snapshot.to_dict.return_value = {"id": reminder_id, "sent": False}
+    return snapshot
+
+
+def test_iter_due_reminders_pages_with_cursor():
+    first_page = [_reminder_snapshot("u1", "r1"), _reminder_snapshot("u2", "r2")]
+    second_page = [_reminder_snapshot("u1", "r3")]
+
+    with patch("app.services.firestore_service.db.collection_group") as mock_group:
+        query = mock_group.return_value.where.return_value.where.return_value
+        query = query.order_by.return_value.limit.return_value
+        query.stream.return_value = first_page
+        query.start_after.return_value.stream.return_value = second_page
+
+        due = list(iter_due_reminders(page_size=2))
+
+        assert [(user_id, r["id"]) for user_id, r in due] == [
+            ("u1", "r1"),
+            ("u2", "r2"),
+            ("u1", "r3"),
+        ]
+        query.start_after.assert_called_once_with(first_page[-1])
+
+
+def test_bulk_update_reminders_commits_one_batch():
+    updates = {"r1": {"sent": True}, "r2": {"sent": True}, "r3": {"sent": True}}
+
+    with patch("app.services.firestore_service.db") as mock_db:
+        result = bulk_update_reminders("test_user", updates)
+
+        assert result["message"] == "Updated 3 reminders"
+        mock_db.batch.assert_called_once()
+        assert mock_db.batch.return_value.update.call_count == 3
+        mock_db.batch.return_value.commit.assert_called_once()
+
+
+def test_get_reminders_is_cached_until_a_write(memory_user_cache):
+    snapshot = MagicMock()
+    snapshot.to_dict.return_value = {"id": "r1", "title": "Cached"}
+
+    with patch("app.services.firestore_service.db.collection") as mock_db:
+        reminders = mock_db.return_value.document.return_value.collection.return_value
+        reminders.stream.return_value = [snapshot]
+
+        assert get_reminders("test_user") == [{"id": "r1", "title": "Cached"}]
+        assert get_reminders("test_user") == [{"id": "r1", "title": "Cached"}]
+        assert reminders.stream.call_count == 1
+
+        update_reminder("test_user", "r1", {"title": "Changed"})
+        get_reminders("test_user")
+        assert reminders.stream.call_count == 2
+
+
+def test_page_cursor_round_trip():
+    due_at = datetime(2024, 12, 31, 10, tzinfo=timezone.utc)
+    cursor = encode_cursor({"id": "r1", "due_at": due_at, "title": "Meeting"})
+
+    assert decode_cursor(cursor) == {"due_at": due_at, "__name__": "r1"}
+    undated = encode_cursor({"id": "r2", "due_at": None})
+    assert decode_cursor(undated) == {"due_at": None, "__name__": "r2"}
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_search_tasks_reads_tasks_once_and_follows_updates(memory_user_cache):
+    snapshot = MagicMock()
+    snapshot.to_dict.return_value = {"id": "t1", "title": "Buy groceries", "category": "Errands"}
+
+    with patch("app.services.firestore_service.db.collection") as mock_db:
+        tasks = mock_db.return_value.document.return_value.collection.return_value
+        tasks.stream.return_value = [snapshot]
+
+        assert [t["id"] for t in search_tasks("search_user", "groc")] == ["t1"]
+        update_task("search_user", "t1", {"title": "Pay rent"})
+
+        assert search_tasks("search_user", "groc") == []
+        assert search_tasks("search_user", "rent")[0]["title"] == "Pay rent"
+        assert tasks.stream.call_count == 1
+
+
+def test_reschedule_recurring_reminders_catches_up_in_one_batch():
+    snapshot = MagicMock()
+    snapshot.id = "r1"
+    snapshot.to_dict.return_value = {
+        "id": "r1",
+        "due_date": "2024-01-31T09:00:00",
+        "recurring": True,
+        "recurrence_interval": "monthly",
+        "sent": True,
+    }
+
+    with patch("app.services.firestore_service.db") as mock_db:
+        reminders = mock_db.collection.return_value.document.return_value.collection.return_value
+        reminders.where.return_value.where.return_value.stream.return_value = [snapshot]
+        result = reschedule_recurring_reminders("test_user", now=datetime(2024, 6, 15))
+
+        assert result["message"] == "Recurring reminders rescheduled"
+        update = mock_db.batch.return_value.update.call_args.args[1]
+        assert update["due_date"] == "2024-06-30T09:00:00"
+        assert update["sent"] is False
+        mock_db.batch.return_value.commit.assert_called_once()
+
+
+def test_get_overdue_tasks_queries_open_tasks_due_before_now():
+    with patch("app.services.firestore_service.user_collection") as mock_collection:
+        first = mock_collection.return_value.where.return_value
+        query = first.where.return_value.order_by.return_value
+        snapshot = MagicMock(id="t1")
+        snapshot.to_dict.return_value = {"title": "Late"}
+        query.stream.return_value = [snapshot]
+
+        assert get_overdue_tasks("test_user") == [{"title": "Late", "id": "t1"}]
+        status_filter = mock_collection.return_value.where.call_args.kwargs["filter"]
+        assert status_filter.op_string == "in"
+        assert status_filter.value == ["Pending", "In Progress"]
+
+
+def test_apply_batch_updates_items_created_in_the_same_chunk():
+    async def no_snapshots(refs):
+        for _ in ():
+            yield
+
+    with patch("app.services.async_firestore_service.db") as mock_db:
+        items_ref = mock_db.collection.return_value.document.return_value.collection.return_value
+        items_ref.document.side_effect = lambda item_id=None: MagicMock(id=item_id or "generated")
+        mock_db.get_all = no_snapshots
+        mock_db.batch.return_value.commit = AsyncMock()
+
+        results = asyncio.run(
+            apply_batch(
+                "test_user",
+                "reminders",
+                [
+                    {"op": "create", "id": "r1", "data": {"title": "A", "due_date": "2024-12-31"}},
+                    {"op": "update", "id": "r1", "data": {"title": "Renamed"}},
+                    {"op": "update", "id": "r1", "data": {"due_date": 123}},
+                    {"op": "update", "id": "missing", "data": {"title": "Gone"}},
+                ],
+            )
+        )
+
+    assert [r["status"] for r in results] == ["created", "updated", "error", "error"]
+    assert results[3]["error"] == "Not found"
+    mock_db.batch.return_value.commit.assert_awaited_once()
+
+
+def test_first_page_is_cached_until_a_write(memory_user_cache):
+    page = {"items": [{"id": "r1"}], "next_cursor": None}
+    with patch(
+        "app.services.async_firestore_service.load_page", new_callable=AsyncMock
+    ) as mock_load_page:
+        mock_load_page.return_value = page
+
+        assert asyncio.run(list_page("test_user", "reminders", 50)) == page
+        assert asyncio.run(list_page("test_user", "reminders", 50)) == page
+        assert mock_load_page.await_count == 1
+
+        asyncio.run(list_page("test_user", "reminders", 10))
+        assert mock_load_page.await_count == 2
+
+        user_cache.invalidate("test_user", "reminders")
+        asyncio.run(list_page("test_user", "reminders", 10))
+        asyncio.run(list_page("test_user", "reminders", 10, cursor="next"))
+        assert mock_load_page.await_count == 4
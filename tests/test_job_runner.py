@@ -0,0 +1,80 @@
+import threading
+import time
+
+import pytest
+
+from app.services.job_runner import run_concurrently
+
+
+def test_run_concurrently_bounds_parallelism():
+    active, peak = 0, 0
+    lock = threading.Lock()
+
+    def handler(_item):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+
+    stats = run_concurrently("bounded", range(20), handler, max_workers=4)
+
+    assert stats["processed"] == 20
+    assert stats["failed"] == 0
+    assert peak <= 4
+
+
+def test_run_concurrently_stops_at_deadline_and_skips_overlapping_run():
+    release = threading.Event()
+    pulled = []
+
+    def items():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    stats = run_concurrently(
+        "deadline", items(), lambda _: release.wait(), max_workers=2, deadline_seconds=0.05
+    )
+    assert stats["overran"] is True
+    assert stats["unfinished"] == 2
+    assert len(pulled) <= 3
+
+    assert run_concurrently("deadline", range(1), print)["skipped"] is True
+
+    release.set()
+    time.sleep(0.05)
+    assert run_concurrently("deadline", range(1), lambda _: None)["processed"] == 1
+
+
+def test_run_concurrently_skips_a_run_while_the_previous_one_reads_items():
+    reading, release = threading.Event(), threading.Event()
+
+    def items():
+        # A slow page fetch before anything was submitted.
+        reading.set()
+        release.wait(5)
+        yield 1
+
+    first = threading.Thread(target=run_concurrently, args=("reading", items(), print))
+    first.start()
+    reading.wait(5)
+
+    assert run_concurrently("reading", range(1), print)["skipped"] is True
+
+    release.set()
+    first.join(5)
+    assert run_concurrently("reading", range(1), lambda _: None)["processed"] == 1
+
+
+def test_run_concurrently_can_start_again_after_items_raise():
+    def items():
+        yield 1
+        raise RuntimeError("page fetch failed")
+
+    with pytest.raises(RuntimeError):
+        run_concurrently("raising", items(), lambda _: None)
+
+    assert run_concurrently("raising", range(1), lambda _: None)["processed"] == 1
@@ -1,10 +1,13 @@
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
+import pytest
 from fastapi.testclient import TestClient
 
 from app.main import Dict, app, get_current_user
 from app.models import Reminder
 
+pytestmark = pytest.mark.usefixtures("unlimited_rate_limit")
+
 client = TestClient(app)
 
 # Override the dependency for get_current_user
@@ -36,7 +39,7 @@ def add_reminder(user_id: str, reminder: Reminder) -> Dict:
         return {"error": f"Failed to add reminder: {str(e)}"}
 
 
-@patch("app.services.firestore_service.add_reminder")
+@patch("app.main.add_reminder", new_callable=AsyncMock)
 def test_create_reminder(mock_add_reminder):
     mock_add_reminder.return_value = {
         "message": "Reminder added successfully",
@@ -62,3 +65,170 @@ def test_create_reminder(mock_add_reminder):
     assert response_json["reminder"]["due_date"] == "2024-12-31T10:00:00"
     assert response_json["reminder"]["sent"] is False
     assert response_json["reminder"]["recurring"] is False
+
+
+@patch("app.main.apply_batch", new_callable=AsyncMock)
+def test_batch_reminders_reports_per_item_results(mock_apply_batch):
+    mock_apply_batch.return_value = [
+        {"op": "create", "id": "new_id", "status": "created"},
+        {"op": "delete", "id": "old_id", "status": "deleted"},
+    ]
+    data = {
+        "operations": [
+            {"op": "create", "data": {"title": "Meeting", "due_date": "2024-12-31T10:00:00"}},
+            {"op": "create", "data": {"title": "Missing due date"}},
+            {"op": "update", "data": {"title": "No id"}},
+            {"op": "delete", "id": "old_id"},
+        ]
+    }
+    response = client.post("/reminders:batch", json=data)
+
+    assert response.status_code == 200
+    response_json = response.json()
+    assert [r["status"] for r in response_json["results"]] == [
+        "created",
+        "error",
+        "error",
+        "deleted",
+    ]
+    assert [r["index"] for r in response_json["results"]] == [0, 1, 2, 3]
+    assert response_json["succeeded"] == 2
+    assert response_json["failed"] == 2
+    mock_apply_batch.assert_awaited_once()
+    assert len(mock_apply_batch.await_args.args[2]) == 2
+
+
+@patch("app.main.list_page", new_callable=AsyncMock)
+def test_retrieve_reminders_page(mock_list_page):
+    mock_list_page.return_value = {
+        "items": [{"id": "r1", "title": "Meeting"}],
+        "next_cursor": "next",
+    }
+    response = client.get("/reminders?limit=1&fields=title&cursor=abc")
+
+    assert response.status_code == 200
+    assert response.json() == {"items": [{"id": "r1", "title": "Meeting"}], "next_cursor": "next"}
+    mock_list_page.assert_awaited_once_with("mock_user_id", "reminders", 1, "abc", ["title"])
+
+
+@patch("app.main.list_page", new_callable=AsyncMock)
+def test_retrieve_tasks_rejects_invalid_cursor(mock_list_page):
+    mock_list_page.return_value = {"error": "Invalid cursor"}
+    response = client.get("/tasks?cursor=garbage")
+
+    assert response.status_code == 400
+
+    mock_list_page.return_value = {"error": "Invalid field path: a..b"}
+    assert client.get("/tasks?fields=a..b").status_code == 400
+    mock_list_page.return_value = {"error": "Failed to retrieve tasks: unavailable"}
+    assert client.get("/tasks").status_code == 404
+
+
+@patch("app.main.search_tasks", new_callable=AsyncMock)
+def test_search_tasks_endpoint(mock_search_tasks):
+    mock_search_tasks.return_value = [{"id": "t1", "title": "Buy groceries"}]
+    response = client.get("/tasks/search?query=groc&limit=5")
+
+    assert response.status_code == 200
+    assert response.json() == [{"id": "t1", "title": "Buy groceries"}]
+    mock_search_tasks.assert_awaited_once_with("mock_user_id", "groc", 5)
+
+
+@patch("app.main.update_user_preferences", new_callable=AsyncMock)
+def test_set_preferences_validates_notification_mode(mock_update):
+    mock_update.return_value = {"message": "Preferences updated successfully"}
+    response = client.put("/users/me/preferences", json={"notification_mode": "immediate"})
+
+    assert response.status_code == 200
+    mock_update.assert_awaited_once_with("mock_user_id", {"notification_mode": "immediate"})
+    response = client.put("/users/me/preferences", json={"notification_mode": "hourly"})
+    assert response.status_code == 422
+
+
+@patch("app.main.update_user_preferences", new_callable=AsyncMock)
+def test_set_preferences_rejects_unknown_timezone(mock_update):
+    response = client.put("/users/me/preferences", json={"timezone": "Mars/Olympus_Mons"})
+
+    assert response.status_code == 422
+    mock_update.assert_not_awaited()
+
+
+def test_export_streams_ndjson():
+    async def fake_iter_collection(user_id, collection):
+        yield {"id": f"{collection}-1", "title": "Item"}
+
+    with patch("app.services.data_transfer.iter_collection", fake_iter_collection):
+        response = client.get("/export?collections=tasks")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text == '{"collection": "tasks", "item": {"id": "tasks-1", "title": "Item"}}\n'
+    assert client.get("/export?collections=notes").status_code == 400
+
+
+@patch("app.services.data_transfer.import_items", new_callable=AsyncMock)
+def test_import_reads_ndjson_body(mock_import_items):
+    mock_import_items.return_value = {"imported": 1}
+    body = '{"collection": "reminders", "item": {"title": "A", "due_date": "2024-01-01"}}\n'
+    response = client.post("/import", content=body)
+
+    assert response.status_code == 200
+    assert response.json()["imported"] == {"reminders": 1, "tasks": 0}
+
+
+@patch("app.main.list_page", new_callable=AsyncMock)
+def test_retrieve_tasks_pushes_filters_to_query(mock_list_page):
+    mock_list_page.return_value = {"items": [], "next_cursor": None}
+    response = client.get(
+        "/tasks?status=Pending&category=Work&due_after=2024-01-01T00:00:00%2B00:00"
+    )
+
+    assert response.status_code == 200
+    kwargs = mock_list_page.await_args.kwargs
+    assert kwargs["filters"] == {"status": "Pending", "category": "Work"}
+    assert kwargs["due_after"].isoformat() == "2024-01-01T00:00:00+00:00"
+    assert "due_before" not in kwargs
+    assert client.get("/tasks?due_before=tomorrow").status_code == 400
+
+
+@patch("app.main.list_page", new_callable=AsyncMock)
+def test_overdue_and_upcoming_windows(mock_list_page):
+    mock_list_page.return_value = {"items": [], "next_cursor": None}
+
+    assert client.get("/tasks/overdue").status_code == 200
+    overdue = mock_list_page.await_args.kwargs
+    assert overdue["filters"] == {"status": ("Pending", "In Progress")}
+    assert "due_after" not in overdue
+
+    assert client.get("/tasks/upcoming?hours=48").status_code == 200
+    upcoming = mock_list_page.await_args.kwargs
+    assert (upcoming["due_before"] - upcoming["due_after"]).total_seconds() == 48 * 3600
+
+
+def test_metrics_endpoint_reports_route_latency():
+    client.get("/reminders/not-an-endpoint")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "http_request_duration_seconds_bucket" in response.text
+    assert 'route="/reminders/{reminder_id}"' in response.text
+
+
+@patch("app.main.apply_batch", new_callable=AsyncMock)
+def test_batch_tasks_validates_update_fields(mock_apply_batch):
+    mock_apply_batch.return_value = [{"op": "update", "id": "t2", "status": "updated"}]
+    data = {
+        "operations": [
+            {"op": "update", "id": "t1", "data": {"due_date": 123}},
+            {"op": "update", "id": "t2", "data": {"title": "Renamed", "status": "Completed"}},
+        ]
+    }
+    response = client.post("/tasks:batch", json=data)
+
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["results"]] == ["error", "updated"]
+    valid = mock_apply_batch.await_args.args[2]
+    assert valid == [
+        {"op": "update", "id": "t2", "data": {"title": "Renamed", "status": "Completed"}}
+    ]
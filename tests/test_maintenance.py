@@ -0,0 +1,48 @@
+from datetime import date
+from unittest.mock import MagicMock, patch
+from zoneinfo import ZoneInfo
+
+from app.services.maintenance import (
+    bucket_of,
+    iter_slot_users,
+    maintenance_slot,
+    user_timezone,
+)
+
+
+def test_slot_is_local_off_peak_time_in_utc():
+    user_id = "test_user"
+    bucket = bucket_of(user_id)
+    new_york = ZoneInfo("America/New_York")
+
+    # 03:00 EST is 08:00 UTC in winter and 07:00 UTC under daylight saving.
+    assert maintenance_slot(user_id, new_york, date(2024, 1, 15)) == 8 * 60 + bucket
+    assert maintenance_slot(user_id, new_york, date(2024, 7, 15)) == 7 * 60 + bucket
+    assert maintenance_slot(user_id, ZoneInfo("UTC"), date(2024, 1, 15)) == 3 * 60 + bucket
+
+
+def test_users_are_spread_across_the_window():
+    buckets = {bucket_of(f"user-{i}") for i in range(2000)}
+    assert buckets == set(range(60))
+
+
+def test_unknown_timezone_falls_back_to_default():
+    assert user_timezone("Mars/Olympus_Mons") == ZoneInfo("UTC")
+    assert user_timezone(None) == ZoneInfo("UTC")
+
+
+def test_iter_slot_users_wraps_around_midnight():
+    with patch("app.services.maintenance._users_in_range") as mock_range:
+        mock_range.side_effect = lambda low, high: iter([f"{low}-{high}"])
+        assert list(iter_slot_users(1430, 5)) == ["1430-1439", "-1-5"]
+        assert list(iter_slot_users(10, 12)) == ["10-12"]
+
+
+def test_slot_query_selects_only_references():
+    with patch("app.services.maintenance.db.collection") as mock_db:
+        query = mock_db.return_value.where.return_value.where.return_value
+        snapshot = MagicMock(id="test_user")
+        query.select.return_value.stream.return_value = [snapshot]
+
+        assert list(iter_slot_users(10, 12)) == ["test_user"]
+        query.select.assert_called_once_with([])
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.services import metrics
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_instrumented_counts_error_results_and_exceptions():
+    @metrics.instrumented("firestore", "test_write")
+    def write(result):
+        if result is None:
+            raise RuntimeError("unavailable")
+        return result
+
+    labels = {"dependency": "firestore", "operation": "test_write"}
+    before_ok = sample("dependency_calls_total", outcome="ok", **labels)
+    before_error = sample("dependency_calls_total", outcome="error", **labels)
+
+    write({"message": "Written"})
+    write({"error": "Failed to write"})
+    with pytest.raises(RuntimeError):
+        write(None)
+
+    assert sample("dependency_calls_total", outcome="ok", **labels) == before_ok + 1
+    assert sample("dependency_calls_total", outcome="error", **labels) == before_error + 2
+
+
+def test_instrumented_times_coroutines():
+    @metrics.instrumented("mailersend")
+    async def send_test_email():
+        return {"message": "Sent"}
+
+    labels = {"dependency": "mailersend", "operation": "send_test_email"}
+    before = sample("dependency_call_duration_seconds_count", **labels)
+
+    assert asyncio.run(send_test_email()) == {"message": "Sent"}
+    assert sample("dependency_call_duration_seconds_count", **labels) == before + 1
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+
+    @app.get("/metrics-test/{item_id}")
+    def item(item_id: str):
+        return {"id": item_id}
+
+    app.add_middleware(metrics.MetricsMiddleware)
+    client = TestClient(app)
+    labels = {"method": "GET", "route": "/metrics-test/{item_id}", "status": "200"}
+    before = sample("http_requests_total", **labels)
+
+    client.get("/metrics-test/a")
+    client.get("/metrics-test/b")
+    client.get("/not-a-route")
+
+    assert sample("http_requests_total", **labels) == before + 2
+    assert sample("http_requests_total", method="GET", route="unmatched", status="404") >= 1
+    assert sample("http_requests_in_flight", method="GET") == 0
+
+
+def test_record_job_run_and_reminder_lag():
+    before_items = sample("scheduler_job_items_total", job="test_job", outcome="processed")
+    before_lag = sample("reminder_send_lag_seconds_bucket", le="60.0")
+
+    metrics.record_job_run(
+        {
+            "job": "test_job",
+            "processed": 3,
+            "failed": 1,
+            "unfinished": 0,
+            "duration_seconds": 0.2,
+            "overran": False,
+        }
+    )
+    metrics.observe_reminder_lag([{"due_epoch": 1000}, {"title": "No due time"}], now=1030)
+
+    assert sample("scheduler_job_items_total", job="test_job", outcome="processed") == (
+        before_items + 3
+    )
+    assert sample("reminder_send_lag_seconds_bucket", le="60.0") == before_lag + 1
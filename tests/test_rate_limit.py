@@ -0,0 +1,127 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.services import rate_limit
+from app.services.rate_limit import (
+    LoadShedder,
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    RateLimitMiddleware,
+    RejectedTokenCache,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _client(**options):
+    app = FastAPI()
+
+    @app.get("/reminders")
+    def reminders():
+        return []
+
+    @app.get("/export")
+    def export():
+        return []
+
+    app.add_middleware(RateLimitMiddleware, **options)
+    return TestClient(app)
+
+
+def test_token_bucket_refills_over_time():
+    clock = FakeClock()
+    buckets = MemoryRateLimitBackend(clock=clock)
+
+    assert buckets.take("uid:a", 2, rate=1, burst=2) == 0
+    assert buckets.take("uid:a", 1, rate=1, burst=2) == 1.0
+    assert buckets.take("uid:b", 1, rate=1, burst=2) == 0
+    clock.now = 1.0
+    assert buckets.take("uid:a", 1, rate=1, burst=2) == 0
+
+
+def test_memory_backend_keeps_bounded_number_of_buckets():
+    buckets = MemoryRateLimitBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        buckets.take(key, 1, rate=1, burst=5)
+    assert list(buckets._buckets) == ["b", "c"]
+
+
+@patch("app.services.rate_limit.verify_token_async", new_callable=AsyncMock)
+def test_requests_are_limited_per_user_with_route_costs(mock_verify):
+    mock_verify.side_effect = lambda token: {"uid": token}
+    client = _client(bucket_backend=MemoryRateLimitBackend(), rate=0.001, burst=3)
+
+    alice = {"Authorization": "Bearer alice"}
+    assert client.get("/export", headers=alice).status_code == 200  # costs the whole burst
+    response = client.get("/reminders", headers=alice)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert client.get("/reminders", headers={"Authorization": "Bearer bob"}).status_code == 200
+
+
+def test_invalid_tokens_are_limited_by_address():
+    client = _client(bucket_backend=MemoryRateLimitBackend(), rate=0.001, burst=1)
+
+    assert client.get("/reminders", headers={"Authorization": "Bearer bad"}).status_code == 200
+    assert client.get("/reminders").status_code == 429
+
+
+@patch("app.services.rate_limit.verify_token_async", new_callable=AsyncMock)
+def test_failed_token_verifications_are_cached_briefly(mock_verify):
+    mock_verify.side_effect = ValueError("invalid token")
+    clock = FakeClock()
+    client = _client(bucket_backend=MemoryRateLimitBackend())
+    bad = {"Authorization": "Bearer bad"}
+
+    with patch.object(rate_limit, "rejected_tokens", RejectedTokenCache(ttl=30, clock=clock)):
+        assert client.get("/reminders", headers=bad).status_code == 200
+        assert client.get("/reminders", headers=bad).status_code == 200
+        assert mock_verify.await_count == 1
+
+        clock.now = 31
+        client.get("/reminders", headers=bad)
+        assert mock_verify.await_count == 2
+
+
+def test_rejected_token_cache_is_bounded():
+    rejected = RejectedTokenCache(max_size=2)
+    for token in ("a", "b", "c"):
+        rejected.add(token)
+    assert "a" not in rejected
+    assert "b" in rejected and "c" in rejected
+
+
+def test_rate_limit_backend_requires_take():
+    with pytest.raises(TypeError):
+        RateLimitBackend()
+
+
+def test_load_is_shed_when_too_many_requests_are_in_flight():
+    shedder = LoadShedder(max_in_flight=1)
+    shedder.in_flight = 1
+    client = _client(bucket_backend=MemoryRateLimitBackend(), shedder=shedder)
+
+    response = client.get("/reminders")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_load_is_shed_in_proportion_to_latency_overshoot():
+    shedder = LoadShedder(latency_threshold=1.0, chance=lambda: 0.4)
+    shedder.latency = 1.2
+    assert shedder.admit() is None
+    shedder.release()
+
+    shedder.latency = 1.5
+    assert shedder.admit() == "Server is responding slowly"
+    shedder.latency = 10.0
+    assert shedder.shed_ratio() == 0.9
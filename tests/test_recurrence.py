@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.recurrence import RecurrenceRule, advance_items
+
+START = datetime(2024, 1, 31, 9, 0)
+
+
+def test_monthly_rule_keeps_month_end_anchor():
+    rule = RecurrenceRule.parse("FREQ=MONTHLY")
+
+    assert rule.next_after(START, START) == datetime(2024, 2, 29, 9, 0)
+    assert rule.next_after(START, datetime(2024, 2, 29, 9, 0)) == datetime(2024, 3, 31, 9, 0)
+
+
+def test_next_occurrence_skips_missed_periods():
+    rule = RecurrenceRule.parse("FREQ=DAILY;INTERVAL=3")
+
+    # 2029-12-30 is 2160 days, or 720 intervals, after the start.
+    assert rule.next_after(START, datetime(2029, 12, 30, 8)) == datetime(2029, 12, 30, 9, 0)
+    assert rule.next_after(START, datetime(2029, 12, 30, 10)) == datetime(2030, 1, 2, 9, 0)
+
+
+def test_weekly_by_day_with_count():
+    rule = RecurrenceRule.parse("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR;COUNT=3")
+
+    assert rule.next_after(START, START) == datetime(2024, 2, 2, 9, 0)
+    assert rule.next_after(START, datetime(2024, 2, 2, 9, 0)) == datetime(2024, 2, 12, 9, 0)
+    assert rule.next_after(START, datetime(2024, 2, 12, 9, 0)) == datetime(2024, 2, 16, 9, 0)
+    assert rule.next_after(START, datetime(2024, 2, 16, 9, 0)) is None
+
+
+def test_monthly_ordinal_weekday_and_until():
+    last_friday = RecurrenceRule.parse("FREQ=MONTHLY;BYDAY=-1FR;UNTIL=20240430")
+
+    assert last_friday.next_after(START, datetime(2024, 3, 1)) == datetime(2024, 3, 29, 9, 0)
+    assert last_friday.next_after(START, datetime(2024, 4, 26, 9, 0)) is None
+
+
+@pytest.mark.parametrize(
+    "rule",
+    ["FREQ=HOURLY", "FREQ=DAILY;BYDAY=MO", "FREQ=MONTHLY;BYDAY=MO", "FREQ=WEEKLY;BYSETPOS=1"],
+)
+def test_unsupported_rules_are_rejected(rule):
+    with pytest.raises(ValueError):
+        RecurrenceRule.parse(rule)
+
+
+def test_advance_items_anchors_series_and_ends_it():
+    items = [
+        {"id": "monthly", "due_date": "2024-02-29T09:00:00", "recurrence_interval": "monthly",
+         "recurrence_start": "2024-01-31T09:00:00"},
+        {"id": "limited", "due_date": "2024-01-31T09:00:00",
+         "recurrence_rule": "FREQ=DAILY;COUNT=2"},
+        {"id": "one-off", "due_date": "2024-01-31T09:00:00"},
+    ]
+
+    updates = advance_items(items, now=datetime(2024, 3, 10))
+
+    assert updates == {
+        "monthly": {"due_date": "2024-03-31T09:00:00", "recurrence_start": "2024-01-31T09:00:00"},
+        "limited": {"recurring": False},
+    }
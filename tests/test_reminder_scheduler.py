@@ -0,0 +1,277 @@
+from datetime import date, datetime, timezone
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app.services import reminder_scheduler
+from app.services.maintenance import maintenance_slot
+from app.services.sharding import shard_of
+
+SHARDS = 2
+
+
+class FakeCoordinator:
+    """Stand-in for ShardCoordinator whose owned shards the test controls."""
+
+    def __init__(self, owned):
+        self.shards = SHARDS
+        self.owned = frozenset(owned)
+
+    def owns(self, user_id):
+        return shard_of(user_id, self.shards) in self.owned
+
+
+@pytest.fixture
+def coordinator():
+    fake = FakeCoordinator({0})
+    with patch.object(reminder_scheduler, "shard_coordinator", fake):
+        yield fake
+
+
+def test_owned_user_ids_catches_up_on_shards_gained_mid_run(coordinator):
+    user_ids = [f"user-{i}" for i in range(20)]
+
+    def first_pass(job):
+        for index, user_id in enumerate(user_ids):
+            if index == 10:
+                coordinator.owned = frozenset({0, 1})
+            yield user_id
+
+    with patch.object(
+        reminder_scheduler, "iter_user_ids", side_effect=[first_pass(None), iter(user_ids)]
+    ) as mock_iter:
+        processed = list(reminder_scheduler.owned_user_ids("job"))
+
+    assert sorted(processed) == sorted(user_ids)
+    assert len(processed) == len(set(processed))
+    mock_iter.assert_any_call(job=f"job:{reminder_scheduler.SCHEDULER_NODE_ID}")
+
+
+def test_owned_user_ids_skips_catch_up_without_gained_shards(coordinator):
+    user_ids = [f"user-{i}" for i in range(20)]
+
+    with patch.object(
+        reminder_scheduler, "iter_user_ids", return_value=iter(user_ids)
+    ) as mock_iter:
+        processed = list(reminder_scheduler.owned_user_ids("job"))
+
+    assert processed == [user_id for user_id in user_ids if shard_of(user_id, SHARDS) == 0]
+    mock_iter.assert_called_once()
+
+
+# Due Reminders
+
+
+def test_due_reminders_are_grouped_per_page_inside_the_tick():
+    pages_read = []
+
+    def pages(now):
+        for page in (
+            [("u1", {"id": "r1"}), ("u2", {"id": "r2"}), ("u1", {"id": "r3"})],
+            [("u1", {"id": "r4"})],
+        ):
+            pages_read.append(page)
+            yield page
+
+    def run(job, items, handler, **kwargs):
+        # Nothing is read before the job runner starts pulling items.
+        assert pages_read == []
+        return {"job": job, "groups": list(items)}
+
+    with patch.object(reminder_scheduler, "iter_due_reminder_pages", side_effect=pages), \
+            patch.object(reminder_scheduler, "run_concurrently", side_effect=run):
+        stats = reminder_scheduler.check_and_send_reminders()
+
+    assert stats["groups"] == [
+        ("u1", [{"id": "r1"}, {"id": "r3"}]),
+        ("u2", [{"id": "r2"}]),
+        ("u1", [{"id": "r4"}]),
+    ]
+
+
+# Notification Modes
+
+
+def _reminder(reminder_id, due_date="2024-12-31T09:00:00"):
+    return {"id": reminder_id, "title": f"Reminder {reminder_id}", "due_date": due_date}
+
+
+def _settings(mode):
+    return {"email": "user@example.com", "notification_mode": mode}
+
+
+@patch.object(reminder_scheduler, "bulk_update_reminders")
+@patch.object(reminder_scheduler, "queue_email", return_value={"message": "queued"})
+@patch.object(reminder_scheduler, "get_notification_settings", return_value=_settings("digest"))
+def test_digest_user_gets_one_email_with_a_stable_dedupe_key(
+    _mock_settings, mock_queue, mock_bulk_update
+):
+    reminders = [_reminder("r1"), _reminder("r2"), _reminder("r3")]
+
+    reminder_scheduler.send_user_due_reminders(("user-1", reminders))
+    reminder_scheduler.send_user_due_reminders(("user-1", list(reversed(reminders))))
+
+    assert mock_queue.call_count == 2
+    first, second = (call.kwargs["dedupe_key"] for call in mock_queue.call_args_list)
+    assert first == second
+    assert first.startswith("reminder-digest:user-1:")
+    mock_bulk_update.assert_called_with(
+        "user-1", {"r1": {"sent": True}, "r2": {"sent": True}, "r3": {"sent": True}}
+    )
+
+
+@patch.object(reminder_scheduler, "bulk_update_reminders")
+@patch.object(reminder_scheduler, "queue_email", return_value={"message": "queued"})
+@patch.object(
+    reminder_scheduler, "get_notification_settings", return_value=_settings("immediate")
+)
+def test_immediate_user_gets_one_email_per_reminder(
+    _mock_settings, mock_queue, mock_bulk_update
+):
+    reminders = [_reminder("r1"), _reminder("r2")]
+
+    reminder_scheduler.send_user_due_reminders(("user-1", reminders))
+
+    assert [call.kwargs["dedupe_key"] for call in mock_queue.call_args_list] == [
+        "reminder:user-1:r1:2024-12-31T09:00:00",
+        "reminder:user-1:r2:2024-12-31T09:00:00",
+    ]
+    mock_bulk_update.assert_called_once_with(
+        "user-1", {"r1": {"sent": True}, "r2": {"sent": True}}
+    )
+
+
+@pytest.mark.parametrize("mode", ["digest", "immediate"])
+@patch.object(reminder_scheduler, "bulk_update_reminders")
+@patch.object(reminder_scheduler, "queue_email", return_value={"error": "outbox unavailable"})
+@patch.object(reminder_scheduler, "get_notification_settings")
+def test_reminders_are_not_marked_sent_when_queueing_fails(
+    mock_settings, _mock_queue, mock_bulk_update, mode
+):
+    mock_settings.return_value = _settings(mode)
+
+    reminder_scheduler.send_user_due_reminders(("user-1", [_reminder("r1"), _reminder("r2")]))
+
+    mock_bulk_update.assert_not_called()
+
+
+@patch.object(reminder_scheduler, "queue_email", return_value={"message": "queued"})
+@patch.object(reminder_scheduler, "get_notification_settings", return_value=_settings("digest"))
+@patch.object(reminder_scheduler, "get_overdue_tasks")
+def test_overdue_digest_is_one_email_per_day(mock_overdue, _mock_settings, mock_queue):
+    mock_overdue.return_value = [
+        {"id": "t1", "title": "Task 1", "due_date": "2024-01-01"},
+        {"id": "t2", "title": "Task 2", "due_date": "2024-01-02"},
+    ]
+
+    reminder_scheduler.notify_user_overdue_tasks("user-1")
+
+    mock_queue.assert_called_once()
+    today = date.today().isoformat()
+    assert mock_queue.call_args.kwargs["dedupe_key"] == f"overdue-digest:user-1:{today}"
+
+
+@patch.object(reminder_scheduler, "queue_email", return_value={"message": "queued"})
+@patch.object(
+    reminder_scheduler, "get_notification_settings", return_value=_settings("immediate")
+)
+@patch.object(reminder_scheduler, "get_overdue_tasks")
+def test_overdue_immediate_is_one_email_per_task(mock_overdue, _mock_settings, mock_queue):
+    mock_overdue.return_value = [
+        {"id": "t1", "title": "Task 1", "due_date": "2024-01-01"},
+        {"id": "t2", "title": "Task 2", "due_date": "2024-01-02"},
+    ]
+
+    reminder_scheduler.notify_user_overdue_tasks("user-1")
+
+    assert mock_queue.call_count == 2
+
+
+# Local Maintenance
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def _fixed_now(at):
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return at.astimezone(tz)
+
+    return FixedDatetime
+
+
+@pytest.fixture
+def maintenance_cursor():
+    with patch.object(reminder_scheduler, "maintenance_cursor", 100):
+        yield
+
+
+@pytest.mark.usefixtures("maintenance_cursor")
+@patch.object(reminder_scheduler, "iter_slot_users", return_value=iter([]))
+@patch.object(reminder_scheduler, "current_slot", return_value=105)
+@patch.object(reminder_scheduler, "run_concurrently")
+def test_maintenance_cursor_advances_after_a_complete_tick(
+    mock_run, _mock_slot, mock_slot_users
+):
+    mock_run.return_value = {"job": "run_maintenance_slots", "overran": False}
+
+    reminder_scheduler.run_maintenance_slots()
+
+    mock_slot_users.assert_called_once_with(100, 105)
+    assert reminder_scheduler.maintenance_cursor == 105
+
+
+@pytest.mark.usefixtures("maintenance_cursor")
+@patch.object(reminder_scheduler, "iter_slot_users", return_value=iter([]))
+@patch.object(reminder_scheduler, "current_slot", side_effect=[105, 106])
+@patch.object(reminder_scheduler, "run_concurrently")
+def test_maintenance_cursor_stays_when_a_tick_overruns(mock_run, _mock_slot, mock_slot_users):
+    mock_run.return_value = {"job": "run_maintenance_slots", "overran": True}
+
+    reminder_scheduler.run_maintenance_slots()
+    assert reminder_scheduler.maintenance_cursor == 100
+
+    # The next tick covers the overrun tick's slots again.
+    reminder_scheduler.run_maintenance_slots()
+    assert mock_slot_users.call_args_list[-1].args == (100, 106)
+
+
+@patch.object(reminder_scheduler, "set_maintenance_slot")
+@patch.object(reminder_scheduler, "reschedule_recurring_reminders")
+@patch.object(reminder_scheduler, "get_user_data")
+def test_maintain_user_skips_a_user_already_maintained_today(
+    mock_user_data, mock_reschedule, mock_set_slot
+):
+    # Clocks fall back on 2024-11-03 in New York, so the 03:00 local slot
+    # moves from 07:00 UTC to 08:00 UTC and a user can come up twice that day.
+    at = datetime(2024, 11, 3, 8, 0, tzinfo=timezone.utc)
+    mock_user_data.return_value = {"timezone": "America/New_York", "maintained_on": "2024-11-03"}
+
+    with patch.object(reminder_scheduler, "datetime", _fixed_now(at)):
+        reminder_scheduler.maintain_user("user-1")
+
+    mock_reschedule.assert_not_called()
+    mock_set_slot.assert_not_called()
+
+
+@patch.object(reminder_scheduler, "archive_completed_tasks")
+@patch.object(reminder_scheduler, "reschedule_recurring_tasks")
+@patch.object(reminder_scheduler, "expire_old_reminders")
+@patch.object(reminder_scheduler, "reschedule_recurring_reminders")
+@patch.object(reminder_scheduler, "set_maintenance_slot")
+@patch.object(reminder_scheduler, "get_user_data")
+def test_maintain_user_moves_the_slot_across_a_dst_change(
+    mock_user_data, mock_set_slot, mock_reschedule, *_mocks
+):
+    at = datetime(2024, 11, 2, 7, 0, tzinfo=timezone.utc)
+    mock_user_data.return_value = {"timezone": "America/New_York", "maintained_on": "2024-11-01"}
+
+    with patch.object(reminder_scheduler, "datetime", _fixed_now(at)):
+        reminder_scheduler.maintain_user("user-1")
+
+    mock_reschedule.assert_called_once_with("user-1")
+    next_slot = maintenance_slot("user-1", NEW_YORK, date(2024, 11, 3))
+    assert next_slot == maintenance_slot("user-1", NEW_YORK, date(2024, 11, 2)) + 60
+    mock_set_slot.assert_called_once_with("user-1", next_slot, maintained_on="2024-11-02")
@@ -0,0 +1,67 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.services.reminder_timer import ReminderTimer, watch_unsent_reminders
+
+
+def test_pop_due_returns_reminders_in_due_order_and_skips_cancelled():
+    timer = ReminderTimer(on_due=lambda keys: None)
+    timer.schedule("u1", "late", 300)
+    timer.schedule("u1", "early", 100)
+    timer.schedule("u2", "moved", 150)
+    timer.schedule("u2", "moved", 500)
+    timer.schedule("u2", "deleted", 120)
+    timer.cancel("u2", "deleted")
+
+    assert timer.pop_due(200) == [("u1", "early")]
+    assert timer.pop_due(400) == [("u1", "late")]
+    assert len(timer) == 1
+    assert timer.pop_due(500) == [("u2", "moved")]
+
+
+def test_run_fires_reminder_when_it_comes_due():
+    fired = []
+    done = threading.Event()
+    timer = ReminderTimer(on_due=lambda keys: (fired.extend(keys), done.set()))
+    thread = threading.Thread(target=timer.run, daemon=True)
+    thread.start()
+
+    # Scheduling an earlier reminder wakes the sleeping timer thread.
+    timer.schedule("u1", "r1", int(time.time()) + 1)
+    assert done.wait(timeout=5)
+    timer.stop()
+    thread.join(timeout=5)
+
+    assert fired == [("u1", "r1")]
+
+
+def _change(kind, user_id, reminder_id, data):
+    document = MagicMock()
+    document.id = reminder_id
+    document.reference.parent.parent.id = user_id
+    document.to_dict.return_value = data
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=document)
+
+
+def test_listener_changes_update_the_timer():
+    timer = ReminderTimer(on_due=lambda keys: None)
+    timer.schedule("u1", "sent", 100)
+
+    with patch("app.services.reminder_timer.db") as mock_db:
+        watch_unsent_reminders(timer)
+        query = mock_db.collection_group.return_value.where.return_value.order_by.return_value
+        on_snapshot = query.on_snapshot.call_args.args[0]
+
+    on_snapshot(
+        [],
+        [
+            _change("ADDED", "u1", "new", {"due_epoch": 200}),
+            _change("REMOVED", "u1", "sent", {"due_epoch": 100}),
+            _change("MODIFIED", "u2", "no_due", {}),
+        ],
+        None,
+    )
+
+    assert timer.pop_due(1000) == [("u1", "new")]
@@ -0,0 +1,131 @@
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from app.services.sharding import (LEASE_COLLECTION, FirestoreLeaseStore,
+                                   ShardCoordinator, shard_of)
+
+SHARDS = 8
+
+
+class FakeLeaseStore:
+    """In-memory stand-in for FirestoreLeaseStore with a controllable clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.leases = {}
+        self.nodes = {}
+
+    def acquire(self, shard, node_id, ttl):
+        owner, expires_at = self.leases.get(shard, (None, 0))
+        if owner not in (None, node_id) and expires_at > self.now:
+            return False
+        self.leases[shard] = (node_id, self.now + ttl)
+        return True
+
+    def release(self, shard, node_id):
+        if self.leases.get(shard, (None,))[0] == node_id:
+            del self.leases[shard]
+
+    def heartbeat(self, node_id, ttl):
+        self.nodes[node_id] = self.now + ttl
+
+    def live_nodes(self):
+        return sum(expires_at > self.now for expires_at in self.nodes.values())
+
+    def remove_node(self, node_id):
+        self.nodes.pop(node_id, None)
+
+
+def _settle(coordinators, rounds=3):
+    for _ in range(rounds):
+        for coordinator in coordinators:
+            coordinator.rebalance()
+
+
+def test_shard_of_is_stable_and_in_range():
+    assert shard_of("user-1", SHARDS) == shard_of("user-1", SHARDS)
+    assert {shard_of(f"user-{i}", SHARDS) for i in range(1000)} == set(range(SHARDS))
+
+
+def test_nodes_partition_shards_and_take_over_from_a_dead_node():
+    store = FakeLeaseStore()
+    nodes = [ShardCoordinator(SHARDS, f"node-{i}", store, lease_seconds=30) for i in range(3)]
+    _settle(nodes)
+
+    owned = [node.owned for node in nodes]
+    assert sorted(shard for shards in owned for shard in shards) == list(range(SHARDS))
+    assert all(len(shards) <= 3 for shards in owned)
+
+    # node-0 stops renewing; once its lease and heartbeat expire the others take over.
+    store.now += 31
+    _settle(nodes[1:])
+
+    survivors = nodes[1].owned | nodes[2].owned
+    assert survivors == set(range(SHARDS))
+    assert not nodes[1].owned & nodes[2].owned
+
+
+def test_new_node_receives_a_share():
+    store = FakeLeaseStore()
+    first = ShardCoordinator(SHARDS, "node-a", store)
+    _settle([first])
+    assert first.owned == set(range(SHARDS))
+
+    second = ShardCoordinator(SHARDS, "node-b", store)
+    _settle([second, first])
+
+    assert len(first.owned) == len(second.owned) == SHARDS // 2
+    assert first.owns("any-user") != second.owns("any-user")
+
+
+# Firestore emulator test: several scheduler processes competing for leases.
+
+
+def _run_node(node_id, stop):
+    coordinator = ShardCoordinator(SHARDS, node_id, lease_seconds=3, renew_seconds=0.5)
+    coordinator.start()
+    stop.wait()
+    coordinator.stop()
+
+
+def _lease_owners():
+    store = FirestoreLeaseStore()
+    now = time.time()
+    return {
+        int(snapshot.id): snapshot.to_dict()["owner"]
+        for snapshot in store.db.collection(LEASE_COLLECTION).stream()
+        if snapshot.to_dict()["expires_at"] > now
+    }
+
+
+@pytest.mark.skipif(
+    not os.getenv("FIRESTORE_EMULATOR_HOST"), reason="requires the Firestore emulator"
+)
+def test_processes_share_and_rebalance_leases_on_emulator():
+    context = multiprocessing.get_context("spawn")
+    stops = [context.Event() for _ in range(3)]
+    processes = [
+        context.Process(target=_run_node, args=(f"proc-{i}", stop), daemon=True)
+        for i, stop in enumerate(stops)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        time.sleep(8)
+        owners = _lease_owners()
+        assert sorted(owners) == list(range(SHARDS))
+        assert set(owners.values()) == {"proc-0", "proc-1", "proc-2"}
+
+        processes[0].kill()
+        time.sleep(8)
+        owners = _lease_owners()
+        assert sorted(owners) == list(range(SHARDS))
+        assert set(owners.values()) == {"proc-1", "proc-2"}
+    finally:
+        for stop in stops:
+            stop.set()
+        for process in processes:
+            process.join(timeout=10)
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.services import user_cache
+from app.services.async_firestore_service import list_collection
+from app.services.firestore_service import AsyncSingleFlight, SingleFlight, get_user_data
+
+
+def test_concurrent_threads_share_one_read():
+    flights = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def read():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"name": "Ada"}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flights.do, "profile:u1", read)
+        started.wait(5)
+        followers = [pool.submit(flights.do, "profile:u1", read) for _ in range(3)]
+        while flights.stats()["shared"] < 3:
+            time.sleep(0.001)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+
+    assert len(calls) == 1
+    assert all(result == {"name": "Ada"} for result in results)
+    assert flights.stats() == {"calls": 1, "shared": 3, "in_flight": 0}
+
+
+def test_errors_are_shared_and_not_remembered():
+    flights = SingleFlight()
+
+    def fail():
+        raise RuntimeError("unavailable")
+
+    with pytest.raises(RuntimeError):
+        flights.do("key", fail)
+    assert flights.do("key", lambda: "ok") == "ok"
+
+
+def test_concurrent_tasks_share_one_read():
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def read():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["reminder"]
+
+    async def main():
+        return await asyncio.gather(*(flights.do("reminders:u1", read) for _ in range(5)))
+
+    assert asyncio.run(main()) == [["reminder"]] * 5
+    assert len(calls) == 1
+    assert flights.stats() == {"calls": 1, "shared": 4, "in_flight": 0}
+
+
+def test_reads_are_exported_per_mode():
+    def sample(mode, outcome):
+        labels = {"mode": mode, "outcome": outcome}
+        return REGISTRY.get_sample_value("single_flight_reads_total", labels) or 0
+
+    before = {outcome: sample("asyncio", outcome) for outcome in ("issued", "shared")}
+    flights = AsyncSingleFlight()
+
+    async def read():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def main():
+        await asyncio.gather(*(flights.do("key", read) for _ in range(3)))
+
+    asyncio.run(main())
+
+    assert sample("asyncio", "issued") - before["issued"] == 1
+    assert sample("asyncio", "shared") - before["shared"] == 2
+
+
+def test_cancelled_caller_does_not_cancel_shared_read():
+    flights = AsyncSingleFlight()
+
+    async def read():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flights.do("key", read))
+        second = asyncio.ensure_future(flights.do("key", read))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_get_user_data_reads_through_single_flight():
+    with patch("app.services.firestore_service.read_flights") as mock_flights, patch(
+        "app.services.user_cache._cached", return_value=None
+    ):
+        mock_flights.do.return_value = {"email": "a@example.com"}
+        assert get_user_data("u1") == {"email": "a@example.com"}
+        assert mock_flights.do.call_args.args[0].startswith("profile:u1:")
+
+
+@pytest.mark.usefixtures("memory_user_cache")
+def test_read_after_a_write_does_not_join_an_earlier_read():
+    started, release = threading.Event(), threading.Event()
+    profiles = iter([{"name": "Old"}, {"name": "New"}])
+
+    def load(user_id):
+        profile = next(profiles)
+        if profile["name"] == "Old":
+            started.set()
+            release.wait(5)
+        return profile
+
+    with patch("app.services.firestore_service.load_user_data", side_effect=load), \
+            ThreadPoolExecutor(max_workers=2) as pool:
+        before_write = pool.submit(get_user_data, "u1")
+        started.wait(5)
+        user_cache.invalidate("u1", "profile")
+        after_write = pool.submit(get_user_data, "u1")
+        assert after_write.result(5) == {"name": "New"}
+        release.set()
+        assert before_write.result(5) == {"name": "Old"}
+
+
+@pytest.mark.usefixtures("memory_user_cache")
+def test_async_read_after_a_write_does_not_join_an_earlier_read():
+    loads = []
+
+    async def load(user_id, collection):
+        loads.append(1)
+        if len(loads) == 1:
+            await asyncio.sleep(0.05)
+            return [{"id": "r1", "title": "Old"}]
+        return [{"id": "r1", "title": "New"}]
+
+    async def main():
+        before_write = asyncio.ensure_future(list_collection("u1", "reminders"))
+        await asyncio.sleep(0)
+        user_cache.invalidate("u1", "reminders")
+        after_write = await list_collection("u1", "reminders")
+        return await before_write, after_write
+
+    with patch("app.services.async_firestore_service.load_collection", side_effect=load):
+        before_write, after_write = asyncio.run(main())
+
+    assert after_write == [{"id": "r1", "title": "New"}]
+    assert before_write == [{"id": "r1", "title": "Old"}]
@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+from app.services import task_index, user_cache
+from app.services.task_index import TaskIndex
+
+TASKS = [
+    {"id": "t1", "title": "Buy groceries", "category": "Errands", "description": None},
+    {"id": "t2", "title": "Plan trip", "category": "Travel", "description": "Buy train tickets"},
+    {"id": "t3", "title": "Groceries", "category": "Home", "description": ""},
+    {"id": "t4", "title": "Write report", "category": "Work", "description": "Quarterly"},
+]
+
+
+def scan(tasks, query):
+    needle = query.lower()
+    return {
+        task["id"]
+        for task in tasks
+        if any(needle in (task.get(f) or "").lower() for f in ("title", "category", "description"))
+    }
+
+
+def test_search_matches_full_scan():
+    index = TaskIndex(TASKS)
+
+    for query in ["buy", "GROC", "o", "", "ticket", "arterl", "nothing here"]:
+        assert {task["id"] for task in index.search(query)} == scan(TASKS, query)
+
+
+def test_search_ranks_exact_and_title_matches_first():
+    index = TaskIndex(TASKS)
+
+    assert [task["id"] for task in index.search("groceries")] == ["t3", "t1"]
+    assert [task["id"] for task in index.search("buy")] == ["t1", "t2"]
+    assert len(index.search("o", limit=2)) == 2
+
+
+def test_index_is_updated_incrementally():
+    index = TaskIndex(TASKS)
+
+    index.add({"id": "t5", "title": "Renew passport", "category": "Travel"})
+    assert index.update("t1", {"title": "Pay rent"})
+    index.remove("t3")
+
+    assert [task["id"] for task in index.search("passport")] == ["t5"]
+    assert index.search("groceries") == []
+    assert index.search("rent")[0] == {**TASKS[0], "title": "Pay rent"}
+    assert not index.update("missing", {"title": "x"})
+
+
+@pytest.mark.usefixtures("memory_user_cache")
+def test_update_hook_drops_index_for_unknown_task():
+    task_index.build_index("u1", TASKS, task_index.current_version("u1"))
+
+    task_index.update_task("u1", "t1", {"title": "Pay rent"})
+    assert task_index.get_index("u1").search("rent")[0]["id"] == "t1"
+
+    task_index.update_task("u1", "unknown", {"title": "Created elsewhere"})
+    assert task_index.get_index("u1") is None
+
+
+def test_substring_lookup_matches_full_scan_after_changes():
+    rng = random.Random(0)
+    syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "to"]
+    words = ["".join(rng.choices(syllables, k=rng.randint(1, 4))) for _ in range(60)]
+    tasks = [
+        {"id": f"t{i}", "title": " ".join(rng.choices(words, k=3)), "category": rng.choice(words)}
+        for i in range(200)
+    ]
+    index = TaskIndex(tasks)
+    for task in tasks[:100]:
+        index.remove(task["id"])
+    remaining = tasks[100:]
+
+    for query in ["k", "ka", "kal", "kalo", "alomi", "ru sa", "lomine", "zz"]:
+        assert {task["id"] for task in index.search(query)} == scan(remaining, query)
+    vocabulary = set()
+    for task in remaining:
+        vocabulary |= task_index._words(f"{task['title']} {task['category']}".lower())
+    assert set().union(*index._gram_words.values()) == vocabulary
+
+
+@pytest.mark.usefixtures("memory_user_cache")
+def test_index_is_dropped_after_a_write_in_another_process():
+    task_index.build_index("u1", TASKS, task_index.current_version("u1"))
+
+    task_index.add_task("u1", {"id": "t5", "title": "Renew passport"})
+    assert task_index.get_index("u1").search("passport")[0]["id"] == "t5"
+
+    # Another worker sharing the cache backend writes a task.
+    user_cache.bump_version("u1", task_index.VERSION_SECTION)
+    assert task_index.get_index("u1") is None
+
+
+@pytest.mark.usefixtures("memory_user_cache")
+def test_write_hook_drops_index_that_missed_a_write_elsewhere():
+    index = task_index.build_index("u1", TASKS, task_index.current_version("u1"))
+
+    user_cache.bump_version("u1", task_index.VERSION_SECTION)
+    task_index.add_task("u1", {"id": "t5", "title": "Renew passport"})
+
+    assert task_index.get_index("u1") is None
+    assert index.version != task_index.current_version("u1")
@@ -0,0 +1,48 @@
+import time
+from unittest.mock import Mock, patch
+
+from app.services import token_cache as token_cache_module
+from app.services.token_cache import TokenCache, token_cache, verify_token
+
+
+def test_verify_token_skips_verification_on_cache_hit():
+    token_cache.clear()
+    verify = Mock(return_value={"uid": "user_1", "exp": time.time() + 3600})
+
+    assert verify_token("token-1", verify)["uid"] == "user_1"
+    assert verify_token("token-1", verify)["uid"] == "user_1"
+
+    verify.assert_called_once_with("token-1")
+
+
+def test_token_cache_expires_and_evicts_entries():
+    cache = TokenCache(max_size=2)
+    cache.put("expired", {"uid": "a", "exp": time.time() - 1})
+    assert cache.get("expired") is None
+
+    cache.put("t1", {"uid": "1", "exp": time.time() + 3600})
+    cache.put("t2", {"uid": "2", "exp": time.time() + 3600})
+    cache.get("t1")
+    cache.put("t3", {"uid": "3", "exp": time.time() + 3600})
+
+    assert cache.get("t2") is None
+    assert cache.get("t1")["uid"] == "1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_certificate_refresher_is_disabled_without_sdk_internals():
+    with patch.object(token_cache_module.auth, "_get_client", return_value=object()), \
+            patch.object(token_cache_module.threading, "Thread") as mock_thread:
+        assert token_cache_module.start_certificate_refresher() is None
+
+    mock_thread.assert_not_called()
+
+
+def test_refresh_certificates_uses_the_given_request():
+    request = Mock()
+
+    token_cache_module.refresh_certificates(request)
+
+    request.assert_called_once_with(
+        url=token_cache_module._token_gen.ID_TOKEN_CERT_URI, method="GET"
+    )
@@ -0,0 +1,64 @@
+import pickle
+from unittest.mock import Mock
+
+import pytest
+
+from app.services import user_cache
+from app.services.user_cache import MemoryCacheBackend
+
+
+def test_read_through_caches_until_invalidated(memory_user_cache):
+    loader = Mock(return_value=[{"id": "r1"}])
+
+    assert user_cache.read_through("u1", "reminders", loader) == [{"id": "r1"}]
+    assert user_cache.read_through("u1", "reminders", loader) == [{"id": "r1"}]
+    assert loader.call_count == 1
+
+    user_cache.invalidate("u1", "reminders")
+    user_cache.read_through("u1", "reminders", loader)
+    assert loader.call_count == 2
+
+
+def test_read_through_does_not_cache_errors(memory_user_cache):
+    loader = Mock(return_value={"error": "Failed to retrieve reminders"})
+
+    user_cache.read_through("u1", "reminders", loader)
+    user_cache.read_through("u1", "reminders", loader)
+
+    assert loader.call_count == 2
+
+
+def test_memory_backend_evicts_least_recently_used_over_byte_cap():
+    value = ["x" * 100]
+    entry_size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    backend = MemoryCacheBackend(max_entries=100, max_bytes=entry_size * 2)
+    backend.set("a", value, ttl=60)
+    backend.set("b", value, ttl=60)
+    backend.get("a")
+    backend.set("c", value, ttl=60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == value
+    assert backend.stats()["evictions"] == 1
+
+
+def test_read_through_does_not_cache_a_load_that_raced_an_invalidation(memory_user_cache):
+    def stale_loader():
+        # A write lands while the old data is being read.
+        user_cache.invalidate("u1", "reminders")
+        return [{"id": "r1", "title": "Old"}]
+
+    assert user_cache.read_through("u1", "reminders", stale_loader)[0]["title"] == "Old"
+
+    fresh_loader = Mock(return_value=[{"id": "r1", "title": "New"}])
+    assert user_cache.read_through("u1", "reminders", fresh_loader)[0]["title"] == "New"
+    assert fresh_loader.call_count == 1
+
+
+def test_cache_backend_requires_the_interface():
+    class Incomplete(user_cache.CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,35 @@
+from unittest.mock import patch
+
+from app.services import user_directory
+
+
+def _pages(page_size, cursor=None):
+    pages = {None: (["u1", "u2"], "c1"), "c1": (["u3", "u4"], "c2"), "c2": (["u5"], None)}
+    while True:
+        user_ids, cursor = pages[cursor]
+        yield user_ids, cursor
+        if cursor is None:
+            return
+
+
+def test_iter_user_ids_resumes_from_checkpoint():
+    with patch.dict(user_directory.PAGE_SOURCES, {"auth": _pages}), patch.object(
+        user_directory, "load_checkpoint", return_value="c1"
+    ), patch.object(user_directory, "save_checkpoint") as mock_save, patch.object(
+        user_directory, "clear_checkpoint"
+    ) as mock_clear:
+        user_ids = list(user_directory.iter_user_ids(job="nightly", source="auth"))
+
+    assert user_ids == ["u3", "u4", "u5"]
+    mock_save.assert_called_once_with("nightly", "auth", "c2")
+    mock_clear.assert_called_once_with("nightly")
+
+
+def test_iter_user_ids_checkpoints_only_consumed_pages():
+    with patch.dict(user_directory.PAGE_SOURCES, {"auth": _pages}), patch.object(
+        user_directory, "load_checkpoint", return_value=None
+    ), patch.object(user_directory, "save_checkpoint") as mock_save:
+        user_ids = user_directory.iter_user_ids(job="nightly", source="auth")
+        assert [next(user_ids) for _ in range(3)] == ["u1", "u2", "u3"]
+
+    mock_save.assert_called_once_with("nightly", "auth", "c1")